@@ -8,6 +8,7 @@ const SEVERITY_COLORS = {
   high: { bg: 'rgba(255, 204, 102, 0.08)', border: 'rgba(255, 204, 102, 0.25)', text: SK.signalYellow, label: 'High' },
   medium: { bg: 'rgba(109, 177, 199, 0.08)', border: 'rgba(109, 177, 199, 0.25)', text: SK.aqua, label: 'Medium' },
   low: { bg: 'rgba(168, 185, 195, 0.08)', border: 'rgba(168, 185, 195, 0.2)', text: SK.textMuted, label: 'Low' },
+  performance: { bg: 'rgba(47, 167, 77, 0.08)', border: 'rgba(47, 167, 77, 0.25)', text: SK.signalGreen, label: 'Performance' },
 };
 
 function ScoreBadge({ score, t = (k) => k }) {
@@ -66,6 +67,7 @@ export default function ReviewResults({ score, issues = [], summary, approved, f
   const high = issues.filter(i => i.severity === 'high');
   const medium = issues.filter(i => i.severity === 'medium');
   const low = issues.filter(i => i.severity === 'low');
+  const performance = issues.filter(i => i.severity === 'performance');
 
   const displayedIssues = showAllIssues ? issues : issues.slice(0, 5);
 
@@ -97,6 +99,7 @@ export default function ReviewResults({ score, issues = [], summary, approved, f
           {high.length > 0 && <span style={styles.issueCount} data-sev="high">{high.length} High</span>}
           {medium.length > 0 && <span style={styles.issueCount} data-sev="medium">{medium.length} Medium</span>}
           {low.length > 0 && <span style={styles.issueCount} data-sev="low">{low.length} Low</span>}
+          {performance.length > 0 && <span style={styles.issueCount} data-sev="performance">{performance.length} Performance</span>}
           {issues.length === 0 && <span style={{ color: SK.signalGreen, fontSize: '13px' }}>{t('noIssues')}</span>}
         </div>
       </div>
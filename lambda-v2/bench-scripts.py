@@ -0,0 +1,454 @@
+#!/usr/bin/env python3
+"""
+bench-scripts.py — Throughput benchmark for the reviewer and validator scripts.
+
+Times the checks of check_code.py, validate_output.py and check_web_app.py on synthetic
+inputs, generated from a fixed seed so that every run checks the same code:
+
+  check_code/*       App.jsx of 100 to 20k lines, sparse and dense charts, minified, near-ReDoS
+  validate_output/*  generator outputs (App.jsx + a large src/data.js), near-ReDoS
+  check_web_app/*    web-app trees: many small files, a minified bundle, near-ReDoS lines
+
+Each case reports checks per second, the worst-case latency of one check and the ms spent
+per rule (fastest of --repeat runs). Time budgets are lifted, so a slow rule shows its full cost instead of being
+skipped. Results are compared with the stored baselines (bench-baselines.json), scaled by a
+calibration loop so that baselines recorded on another machine still apply: the run fails
+(exit 1) when a case, or a rule costing at least RULE_FLOOR_MS, is slower than its baseline
+by more than --tolerance. On a shared or virtualised machine, where the CPU speed drifts
+between runs, raise --tolerance (e.g. 0.5) or compare against baselines recorded there.
+
+Usage:
+  python bench-scripts.py                       Run every case, compare with the baselines
+  python bench-scripts.py --case check_code     Only the cases whose name contains this
+  python bench-scripts.py --update-baselines    Store this run as the baselines (after a
+                                                deliberate change, e.g. a new rule)
+  python bench-scripts.py --json                Print the results as JSON
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+for _skill in ("dashboard-reviewer", "dashboard-generator", "web-app-reviewer"):
+    sys.path.insert(0, str(HERE / "skills" / _skill / "scripts"))
+
+import check_code  # noqa: E402
+import check_web_app  # noqa: E402
+import validate_output  # noqa: E402
+
+BASELINES_PATH = HERE / "bench-baselines.json"
+SEED = 42
+# Budgets high enough never to cut a check short
+UNBOUNDED_MS = 1e9
+# Rules below this many ms per run are too noisy to compare
+RULE_FLOOR_MS = 2.0
+# Worst-case latencies below this many ms are too noisy to compare
+LATENCY_FLOOR_MS = 5.0
+
+
+# ---------------------------------------------------------------------------
+# Synthetic inputs
+# ---------------------------------------------------------------------------
+
+APP_HEADER = """import React, { useState, useMemo } from 'react';
+import { BarChart, Bar, LineChart, Line, AreaChart, Area, PieChart, Pie, Cell, XAxis, YAxis, Tooltip, Legend, CartesianGrid, ResponsiveContainer } from 'recharts';
+import { DATA } from './data';
+
+const COLORS = ['#06B6D4', '#EC4899', '#8B5CF6', '#F59E0B'];
+const fmt = (n) => n.toLocaleString('fr-FR');
+const fmtCur = (n) => n.toLocaleString('fr-FR') + ' EUR';
+const fmtPct = (n) => (n * 100).toFixed(1) + '%';
+
+export default function App() {
+  const [filters, setFilters] = useState({ region: 'all' });
+  const [menuOpen, setMenuOpen] = useState(false);
+  const rows = useMemo(() => DATA.filter(d => filters.region === 'all' || d.Region === filters.region), [filters]);
+  const total = useMemo(() => rows.reduce((s, d) => s + d.Ventes, 0), [rows]);
+  const takeaways = useMemo(() => [
+    { text: `Le CA atteint ${fmtCur(total)}` },
+  ], [total]);
+  return (
+    <div className="content-area">
+      <button className="menu-toggle" onClick={() => setMenuOpen(!menuOpen)}>Menu</button>
+      <select className="filter-select" value={filters.region} onChange={e => setFilters({ region: e.target.value })}>
+        <option value="all">Toutes</option>
+      </select>
+      <div className="kpi-card"><div className="kpi-value">{fmtCur(total)}</div></div>"""
+
+APP_FOOTER = """      <div className="insights-section">
+        {takeaways.map(t => <p key={t.text}>{t.text}</p>)}
+      </div>
+    </div>
+  );
+}
+"""
+
+CHART_BLOCKS = [
+    """      <ResponsiveContainer width="100%" height={300}>
+        <BarChart data={rows}>
+          <CartesianGrid strokeDasharray="3 3" />
+          <XAxis dataKey="Mois" />
+          <YAxis tickFormatter={v => fmtCur(v)} />
+          <Tooltip formatter={v => fmtCur(v)} />
+          <Bar dataKey="Ventes" fill={COLORS[0]} />
+        </BarChart>
+      </ResponsiveContainer>""",
+    """      <ResponsiveContainer width="100%" height={300}>
+        <PieChart>
+          <Pie data={rows} dataKey="Ventes" nameKey="Region">
+            {rows.map((d, i) => <Cell key={d.Region} fill={COLORS[i % COLORS.length]} />)}
+          </Pie>
+          <Legend />
+          <Tooltip />
+        </PieChart>
+      </ResponsiveContainer>""",
+    """      <ResponsiveContainer width="100%" height={300}>
+        <AreaChart data={rows}>
+          <defs><linearGradient id="grad{n}" x1="0" y1="0" x2="0" y2="1"><stop offset="5%" stopColor={COLORS[1]} /></linearGradient></defs>
+          <XAxis dataKey="Mois" />
+          <YAxis tickFormatter={v => fmt(v)} />
+          <Area dataKey="Marge" stroke={COLORS[1]} fill="url(#grad{n})" />
+        </AreaChart>
+      </ResponsiveContainer>""",
+    """      <ResponsiveContainer width="100%" height={300}>
+        <LineChart data={rows}>
+          <XAxis dataKey="Mois" />
+          <YAxis tickFormatter={v => fmtPct(v)} />
+          <Line dataKey="Taux" stroke={COLORS[2]} />
+        </LineChart>
+      </ResponsiveContainer>""",
+]
+
+FILLER_BLOCKS = [
+    """      <div className="card">
+        <h3>Section {n}</h3>
+        <p className="muted">Répartition des ventes par région et par mois.</p>
+        <ul>{rows.slice(0, 5).map(d => <li key={d.Region + d.Mois}>{d.Region}: {fmtCur(d.Ventes)}</li>)}</ul>
+      </div>""",
+    """      <table className="data-table">
+        <thead><tr><th>Région</th><th>Ventes</th><th>Marge</th></tr></thead>
+        <tbody>{rows.slice(0, 10).map(d => (
+          <tr key={d.Region + d.Mois}><td>{d.Region}</td><td>{fmtCur(d.Ventes)}</td><td>{fmtPct(d.Taux)}</td></tr>
+        ))}</tbody>
+      </table>""",
+    """      <div className="kpi-grid">
+        <div className="kpi-card"><span className="kpi-label">Total {n}</span><div className="kpi-value">{fmt(rows.length)}</div></div>
+        <div className="kpi-card"><span className="kpi-label">Moyenne</span><div className="kpi-value">{fmtCur(total / (rows.length || 1))}</div></div>
+      </div>""",
+]
+
+
+def make_app(rnd, lines, chart_share):
+    """App.jsx of about `lines` lines; `chart_share` of the body blocks are charts."""
+    body = []
+    count = APP_HEADER.count("\n") + APP_FOOTER.count("\n") + 1
+    n = 0
+    while count < lines:
+        n += 1
+        blocks = CHART_BLOCKS if rnd.random() < chart_share else FILLER_BLOCKS
+        block = rnd.choice(blocks).replace("{n}", str(n))
+        body.append(block)
+        count += block.count("\n") + 1
+    return "\n".join([APP_HEADER, *body, APP_FOOTER])
+
+
+def minify(code):
+    """The code on one line, as a bundler would leave it."""
+    return " ".join(line.strip() for line in code.splitlines() if line.strip())
+
+
+def adversarial_app():
+    """App.jsx crafted to stress the rule patterns and the lexer: long runs just short of a match."""
+    runs = [
+        '      <div className="kpi-value">' + "1,234," * 5000 + "</div>",
+        "      <th>" + "a" * 20000 + "</th>",
+        "      <span className=\"badge-up\">" + "+" + "1" * 20000 + " " * 2000 + "</span>",
+        "      <p>{`" + "${x}" * 5000 + "`}</p>",
+        "      <p>" + "1" * 30000 + " " * 5000 + "EU</p>",
+        '      <div className="' + "kpi-value " * 5000 + '">x</div>',
+        "      " + "<div>" * 200 + "x" + "</div>" * 200,
+        "      {/* " + "/* " * 10000 + " */}",
+    ]
+    return "\n".join([APP_HEADER, *runs, APP_FOOTER])
+
+
+def make_output(app, data_rows, rnd):
+    rows = [{"Region": rnd.choice(["Nord", "Sud", "Est", "Ouest"]), "Mois": rnd.choice(["janv.", "févr.", "mars"]),
+             "Ventes": round(rnd.random() * 1e6, 2), "Taux": round(rnd.random(), 4)} for _ in range(data_rows)]
+    files = {
+        "src/App.jsx": app,
+        "src/data.js": "export const DATA = __INJECT_DATA__ || " + json.dumps(rows, ensure_ascii=False) + ";\n",
+        "package.json": json.dumps({"name": "dashboard", "dependencies": {"react": "^18.2.0", "recharts": "^2.12.0"}}),
+    }
+    return json.dumps({"files": files}, ensure_ascii=False)
+
+
+WEB_LINES = [
+    "import {{ useEffect, useState }} from 'react';",
+    "export function load{n}(id) {{",
+    "  return fetch(`/api/items/${{id}}`).then(r => r.json());",
+    "}}",
+    "const cache{n} = new Map();",
+    "// TODO: paginate the results",
+    "console.log('loaded', cache{n}.size);",
+    "export const items{n} = (list) => list.map(item => <Item key={{item.id}} {{...item}} />);",
+    "function format{n}(value) {{ return value.toFixed(2); }}",
+    "  if (!user) {{ return null; }}",
+    "  const [open, setOpen] = useState(false);",
+    "  useEffect(() => {{ document.title = 'Page {n}'; }}, []);",
+]
+
+
+def make_web_file(rnd, lines, n):
+    return "\n".join(rnd.choice(WEB_LINES).format(n=n) for _ in range(lines)) + "\n"
+
+
+def adversarial_web_file():
+    """Lines crafted to stress check_web_app's patterns: long runs just short of a match."""
+    runs = [
+        'const api_key = "' + "A" * 100000,
+        "const token = 'sk-" + "a" * 100000 + "!",
+        "promise" + ".then(" * 20000,
+        "<a href =" + " " * 50000 + "x>",
+        "eval " + " " * 50000 + "x",
+        "console" + ".console" * 20000,
+        "const s = '" + "ghp_" * 20000 + "';",
+    ]
+    return "\n".join(runs) + "\n"
+
+
+def write_tree(root, files):
+    for rel, content in files.items():
+        path = Path(root, rel)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding="utf-8")
+
+
+# ---------------------------------------------------------------------------
+# Cases
+# ---------------------------------------------------------------------------
+
+def check_code_case(codes):
+    def run_item(code):
+        timings = {}
+        check_code.check_code(code, timings=timings, check_budget_ms=UNBOUNDED_MS, file_budget_ms=UNBOUNDED_MS)
+        return timings
+    return codes, run_item
+
+
+def validate_output_case(outputs):
+    def run_item(text):
+        timings = {}
+        validate_output.validate_stream(io.StringIO(text), timings=timings)
+        return timings
+    return outputs, run_item
+
+
+def check_web_app_case(root):
+    def run_item(entry):
+        filepath, rel_path = entry[:2]
+        with open(filepath, "r", encoding="utf-8", errors="replace") as f:
+            content = f.read()
+        budget = check_web_app.Budget(UNBOUNDED_MS, UNBOUNDED_MS)
+        reduced = check_web_app.sniff_generated(content) is not None
+        check_web_app.check_file(rel_path, content, budget, reduced=reduced)
+        return budget.timings
+    return check_web_app.discover_files(root), run_item
+
+
+def build_cases(workdir):
+    """{case name: (items, run_item)}; run_item(item) checks one item and returns its ms per rule."""
+    rnd = random.Random(SEED)
+    cases = {}
+    for lines, variants in ((100, 40), (1000, 10), (5000, 3), (20000, 1)):
+        cases[f"check_code/app-{lines}-lines"] = check_code_case(
+            [make_app(rnd, lines, 0.2) for _ in range(variants)])
+    cases["check_code/dense-charts"] = check_code_case([make_app(rnd, 1000, 0.9) for _ in range(10)])
+    cases["check_code/minified"] = check_code_case([minify(make_app(rnd, 1000, 0.3)) for _ in range(5)])
+    cases["check_code/near-redos"] = check_code_case([adversarial_app()])
+
+    cases["validate_output/outputs"] = validate_output_case(
+        [make_output(make_app(rnd, 500, 0.3), 200, rnd) for _ in range(20)])
+    cases["validate_output/large-data"] = validate_output_case([make_output(make_app(rnd, 1000, 0.3), 100000, rnd)])
+    cases["validate_output/near-redos"] = validate_output_case([make_output(adversarial_app(), 10, rnd)])
+
+    tree = Path(workdir, "webapp")
+    files = {f"src/m{i % 10}/f{i}.{'jsx' if i % 3 else 'js'}": make_web_file(rnd, rnd.randint(20, 400), i)
+             for i in range(200)}
+    files[".gitignore"] = "generated/\n"
+    files["generated/skip.js"] = make_web_file(rnd, 50, 0)
+    write_tree(tree, files)
+    cases["check_web_app/tree"] = check_web_app_case(tree)
+
+    bundle = Path(workdir, "bundle")
+    write_tree(bundle, {
+        "public/vendor.min.js": minify(" ".join(make_web_file(rnd, 3000, i) for i in range(3))),
+        "src/app.js": make_web_file(rnd, 200, 1),
+    })
+    cases["check_web_app/minified-bundle"] = check_web_app_case(bundle)
+
+    adversarial = Path(workdir, "adversarial")
+    write_tree(adversarial, {"src/evil.js": adversarial_web_file()})
+    cases["check_web_app/near-redos"] = check_web_app_case(adversarial)
+    return cases
+
+
+def run_case(items, run_item, repeat):
+    """Best-of-`repeat` timings of one case."""
+    totals = []
+    item_times = [float("inf")] * len(items)
+    rules = {}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run_rules = {}
+        for n, item in enumerate(items):
+            item_start = time.perf_counter()
+            timings = run_item(item)
+            item_times[n] = min(item_times[n], (time.perf_counter() - item_start) * 1000)
+            for rule_id, ms in timings.items():
+                run_rules[rule_id] = run_rules.get(rule_id, 0.0) + ms
+        totals.append((time.perf_counter() - start) * 1000)
+        for rule_id, ms in run_rules.items():
+            rules[rule_id] = min(rules.get(rule_id, ms), ms)
+    total_ms = min(totals)
+    return {
+        "items": len(items),
+        "totalMs": round(total_ms, 3),
+        "checksPerSecond": round(len(items) / total_ms * 1000, 1) if total_ms else None,
+        "worstMs": round(max(item_times, default=0.0), 3),
+        "rules": {rule_id: round(ms, 3) for rule_id, ms in sorted(rules.items(), key=lambda kv: -kv[1])},
+    }
+
+
+def calibrate():
+    """ms for a fixed mix of regex, string and dict work (best of 5), to scale baselines across machines.
+
+    Long enough (~30 ms) that one scheduler hiccup does not move it much; main() takes the
+    best of a run before and one after the cases.
+    """
+    text = "const value = fetch(`/api/${id}`).then(r => r.json()); // TODO\n" * 20000
+    pattern = re.compile(r"\.then\s*\(")
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        counts = {}
+        for line in text.splitlines():
+            if pattern.search(line):
+                for word in line.split():
+                    counts[word] = counts.get(word, 0) + 1
+        text.lower().count("todo")
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return round(best, 3)
+
+
+# ---------------------------------------------------------------------------
+# Baselines
+# ---------------------------------------------------------------------------
+
+def rescale(result, scale):
+    """A case result with its times multiplied by `scale`."""
+    total_ms = result["totalMs"] * scale
+    return {
+        "items": result["items"],
+        "totalMs": round(total_ms, 3),
+        "checksPerSecond": round(result["items"] / total_ms * 1000, 1) if total_ms else None,
+        "worstMs": round(result["worstMs"] * scale, 3),
+        "rules": {rule_id: round(ms * scale, 3) for rule_id, ms in result["rules"].items()},
+    }
+
+
+
+def compare(results, calibration_ms, baselines, tolerance):
+    """Regressions of `results` against `baselines`, as messages."""
+    scale = calibration_ms / baselines["calibrationMs"]
+    limit = 1 + tolerance
+    regressions = []
+    for name, result in results.items():
+        base = baselines["cases"].get(name)
+        if base is None:
+            continue
+        if result["totalMs"] > base["totalMs"] * scale * limit:
+            regressions.append(
+                f"{name}: {result['checksPerSecond']} checks/s, baseline {base['checksPerSecond']} "
+                f"({result['totalMs'] / (base['totalMs'] * scale):.2f}x slower after calibration)")
+        if (max(result["worstMs"], base["worstMs"]) >= LATENCY_FLOOR_MS
+                and result["worstMs"] > base["worstMs"] * scale * limit):
+            regressions.append(f"{name}: worst case {result['worstMs']} ms, baseline {base['worstMs']} ms")
+        for rule_id, ms in result["rules"].items():
+            base_ms = base["rules"].get(rule_id)
+            if base_ms is not None and max(ms, base_ms) >= RULE_FLOOR_MS and ms > base_ms * scale * limit:
+                regressions.append(f"{name}: rule {rule_id} {ms} ms per run, baseline {base_ms} ms")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Throughput benchmark for check_code, validate_output and check_web_app.")
+    parser.add_argument("--case", default="", help="Only run the cases whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per case; the fastest counts (default: 5)")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Slowdown allowed against the baselines before failing (default: 0.25 = 25%%)")
+    parser.add_argument("--baselines", default=str(BASELINES_PATH), help="Baselines file (default: bench-baselines.json)")
+    parser.add_argument("--update-baselines", action="store_true", help="Store this run's results as the baselines")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    calibration_ms = calibrate()
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, (items, run_item) in build_cases(workdir).items():
+            if args.case in name:
+                results[name] = run_case(items, run_item, args.repeat)
+                if not args.json:
+                    result = results[name]
+                    top = ", ".join(f"{rule_id} {ms:.1f}" for rule_id, ms in list(result["rules"].items())[:3])
+                    print(f"{name:34} {result['items']:4} items  {result['checksPerSecond']:9.1f} checks/s  "
+                          f"worst {result['worstMs']:9.1f} ms  | {top}")
+    calibration_ms = min(calibration_ms, calibrate())
+
+    baselines = None
+    if os.path.exists(args.baselines):
+        with open(args.baselines, "r", encoding="utf-8") as f:
+            baselines = json.load(f)
+
+    if args.update_baselines:
+        cases, stored_ms = results, calibration_ms
+        if baselines and args.case:
+            # Only some cases were run: keep the others, and the calibration they were scaled to
+            stored_ms = baselines["calibrationMs"]
+            cases = dict(baselines["cases"])
+            cases.update((name, rescale(result, stored_ms / calibration_ms)) for name, result in results.items())
+        with open(args.baselines, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"calibrationMs": stored_ms, "python": sys.version.split()[0], "cases": cases},
+                               ensure_ascii=False, indent=2) + "\n")
+        print(f"Baselines written to {args.baselines}", file=sys.stderr)
+        regressions = []
+    elif baselines is None:
+        print(f"No baselines at {args.baselines} — run with --update-baselines first", file=sys.stderr)
+        regressions = []
+    else:
+        regressions = compare(results, calibration_ms, baselines, args.tolerance)
+
+    if args.json:
+        print(json.dumps({"calibrationMs": calibration_ms, "cases": results, "regressions": regressions},
+                         ensure_ascii=False, indent=2))
+    elif regressions:
+        print("REGRESSIONS:")
+        for message in regressions:
+            print(f"  [X] {message}")
+    elif baselines is not None and not args.update_baselines:
+        print(f"OK — no case slower than its baseline by more than {args.tolerance:.0%}")
+    sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
@@ -117,6 +117,7 @@ function buildAuthoritativeStats(analysis) {
   const stats = analysis?.analysis?.stats || analysis?.stats || {};
   const periods = analysis?.analysis?.periods || analysis?.periods || {};
   const charts = analysis?.analysis?.chartRecommendations || analysis?.chartRecommendations || [];
+  const quality = analysis?.analysis?.quality || analysis?.quality || {};
   let output = '';
 
   for (const [colName, colStats] of Object.entries(stats)) {
@@ -137,6 +138,16 @@ function buildAuthoritativeStats(analysis) {
     output += '\n\nAucune colonne de periode detectee — INTERDICTION d\'afficher des variations % ou badges up/down.';
   }
 
+  if (quality.duplicateRows?.count > 0) {
+    output += `\n\nLignes en double: ${quality.duplicateRows.count} (sommes et comptages ci-dessus les incluent)`;
+  }
+  if (quality.constantColumns?.length > 0) {
+    output += `\nColonnes constantes (pas de graphique ni de filtre): ${quality.constantColumns.map(c => c.column).join(', ')}`;
+  }
+  if (quality.keyCandidates?.length > 0) {
+    output += `\nCles candidates: ${quality.keyCandidates.map(k => k.columns.join(' + ')).join(', ')}`;
+  }
+
   if (charts.length > 0) {
     output += '\n\nGraphiques recommandes:';
     for (const c of charts) {
@@ -100,11 +100,12 @@ Scoring:
 - High quality issue: -10 each
 - Medium issue: -5 each
 - Low/warning: -2 each
+- Performance issue: -3 each
 
 Fix all issues and return ONLY this JSON object in your response:
 {
   "score": 82,
-  "issues": [{"severity":"critical|high|medium|low","rule":"RULE","file":"path","line":0,"message":"...","fix":"..."}],
+  "issues": [{"severity":"critical|high|medium|low|performance","rule":"RULE","file":"path","line":0,"message":"...","fix":"..."}],
   "fixedFiles": {"src/App.jsx": "...complete fixed code..."},
   "summary": "2-3 sentence overall assessment"
 }
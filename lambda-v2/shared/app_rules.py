@@ -0,0 +1,1303 @@
+#!/usr/bin/env python3
+"""
+Shared rule engine for generated dashboard code — used by
+dashboard-reviewer/scripts/check_code.py and dashboard-generator/scripts/validate_output.py.
+
+Canonical copy: lambda-v2/shared/app_rules.py. Each skill is uploaded on its own,
+so an identical copy lives next to the scripts that import it (test-scripts.py
+fails while a copy differs).
+
+The code is lexed once (JsxLexer) into facts — imports, JSX tags and their
+attributes, string/template literals and JSX text, identifiers, calls. Every
+rule is registered once (RULES) with its id, severity, scopes and target file,
+its patterns compiled at import, and is a query over those facts.
+
+Matching stays linear in the input: rule patterns only see extracted fragments
+(strings, JSX text, attribute values) and are written without overlapping
+quantifiers (no `\d+[.,]?\d*`-style ambiguity), so a minified bundle or a huge
+injected literal cannot make them backtrack. Each rule also runs under a time
+budget (per rule and per file); a rule that runs out is reported in "skipped"
+as "skipped: budget exceeded" instead of stalling the review.
+"""
+
+import bisect
+import difflib
+import hashlib
+import re
+import time
+from functools import cached_property
+from pathlib import Path
+
+
+# ---------------------------------------------------------------------------
+# Single-pass JSX/JS lexer — walks the code once and records the facts that
+# every check below queries (comments are skipped, strings are kept apart
+# from identifiers, JSX tags carry their attributes).
+# ---------------------------------------------------------------------------
+
+JS_TOKEN_RE = re.compile(r"""
+    (?P<ws>\s+)
+  | (?P<comment>//[^\n]*|/\*.*?(?:\*/|\Z))
+  | (?P<string>"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*')
+  | (?P<template>`)
+  | (?P<number>(?:0[xXbBoO][\da-fA-F_]+|\d[\d_]*(?:\.\d*)?(?:[eE][+-]?\d+)?|\.\d+(?:[eE][+-]?\d+)?)n?)
+  | (?P<ident>(?:[^\W\d]|\$)[\w$]*)
+  | (?P<punct>=>|\.\.\.|\?\?=?|\?\.|&&=?|\|\|=?|[=!]==?|\*\*=?|<<=?|>>>?=?|[-+*/%&|^<>]=|\+\+|--|[{}()\[\];,.:?~!<>=+\-*/%&|^@#])
+  | (?P<other>.)
+""", re.S | re.X)
+REGEX_LITERAL_RE = re.compile(r"/(?:[^/\\\[\n]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/[a-z]*")
+TEMPLATE_CHUNK_RE = re.compile(r"(?:[^`\\$]|\\.|\$(?!\{))*", re.S)
+JSX_NAME_RE = re.compile(r"[A-Za-z_$][\w$.:-]*")
+JSX_ATTR_RE = re.compile(r"[A-Za-z_$][\w$:-]*")
+JSX_STRING_RE = re.compile(r'"[^"]*"|\'[^\']*\'')
+JSX_TEXT_RE = re.compile(r"[^<{]*")
+JSX_SKIP_RE = re.compile(r"(?:\s+|//[^\n]*|/\*.*?(?:\*/|\Z))*", re.S)
+
+# After these tokens, `<` opens a JSX element and `/` starts a regex literal
+EXPRESSION_START = {
+    None, "(", ",", "=", ":", "?", "[", "{", "}", ";", "=>", "&&", "||", "??", "!",
+    "return", "default", "case", "yield", "await", "typeof", "void", "in", "of", "else", "...",
+}
+DECLARATION_KEYWORDS = {"const", "let", "var", "function", "class"}
+BRACKETS = {"(", ")", "[", "]", "{", "}"}
+# Member accesses recorded in "structure" (the performance rules look for scans over DATA)
+ARRAY_METHODS = {
+    "filter", "map", "flatMap", "forEach", "reduce", "reduceRight", "sort", "toSorted", "find", "findIndex",
+    "findLast", "some", "every", "includes", "indexOf",
+}
+
+LIST_FACTS = ("imports", "tags", "strings", "assigns", "structure")
+SET_FACTS = ("closingTags", "identifiers", "calls", "declared")
+FACT_KINDS = LIST_FACTS + SET_FACTS
+# Top-level line starts closer than this to the current segment start do not open a new segment
+MIN_SEGMENT_CHARS = 512
+# Smaller JSX elements are not worth a reusable block of their own
+MIN_ELEMENT_CHARS = 256
+
+
+class JsxLexer:
+    """Walk JS/JSX source once and collect facts.
+
+    Facts:
+      imports      [{module, default, names: [[imported, local]], namespace, pos}]
+      tags         [{name, attrs: {name: [kind, value]}, leading, pos}]  — opening tags
+      closingTags  set of closed tag names
+      strings      [{value, kind: string|template|attr|jsx, pos}]
+      identifiers  set of identifier names outside strings and comments
+      calls        set of names directly followed by `(`
+      declared     set of names bound by const/let/var/function/class/import
+      assigns      [{name, op, kind, value, pos}] for `name: <token>` / `name = <token>`
+      structure    [{token, name, object, pos}] — in source order, the brackets `( ) [ ] { }` of
+                   the JS code and the `{ }` of on* JSX attribute values (name: the identifier
+                   before `(` or `{`, "=>" after an arrow, "fn" for `) {`, "jsx:<attr>" for an
+                   event handler), and `.` before an ARRAY_METHODS name (name: the method,
+                   object: the token before the dot)
+
+    Facts are appended in source order to one store (set kinds as occurrence lists), and
+    two kinds of blocks record their slice of it:
+      segments  split the top-level JS loop at line starts (outside JSX, templates and
+                comments) and record the lexer state there — lexing a segment again from
+                that state yields the same facts;
+      elements  JSX elements that start their line; their facts do not depend on the
+                code around them.
+    With `splice` (a Splice over the previous run), unchanged blocks are copied from the
+    previous store instead of being lexed again.
+    """
+
+    def __init__(self, code, splice=None):
+        self.code = code
+        self.splice = splice
+        self.store = {kind: [] for kind in FACT_KINDS}
+        # Last two significant tokens as (kind, text); `moves` counts updates
+        self.prev = (None, None)
+        self.prev2 = (None, None)
+        self.moves = 0
+        self.segments = []
+        self.elements = []
+        self.open_elements = []
+        # (old marks, new marks) of every block copied from the previous run, in order
+        self.reused = []
+        self.open_segment(0, (0, self.prev, self.prev2))
+
+    def run(self):
+        self.lex_js(0, None)
+        self.close_segment(len(self.code), None)
+        # Element blocks close inner first
+        self.elements.sort(key=lambda element: element["start"])
+        facts = {kind: self.store[kind] for kind in LIST_FACTS}
+        facts.update({kind: set(self.store[kind]) for kind in SET_FACTS})
+        return facts
+
+    def marks(self):
+        return [len(self.store[kind]) for kind in FACT_KINDS]
+
+    def open_segment(self, pos, state):
+        if self.segments:
+            self.close_segment(pos, state)
+        self.segment = {"start": pos, "end": None, "state": state, "out": None, "dirty": False,
+                        "from": self.marks(), "to": None}
+        self.segments.append(self.segment)
+
+    def close_segment(self, pos, state):
+        self.segment.update({"end": pos, "out": state, "to": self.marks()})
+
+    def mark_dirty(self):
+        """A failed match may have read past the current line: no open block can be reused."""
+        self.segment["dirty"] = True
+        for block in self.open_elements:
+            block["dirty"] = True
+
+    def line_start(self, pos, depth):
+        """Top-level line start: splice unchanged segments of the previous run, or maybe open a segment."""
+        state = (depth, self.prev, self.prev2)
+        if self.splice is not None:
+            spliced = False
+            while pos < len(self.code):
+                match = self.splice.segment(pos, state)
+                if match is None:
+                    break
+                segment, end = match
+                self.open_segment(pos, state)
+                self.copy_block(segment, pos)
+                pos, state = end, segment["out"] or state
+                spliced = True
+            if spliced:
+                depth, self.prev, self.prev2 = state
+                if pos < len(self.code):
+                    self.open_segment(pos, state)
+                return pos, depth
+        if pos - self.segment["start"] >= MIN_SEGMENT_CHARS:
+            self.open_segment(pos, state)
+        return pos, depth
+
+    def copy_block(self, block, pos):
+        """Append an old block's facts, and the element blocks inside it, moved to `pos`."""
+        old = self.splice
+        delta = pos - block["start"]
+        marks = self.marks()
+        for i, kind in enumerate(FACT_KINDS):
+            facts = old.store[kind][block["from"][i]:block["to"][i]]
+            if delta and kind in LIST_FACTS:
+                facts = [dict(fact, pos=fact["pos"] + delta) for fact in facts]
+            self.store[kind].extend(facts)
+        self.reused.append((block["from"], block["to"], marks, self.marks()))
+        for element in old.elements_within(block):
+            self.elements.append(dict(
+                element, start=element["start"] + delta, end=element["end"] + delta,
+                **{key: [m + i - j for m, i, j in zip(marks, element[key], block["from"])] for key in ("from", "to")},
+            ))
+
+    def push_prev(self, token):
+        self.prev2, self.prev = self.prev, token
+        self.moves += 1
+
+    def emit(self, kind, text, pos, value=None):
+        """Record a significant JS token and the facts it completes."""
+        store = self.store
+        prev_kind, prev_text = self.prev
+        if kind == "ident":
+            store["identifiers"].append(text)
+            if prev_text in DECLARATION_KEYWORDS and prev_kind == "ident":
+                store["declared"].append(text)
+            if prev_text in (".", "?.") and text in ARRAY_METHODS:
+                store["structure"].append({"token": ".", "name": text, "object": self.prev2[1], "pos": pos})
+        elif kind == "punct" and text in BRACKETS:
+            callee = None
+            if text in "({" and prev_kind == "ident":
+                if text == "(":
+                    store["calls"].append(prev_text)
+                callee = prev_text
+            elif text in "({" and prev_text == "=>":
+                callee = "=>"
+            elif text == "{" and prev_text == ")":
+                callee = "fn"
+            store["structure"].append({"token": text, "name": callee, "object": None, "pos": pos})
+        if prev_kind == "punct" and prev_text in (":", "=") and self.prev2[0] in ("ident", "string"):
+            name = self.prev2[1] if self.prev2[0] == "ident" else self.prev2[1][1:-1]
+            store["assigns"].append({
+                "name": name, "op": prev_text, "kind": kind,
+                "value": value if value is not None else text, "pos": pos,
+            })
+        self.push_prev((kind, text))
+
+    def expression_start(self):
+        return self.prev[1] in EXPRESSION_START
+
+    def lex_js(self, pos, stop):
+        """Lex JS from `pos`; with stop='}' return after the matching close brace."""
+        code, n = self.code, len(self.code)
+        depth = 0
+        while pos < n:
+            ch = code[pos]
+            if ch == "<" and self.expression_start() and pos + 1 < n and (code[pos + 1].isalpha() or code[pos + 1] in ">_$"):
+                pos = self.lex_jsx_element(pos)
+                self.push_prev(("jsx", ">"))
+                continue
+            if ch == "/" and self.expression_start() and not code.startswith(("//", "/*"), pos):
+                m = REGEX_LITERAL_RE.match(code, pos)
+                if m:
+                    self.emit("regex", m.group(), pos)
+                    pos = m.end()
+                    continue
+            m = JS_TOKEN_RE.match(code, pos)
+            kind, text = m.lastgroup, m.group()
+            start, pos = pos, m.end()
+            if kind == "ws" and stop is None and "\n" in text and pos < n:
+                pos, depth = self.line_start(start + text.rindex("\n") + 1, depth)
+                continue
+            if kind in ("ws", "comment"):
+                continue
+            if kind == "other" and text in "\"'":
+                # Unterminated string: the failed match may have read past this line
+                self.mark_dirty()
+            if kind == "string":
+                value = text[1:-1]
+                self.store["strings"].append({"value": value, "kind": "string", "pos": start})
+                self.emit("string", text, start, value)
+            elif kind == "template":
+                pos = self.lex_template(pos, start)
+            elif kind == "ident" and text == "import" and self.prev[1] not in (".",):
+                pos = self.lex_import(pos, start)
+            else:
+                if kind == "punct":
+                    if text == "{":
+                        depth += 1
+                    elif text == "}":
+                        if depth == 0 and stop == "}":
+                            return pos
+                        depth -= 1
+                self.emit(kind, text, start)
+        return pos
+
+    def lex_template(self, pos, start):
+        """Template literal body after the opening backtick; `${...}` parts are lexed as JS."""
+        code, n = self.code, len(self.code)
+        parts = []
+        while pos < n:
+            m = TEMPLATE_CHUNK_RE.match(code, pos)
+            parts.append(m.group())
+            pos = m.end()
+            if pos >= n:
+                break
+            if code[pos] == "`":
+                pos += 1
+                break
+            # `${`
+            parts.append("${}")
+            self.push_prev(("punct", "{"))
+            pos = self.lex_js(pos + 2, "}")
+        value = "".join(parts)
+        self.store["strings"].append({"value": value, "kind": "template", "pos": start})
+        self.emit("template", "`", start, value)
+        return pos
+
+    def lex_import(self, pos, start):
+        """Static import clause: `import X, { a as b } from 'm'` / `import * as ns from 'm'` / `import 'm'`."""
+        code, n = self.code, len(self.code)
+        store = self.store
+        imp = {"module": None, "default": None, "names": [], "namespace": None, "pos": start}
+        in_braces = False
+        expect_alias = None
+        first = True
+        while pos < n:
+            m = JS_TOKEN_RE.match(code, pos)
+            kind, text = m.lastgroup, m.group()
+            pos = m.end()
+            if kind in ("ws", "comment"):
+                continue
+            if first and kind == "punct" and text in ("(", "."):
+                # Dynamic import() / import.meta — not a declaration
+                self.emit("ident", "import", start)
+                return m.start()
+            first = False
+            if kind == "string":
+                imp["module"] = text[1:-1]
+                break
+            if kind == "punct":
+                if text == "{":
+                    in_braces = True
+                elif text == "}":
+                    in_braces = False
+                elif text == ";":
+                    break
+                continue
+            if kind == "other" and text in "\"'":
+                self.mark_dirty()
+            if kind != "ident":
+                continue
+            if text == "as":
+                expect_alias = True
+                continue
+            if text in ("from", "type"):
+                continue
+            if expect_alias:
+                expect_alias = None
+                if in_braces and imp["names"]:
+                    imp["names"][-1][1] = text
+                else:
+                    imp["namespace"] = text
+                store["declared"].append(text)
+                continue
+            if in_braces:
+                imp["names"].append([text, text])
+            else:
+                imp["default"] = text
+            store["declared"].append(text)
+            store["identifiers"].append(text)
+        store["imports"].append(imp)
+        self.push_prev(("punct", ";"))
+        return pos
+
+    def skip_jsx_space(self, pos):
+        return JSX_SKIP_RE.match(self.code, pos).end()
+
+    def lex_jsx_element(self, pos):
+        """JSX element starting at `<`; returns the position after its closing tag.
+
+        An element that starts its line is a block: copied from the previous run when
+        unchanged, recorded for the next one when large enough.
+        """
+        code = self.code
+        if code[code.rfind("\n", 0, pos) + 1:pos].strip():
+            return self.lex_jsx_tag(pos)
+        if self.splice is not None:
+            match = self.splice.element(pos)
+            if match is not None:
+                element, end = match
+                self.copy_block(element, pos)
+                # The state after an element only depends on it once it has moved twice
+                if element["moves"] == 1:
+                    self.prev2 = self.prev
+                if element["moves"]:
+                    self.prev = tuple(element["out"][0])
+                if element["moves"] == 2:
+                    self.prev2 = tuple(element["out"][1])
+                self.moves += element["moves"]
+                return end
+        block = {"start": pos, "end": None, "moves": self.moves, "out": None, "dirty": False,
+                 "from": self.marks(), "to": None}
+        self.open_elements.append(block)
+        end = self.lex_jsx_tag(pos)
+        self.open_elements.pop()
+        # An element cut short by the end of the code depends on where the code ends
+        if end - pos >= MIN_ELEMENT_CHARS and end < len(code) and not block["dirty"]:
+            block.update({
+                "end": end, "moves": min(self.moves - block["moves"], 2),
+                "out": [self.prev, self.prev2], "to": self.marks(),
+            })
+            self.elements.append(block)
+        return end
+
+    def lex_handler(self, pos, attr):
+        """Event handler attribute value at `{`; returns the position after its closing brace."""
+        structure = self.store["structure"]
+        structure.append({"token": "{", "name": f"jsx:{attr}", "object": None, "pos": pos})
+        self.push_prev(("punct", "{"))
+        end = self.lex_js(pos + 1, "}")
+        structure.append({"token": "}", "name": None, "object": None, "pos": end - 1})
+        return end
+
+    def lex_jsx_tag(self, pos):
+        code, n = self.code, len(self.code)
+        start = pos
+        pos += 1
+        m = JSX_NAME_RE.match(code, pos)
+        name = m.group() if m else ""
+        pos = m.end() if m else pos
+        tag = {"name": name, "attrs": {}, "leading": None, "pos": start}
+        self.store["tags"].append(tag)
+
+        # Attributes
+        while True:
+            pos = self.skip_jsx_space(pos)
+            if pos >= n:
+                return pos
+            if code.startswith("/>", pos):
+                return pos + 2
+            ch = code[pos]
+            if ch == ">":
+                pos += 1
+                break
+            if ch == "{":
+                # {...spread}
+                self.push_prev(("punct", "{"))
+                pos = self.lex_js(pos + 1, "}")
+                continue
+            m = JSX_ATTR_RE.match(code, pos)
+            if not m:
+                pos += 1
+                continue
+            attr = m.group()
+            pos = self.skip_jsx_space(m.end())
+            if pos < n and code[pos] == "=":
+                pos = self.skip_jsx_space(pos + 1)
+                m = JSX_STRING_RE.match(code, pos)
+                if m:
+                    value = m.group()[1:-1]
+                    tag["attrs"][attr] = ["string", value]
+                    self.store["strings"].append({"value": value, "kind": "attr", "pos": pos})
+                    self.store["assigns"].append({"name": attr, "op": "=", "kind": "string", "value": value, "pos": pos})
+                    pos = m.end()
+                elif pos < n and code[pos] == "{":
+                    if attr.startswith("on"):
+                        end = self.lex_handler(pos, attr)
+                    else:
+                        self.push_prev(("punct", "{"))
+                        end = self.lex_js(pos + 1, "}")
+                    tag["attrs"][attr] = ["expr", code[pos + 1:end - 1]]
+                    pos = end
+                elif pos < n and code[pos] == "<":
+                    pos = self.lex_jsx_element(pos)
+                    tag["attrs"][attr] = ["element", None]
+                elif pos < n and code[pos] in "\"'":
+                    # Unterminated attribute string: the failed match read to the end of the code
+                    self.mark_dirty()
+            else:
+                tag["attrs"][attr] = ["bool", True]
+
+        # Children until the matching closing tag
+        content_start = pos
+        while pos < n:
+            m = JSX_TEXT_RE.match(code, pos)
+            text = m.group()
+            if text.strip():
+                self.store["strings"].append({"value": text.strip(), "kind": "jsx", "pos": pos})
+            pos = m.end()
+            if pos >= n:
+                break
+            if code[pos] == "{":
+                self.push_prev(("punct", "{"))
+                pos = self.lex_js(pos + 1, "}")
+                continue
+            # `<`: closing tag or nested element
+            if tag["leading"] is None:
+                tag["leading"] = code[content_start:pos]
+            if code.startswith("</", pos):
+                end = code.find(">", pos)
+                end = n if end < 0 else end + 1
+                self.store["closingTags"].append(code[pos + 2:end - 1].strip())
+                return end
+            pos = self.lex_jsx_element(pos)
+        if tag["leading"] is None:
+            tag["leading"] = code[content_start:pos]
+        return pos
+
+
+def extract_facts(code):
+    """Lex the code once and return the facts dict (see JsxLexer)."""
+    return JsxLexer(code).run()
+
+
+# ---------------------------------------------------------------------------
+# Incremental re-review — a fix iteration usually changes a few lines of
+# App.jsx. The previous run's blocks are mapped onto the new code through a
+# line diff; blocks whose lines are unchanged (segments: and whose start state
+# matches) are copied, and only rules reading a fact kind that changed run again.
+# ---------------------------------------------------------------------------
+
+def line_starts(lines):
+    """Offset of every line, plus the end of the code as a sentinel."""
+    starts = [0]
+    for line in lines:
+        starts.append(starts[-1] + len(line))
+    return starts
+
+
+def line_map(old_lines, new_lines):
+    """For each new line: (old line index, end of its unchanged block in new lines), or None if changed."""
+    limit = min(len(old_lines), len(new_lines))
+    prefix = 0
+    while prefix < limit and old_lines[prefix] == new_lines[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and old_lines[-1 - suffix] == new_lines[-1 - suffix]:
+        suffix += 1
+    # Only the region between the common prefix and suffix needs a real diff
+    matcher = difflib.SequenceMatcher(
+        None, old_lines[prefix:len(old_lines) - suffix], new_lines[prefix:len(new_lines) - suffix],
+    )
+    blocks = [(0, 0, prefix)]
+    blocks += [(prefix + a, prefix + b, size) for a, b, size in matcher.get_matching_blocks() if size]
+    blocks.append((len(old_lines) - suffix, len(new_lines) - suffix, suffix))
+
+    mapping = [None] * len(new_lines)
+    for a, b, size in blocks:
+        for k in range(size):
+            mapping[b + k] = (a + k, b + size)
+    return mapping
+
+
+def as_state(state):
+    depth, prev, prev2 = state
+    return depth, tuple(prev), tuple(prev2)
+
+
+class Splice:
+    """The previous run's blocks (see JsxLexer), located in the new code through a line diff."""
+
+    def __init__(self, previous, code):
+        old_code = previous["code"]
+        old_lines = old_code.splitlines(keepends=True)
+        new_lines = code.splitlines(keepends=True)
+        self.store = previous["store"]
+        self.segments = previous["segments"]
+        for segment in self.segments:
+            segment["state"] = as_state(segment["state"])
+            segment["out"] = segment["out"] and as_state(segment["out"])
+        self.elements = previous["elements"]
+        self.element_starts = [element["start"] for element in self.elements]
+        self.segment_at = {segment["start"]: segment for segment in self.segments}
+        self.element_at = {element["start"]: element for element in self.elements}
+        self.old_size = len(old_code)
+        self.new_size = len(code)
+        self.mapping = line_map(old_lines, new_lines)
+        self.old_starts = line_starts(old_lines)
+        self.new_starts = line_starts(new_lines)
+
+    def locate(self, pos, blocks):
+        """(old block, old line, new line, unchanged block end) for the old block at the line of `pos`."""
+        ln = bisect.bisect_right(self.new_starts, pos) - 1
+        if ln >= len(self.mapping) or self.mapping[ln] is None:
+            return None
+        old_line, block_end = self.mapping[ln]
+        block = blocks.get(self.old_starts[old_line] + pos - self.new_starts[ln])
+        if block is None or block["dirty"]:
+            return None
+        return block, old_line, ln, block_end
+
+    def segment(self, pos, state):
+        """(old segment, new end offset) for an unchanged segment starting at line start `pos` in `state`."""
+        found = self.locate(pos, self.segment_at)
+        if found is None:
+            return None
+        segment, old_line, ln, block_end = found
+        if segment["state"] != state:
+            return None
+        end_line = ln + bisect.bisect_left(self.old_starts, segment["end"]) - old_line
+        if end_line > block_end:
+            return None
+        # The last segment was lexed up to the end of the code: it must still end there
+        if segment["end"] == self.old_size and end_line != len(self.mapping):
+            return None
+        return segment, self.new_starts[end_line]
+
+    def element(self, pos):
+        """(old element, new end offset) for an unchanged element block starting at `pos`."""
+        found = self.locate(pos, self.element_at)
+        if found is None:
+            return None
+        element, old_line, ln, block_end = found
+        # Every line up to the one holding the closing `>` must be unchanged
+        last_line = ln + bisect.bisect_right(self.old_starts, element["end"] - 1) - 1 - old_line
+        if last_line >= block_end:
+            return None
+        return element, pos + element["end"] - element["start"]
+
+    def elements_within(self, block):
+        """Old element blocks starting inside `block` (the block itself included)."""
+        first = bisect.bisect_left(self.element_starts, block["start"])
+        last = bisect.bisect_left(self.element_starts, block["end"])
+        return self.elements[first:last]
+
+
+def without_pos(facts):
+    return [{k: v for k, v in fact.items() if k != "pos"} for fact in facts]
+
+
+def changed_facts(old_store, new_store, reused):
+    """Fact kinds whose content (offsets aside) differs between the previous run and this one."""
+    changed = set()
+    # List facts: compare what was lexed again between two copied blocks with what it replaced
+    ends = ([len(old_store[kind]) for kind in FACT_KINDS], None, [len(new_store[kind]) for kind in FACT_KINDS], None)
+    for i, kind in enumerate(LIST_FACTS):
+        old_next = new_next = 0
+        for old_from, old_to, new_from, new_to in reused + [ends]:
+            if without_pos(new_store[kind][new_next:new_from[i]]) != without_pos(old_store[kind][old_next:old_from[i]]):
+                changed.add(kind)
+                break
+            if old_to is not None:
+                old_next, new_next = old_to[i], new_to[i]
+    for kind in SET_FACTS:
+        if set(old_store[kind]) != set(new_store[kind]):
+            changed.add(kind)
+    return changed
+
+
+# ---------------------------------------------------------------------------
+# Rule registry — every rule is registered once with its metadata; patterns
+# are compiled at import. Scopes: "review" (check_code.py) and "validate"
+# (validate_output.py). Targets: which generated file the rule inspects.
+# Patterns must stay unambiguous (each character can be consumed by only one
+# quantifier), which keeps the backtracking engine linear.
+# ---------------------------------------------------------------------------
+
+TARGET_PATHS = {"app": "src/App.jsx", "data": "src/data.js", "db": "src/db.js"}
+
+EMOJI_RE = re.compile(
+    r"[\U0001F600-\U0001F64F\U0001F300-\U0001F5FF"
+    r"\U0001F680-\U0001F6FF\U0001F1E0-\U0001F1FF"
+    r"\u2600-\u26FF\u2700-\u27BF]"
+)
+WORD_RE = re.compile(r"\w*")
+ID_NAME_TOKENS = ("_id", "Id", "_ID", "ID")
+TABLE_ID_HEADER_RE = re.compile(r"""\s*["']?(\w*(?:_id|_ID|Id)\w*)["']?""")
+# Searches only start at the first digit of a run, so a long digit run is scanned once
+HARDCODED_NUMBER_RE = re.compile(r"(?<!\d)\d+(?:[.,]\d*)?\s*(?:%|EUR|K|M|\u20ac|\$)")
+BADGE_PERCENT_RE = re.compile(r"\s*[+-]?\d+(?:[.,]\d*)?\s*%")
+# Matched against the stripped text, so no whitespace run sits between two quantifiers
+KPI_NUMBER_RE = re.compile(r"""\{?\s*["']?[\d,]{4,}(?:\.\d*)?["']?\s*\}?""")
+CHART_COMPONENTS = ["PieChart", "BarChart", "AreaChart", "LineChart", "RadarChart"]
+FORMAT_HELPERS = ("fmt", "fmtCur", "fmtPct")
+RECHARTS_COMPONENTS = {
+    "BarChart", "PieChart", "AreaChart", "LineChart", "ResponsiveContainer", "Tooltip", "XAxis", "YAxis",
+    "CartesianGrid", "Bar", "Pie", "Area", "Line", "Cell", "Legend",
+}
+FABRICATION_KEYWORDS = [
+    "Precedent", "Previous", "Objectif", "Target",
+    "Last Year", "Annee derniere", "Budget",
+]
+# Performance rules: the injected dataset, and what runs once per render or not
+DATA_NAME = "DATA"
+# Calls whose callbacks do not run on every render (memoized, effects, timers)
+DEFERRED_CALLS = {"useMemo", "useCallback", "useEffect", "useLayoutEffect", "setTimeout", "setInterval",
+                  "requestAnimationFrame", "addEventListener", "then"}
+# Methods whose callback runs once per item
+ITERATION_METHODS = ARRAY_METHODS - {"includes", "indexOf"}
+SORT_METHODS = {"sort", "toSorted"}
+CHART_DATA_TAGS = set(CHART_COMPONENTS) | {"ComposedChart", "ScatterChart", "Pie", "Scatter"}
+RAW_ROWS_PREFIXES = tuple(f"{DATA_NAME}.{method}(" for method in ("filter", "sort", "toSorted", "map"))
+# Array/object literals longer than this (chars) belong in src/data.js or a computation
+LARGE_LITERAL_CHARS = 2048
+# Closing bracket -> its opening bracket
+CLOSING_BRACKETS = {")": "(", "]": "[", "}": "{"}
+
+# Time budgets (ms): per rule, and for the whole file (lexing included)
+CHECK_BUDGET_MS = 250
+FILE_BUDGET_MS = 2000
+SKIPPED_REASON = "skipped: budget exceeded"
+
+# Incremental re-review cache: any edit to this module invalidates cached results
+CACHE_FORMAT = 1
+RULESET_VERSION = hashlib.sha1(Path(__file__).read_bytes()).hexdigest()[:12]
+
+# A rule check returns None (not applicable), PASS, or the failure message
+PASS = True
+RULES = []
+
+
+class BudgetExceeded(Exception):
+    """Raised inside a rule once its time budget is spent."""
+
+
+def rule(rule_id, severity="error", scopes=("review",), target="app", reads=None, literal=None):
+    """Register a rule check with its metadata (severity: error|warning|performance).
+
+    `reads` lists the fact kinds the check depends on; an incremental run reuses the
+    previous result when none of them changed. None means the check reads the raw code.
+    `literal` marks a check that only tests whether that string (or one of a tuple of strings)
+    occurs in the file, so it can be decided while the file is streamed (see validate_output.py).
+    """
+    if isinstance(literal, str):
+        literal = (literal,)
+
+    def register(check):
+        RULES.append({
+            "id": rule_id,
+            "severity": severity,
+            "scopes": frozenset(scopes),
+            "target": target,
+            "reads": frozenset(reads) if reads is not None else None,
+            "literal": literal,
+            "check": check,
+        })
+        return check
+    return register
+
+
+def scan_structure(structure, each=iter):
+    """(DATA scans, large literals) found by walking the "structure" facts with a bracket stack.
+
+    A scan is a call chain on DATA (`DATA.filter(...).reduce(...)`):
+      {chain: [method, ...], pos, render: runs on every render, outer: label of the
+       iteration method whose callback holds it (or None), outerData: that iteration is a DATA scan}
+    A scan runs on every render when it sits in a function body, outside the callback of a
+    DEFERRED_CALLS call or of an on* JSX attribute.
+    A large literal is an array/object literal of at least LARGE_LITERAL_CHARS (outermost only):
+      {pos, size, render}
+    """
+    frames = []
+    scans = []
+    literals = []
+    member = None  # `.` event right before the current one
+    closed = None  # frame closed by the event right before the current one
+    for event in each(structure):
+        token = event["token"]
+        if token == ".":
+            member, closed = (event, closed), None
+            continue
+        if token in CLOSING_BRACKETS:
+            frame = frames.pop() if frames and frames[-1]["token"] == CLOSING_BRACKETS[token] else None
+            if frame is not None and (token == "]" or (token == "}" and frame["name"] in (None, "return"))):
+                size = event["pos"] + 1 - frame["pos"]
+                if size >= LARGE_LITERAL_CHARS:
+                    literals.append({"pos": frame["pos"], "size": size, "render": render_context(frames)[0]})
+            member, closed = None, frame
+            continue
+        frame = {"token": token, "name": event["name"], "pos": event["pos"], "method": None, "scan": None}
+        if token == "(" and member is not None and member[0]["name"] == event["name"]:
+            dot, before = member
+            frame["method"] = f"{'(...)' if dot['object'] == ')' else dot['object']}.{event['name']}()"
+            if dot["object"] == ")" and before is not None and before["scan"] is not None:
+                frame["scan"] = before["scan"]
+                frame["scan"]["chain"].append(event["name"])
+            elif dot["object"] == DATA_NAME:
+                render, outer = render_context(frames)
+                frame["scan"] = {
+                    "chain": [event["name"]], "pos": dot["pos"], "render": render,
+                    "outer": outer and (scan_label(outer["scan"]) if outer["scan"] else outer["method"]),
+                    "outerData": bool(outer and outer["scan"]),
+                }
+                scans.append(frame["scan"])
+        frames.append(frame)
+        member, closed = None, None
+    literals.sort(key=lambda literal: literal["pos"])
+    outermost = []
+    for literal in literals:
+        if not outermost or literal["pos"] >= outermost[-1]["pos"] + outermost[-1]["size"]:
+            outermost.append(literal)
+    return scans, outermost
+
+
+def render_context(frames):
+    """(runs on every render, innermost enclosing iteration-method frame or None) for the open `frames`."""
+    render = deferred = False
+    outer = None
+    for frame in reversed(frames):
+        name = frame["name"] or ""
+        if (frame["token"] == "(" and name in DEFERRED_CALLS) or name.startswith("jsx:on"):
+            deferred = True
+        elif name in ("=>", "fn"):
+            render = True
+        if outer is None and frame["method"] and name in ITERATION_METHODS:
+            outer = frame
+    return render and not deferred, outer
+
+
+def scan_label(scan):
+    return DATA_NAME + "".join(f".{method}()" for method in scan["chain"])
+
+
+def scan_cost(scan):
+    return "O(n log n)" if SORT_METHODS & set(scan["chain"]) else "O(n)"
+
+
+class RuleContext:
+    """One file under review; lexed facts and derived views are computed once, on first use."""
+
+    def __init__(self, code):
+        self.code = code
+        self.deadline = None
+
+    def each(self, items):
+        """Iterate `items`, raising BudgetExceeded once the running rule's deadline has passed."""
+        deadline = self.deadline
+        for n, item in enumerate(items):
+            if deadline is not None and n % 32 == 0 and time.perf_counter() > deadline:
+                raise BudgetExceeded
+            yield item
+
+    @cached_property
+    def facts(self):
+        return extract_facts(self.code)
+
+    @cached_property
+    def tag_names(self):
+        return {t["name"] for t in self.facts["tags"]}
+
+    @cached_property
+    def names(self):
+        return self.facts["identifiers"] | self.tag_names
+
+    @cached_property
+    def text(self):
+        # All user-visible text (string/template literals, attribute strings, JSX text), joined once
+        return "\0".join(s["value"] for s in self.facts["strings"])
+
+    @cached_property
+    def text_lower(self):
+        return self.text.lower()
+
+    @cached_property
+    def recharts_imports(self):
+        return [imp for imp in self.facts["imports"] if imp["module"] == "recharts"]
+
+    @cached_property
+    def has_charts(self):
+        return any(comp in self.names for comp in CHART_COMPONENTS)
+
+    @cached_property
+    def structure_scan(self):
+        return scan_structure(self.facts["structure"], self.each)
+
+    @staticmethod
+    def class_name(tag):
+        kind, value = tag["attrs"].get("className", (None, ""))
+        return value if kind in ("string", "expr") else ""
+
+
+@rule("react-import", severity="warning", scopes=("review", "validate"), reads=("imports",))
+def check_react_import(ctx):
+    if any(imp["default"] == "React" or imp["names"] for imp in ctx.facts["imports"]):
+        return PASS
+    return "Missing React import"
+
+
+@rule("recharts-import", reads=("identifiers", "tags", "imports"))
+def check_recharts_import(ctx):
+    if not ctx.has_charts:
+        return None
+    return PASS if ctx.recharts_imports else "Charts used but no recharts import"
+
+
+@rule("responsive-container", severity="warning", reads=("identifiers", "tags"))
+def check_responsive_container(ctx):
+    if not ctx.has_charts:
+        return None
+    return PASS if "ResponsiveContainer" in ctx.names else "Charts used without ResponsiveContainer import"
+
+
+@rule("colors-array", severity="warning", scopes=("review", "validate"), reads=("identifiers", "tags"))
+def check_colors_array(ctx):
+    if not ctx.has_charts:
+        return None
+    return PASS if "COLORS" in ctx.facts["identifiers"] else "Charts used but COLORS array not defined"
+
+
+def is_id_name(value):
+    """Same as fullmatch(r"\w*(?:_id|Id|_ID|ID)\w*") without the quadratic backtracking."""
+    return WORD_RE.fullmatch(value) is not None and any(token in value for token in ID_NAME_TOKENS)
+
+
+def has_pie(ctx):
+    return "PieChart" in ctx.names and bool(ctx.tag_names & {"Pie", "PieChart"})
+
+
+@rule("pie-cell", scopes=("review", "validate"), reads=("identifiers", "tags"))
+def check_pie_cell(ctx):
+    if not has_pie(ctx):
+        return None
+    return PASS if "Cell" in ctx.tag_names else "PieChart without <Cell> — all slices will be grey!"
+
+
+@rule("pie-legend", scopes=("review", "validate"), reads=("identifiers", "tags"))
+def check_pie_legend(ctx):
+    if not has_pie(ctx):
+        return None
+    if "Legend" in ctx.tag_names:
+        return PASS
+    return "PieChart without <Legend> — users cannot identify what each slice represents!"
+
+
+@rule("format-helpers", severity="warning", reads=("calls", "identifiers"))
+def check_format_helpers(ctx):
+    if not ctx.facts["calls"] & {"toFixed", "toLocaleString", "Number"}:
+        return None
+    if any(helper in ctx.facts["identifiers"] for helper in FORMAT_HELPERS):
+        return PASS
+    return "Number formatting detected but no fmt/fmtCur/fmtPct helper defined"
+
+
+@rule("no-emoji", scopes=("review", "validate"), reads=("strings",))
+def check_no_emoji(ctx):
+    return "Code contains emojis — forbidden in dashboard output" if EMOJI_RE.search(ctx.text) else PASS
+
+
+@rule("no-ds-css-import", scopes=("review", "validate"), reads=("imports",))
+def check_no_ds_css_import(ctx):
+    if any(imp["module"] and imp["module"].endswith("ds.css") for imp in ctx.facts["imports"]):
+        return "App.jsx imports ds.css — forbidden (already in main.jsx)"
+    return PASS
+
+
+@rule("unique-gradient-ids", scopes=("review", "validate"), reads=("tags",))
+def check_unique_gradient_ids(ctx):
+    gradient_ids = [
+        t["attrs"]["id"][1] for t in ctx.each(ctx.facts["tags"])
+        if t["attrs"].get("id", (None,))[0] == "string" and "Grad" in t["attrs"]["id"][1][1:]
+    ]
+    if not gradient_ids:
+        return None
+    if len(gradient_ids) == len(set(gradient_ids)):
+        return PASS
+    return f"Duplicate SVG gradient IDs: {[x for x in gradient_ids if gradient_ids.count(x) > 1]}"
+
+
+@rule("insights-section", reads=("strings",))
+def check_insights_section(ctx):
+    text = ctx.text
+    if "insight-item" in text or "insight-bar" in text or "key-takeaway" in text or "Points cl" in text:
+        return PASS
+    return "Missing 'Points cles' / insights section — OBLIGATOIRE en bas de Vue d'Ensemble"
+
+
+@rule("select-styling", reads=("tags", "identifiers", "strings"))
+def check_select_styling(ctx):
+    if "select" not in ctx.tag_names:
+        return None
+    if ("background" in ctx.facts["identifiers"] or "background" in ctx.text) and "#1A2332" in ctx.text:
+        return PASS
+    return "Filter <select> missing required dark background styling (background:'#1A2332')"
+
+
+@rule("no-id-datakey", reads=("tags",))
+def check_no_id_datakey(ctx):
+    id_datakeys = [
+        t["attrs"]["dataKey"][1] for t in ctx.each(ctx.facts["tags"])
+        if t["attrs"].get("dataKey", (None,))[0] == "string" and is_id_name(t["attrs"]["dataKey"][1])
+    ]
+    if not id_datakeys:
+        return PASS
+    return f"Raw ID columns used as chart dataKey: {id_datakeys} — use names/categories instead"
+
+
+@rule("content-area", severity="warning", reads=("strings",))
+def check_content_area(ctx):
+    return PASS if "content-area" in ctx.text else "Missing 'content-area' wrapper class — required for proper layout"
+
+
+@rule("drawer-menu", severity="warning", reads=("strings", "identifiers"))
+def check_drawer_menu(ctx):
+    identifiers = ctx.facts["identifiers"]
+    if ("drawer" in ctx.text_lower or "hamburger" in ctx.text_lower or "menuOpen" in identifiers
+            or any("drawer" in name.lower() or "hamburger" in name.lower() for name in identifiers)):
+        return PASS
+    return "Missing drawer/hamburger menu pattern"
+
+
+@rule("fabrication-keywords", scopes=("review", "validate"), reads=("strings",))
+def check_fabrication_keywords(ctx):
+    # Only visible text counts: `e.target.value` or a comment is not a fabricated comparison
+    found = [kw for kw in FABRICATION_KEYWORDS if kw.lower() in ctx.text_lower]
+    if not found:
+        return None
+    return (
+        f"Fabrication keywords detected: {found} — these comparisons require data columns that likely don't exist. "
+        "Remove or compute from real data."
+    )
+
+
+@rule("insight-hardcoded", scopes=("review", "validate"), reads=("assigns",))
+def check_insight_hardcoded(ctx):
+    # Detect: text: "Le CA est de 1.5M EUR" or text: "augmentation de 15.3%"
+    hardcoded = [
+        f'{a["name"]}{a["op"] if a["op"] == "=" else a["op"] + " "}"{a["value"]}"' for a in ctx.each(ctx.facts["assigns"])
+        if a["kind"] == "string" and a["name"].endswith(("text", "insight", "takeaway"))
+        and HARDCODED_NUMBER_RE.search(a["value"])
+    ]
+    if not hardcoded:
+        return PASS
+    return (
+        f"Hardcoded numbers in insights/takeaways: {hardcoded[:3]} — insights must use template literals "
+        "with computed values (useMemo + backticks)"
+    )
+
+
+@rule("takeaways-usememo", scopes=("review", "validate"), reads=("assigns", "strings"))
+def check_takeaways_usememo(ctx):
+    takeaway_assigns = [
+        a for a in ctx.each(ctx.facts["assigns"])
+        if a["op"] == "=" and a["name"].endswith(("takeaways", "insights"))
+    ]
+    has_static = any(a["value"] == "[" for a in takeaway_assigns)
+    if not (has_static and ("insight-item" in ctx.text or "insight-bar" in ctx.text)):
+        return None
+    if any(a["value"] == "useMemo" for a in takeaway_assigns):
+        return PASS
+    return (
+        "takeaways/insights array is statically defined — must use useMemo(() => { ...compute... }, []) "
+        "with template literals"
+    )
+
+
+@rule("badge-hardcoded", reads=("tags",))
+def check_badge_hardcoded(ctx):
+    hardcoded = []
+    for t in ctx.each(ctx.facts["tags"]):
+        class_name = ctx.class_name(t)
+        if ("badge-up" in class_name or "badge-down" in class_name) and t["leading"] and BADGE_PERCENT_RE.match(t["leading"]):
+            hardcoded.append(f'{class_name}">{t["leading"].strip()}')
+    if not hardcoded:
+        return PASS
+    return f"Hardcoded percentages in badges: {hardcoded[:3]} — variation badges must display computed values"
+
+
+@rule("kpi-hardcoded", reads=("tags",))
+def check_kpi_hardcoded(ctx):
+    # Detect: className="kpi-value">1,523,456 or kpi-value">{1523456}
+    count = sum(
+        1 for t in ctx.each(ctx.facts["tags"])
+        if "kpi-value" in ctx.class_name(t) and t["leading"] and KPI_NUMBER_RE.fullmatch(t["leading"].strip())
+    )
+    if count == 0:
+        return PASS
+    return (
+        f"Hardcoded numbers in KPI values: {count} instances — KPI values must be computed expressions "
+        "(e.g., {fmtCur(total)})"
+    )
+
+
+def chart_children_rule(chart_type, child_tag):
+    @rule(f"{chart_type.lower()}-children", reads=("tags", "closingTags"))
+    def check_chart_children(ctx):
+        if chart_type not in ctx.tag_names or chart_type not in ctx.facts["closingTags"]:
+            return None
+        return PASS if child_tag in ctx.tag_names else f"{chart_type} without <{child_tag} child — chart will render empty!"
+    return check_chart_children
+
+
+for _chart_type, _child_tag in [("BarChart", "Bar"), ("AreaChart", "Area"), ("LineChart", "Line")]:
+    chart_children_rule(_chart_type, _child_tag)
+
+
+@rule("yaxis-formatter", severity="warning", reads=("tags",))
+def check_yaxis_formatter(ctx):
+    yaxis_tags = [t for t in ctx.each(ctx.facts["tags"]) if t["name"] == "YAxis"]
+    if not yaxis_tags:
+        return None
+    missing = sum(1 for t in yaxis_tags if "tickFormatter" not in t["attrs"])
+    return PASS if missing == 0 else f"{missing} YAxis element(s) missing tickFormatter — numbers won't be formatted"
+
+
+@rule("format-defined", reads=("calls", "declared"))
+def check_format_defined(ctx):
+    used = [helper for helper in FORMAT_HELPERS if helper in ctx.facts["calls"]]
+    if not used:
+        return None
+    if all(helper in ctx.facts["declared"] for helper in used):
+        return PASS
+    return "Code calls fmt/fmtCur/fmtPct but no formatting function is defined — will crash at runtime"
+
+
+@rule("table-id-headers", severity="warning", reads=("tags",))
+def check_table_id_headers(ctx):
+    headers = []
+    for t in ctx.each(ctx.facts["tags"]):
+        if (t["name"] == "th" or "table-header" in ctx.class_name(t)) and t["leading"]:
+            m = TABLE_ID_HEADER_RE.match(t["leading"])
+            if m:
+                headers.append(m.group(1))
+    if not headers:
+        return PASS
+    return f"Raw ID columns in table headers: {headers[:3]} — use descriptive names instead"
+
+
+@rule("recharts-missing-imports", reads=("tags", "imports"))
+def check_recharts_missing_imports(ctx):
+    used = ctx.tag_names & RECHARTS_COMPONENTS
+    if not used or not ctx.recharts_imports:
+        return None  # no recharts import is already caught by recharts-import
+    imported = {local for imp in ctx.recharts_imports for _, local in imp["names"]}
+    missing = used - imported
+    return PASS if not missing else f"Recharts components used but not imported: {', '.join(sorted(missing))}"
+
+
+# Performance rules — estimated cost class of each finding in brackets (n: DATA rows)
+
+@rule("perf-render-scan", severity="performance", reads=("structure",))
+def check_perf_render_scan(ctx):
+    scans, _ = ctx.structure_scan
+    if not scans:
+        return None
+    found = [f"{scan_label(scan)} [{scan_cost(scan)}]" for scan in scans if scan["render"] and scan["outer"] is None]
+    if not found:
+        return PASS
+    return (
+        f"{len(found)} scan(s) of DATA in the render body outside useMemo, re-run on every render: {found[:3]} "
+        "— compute them in useMemo(() => ..., [deps])"
+    )
+
+
+@rule("perf-nested-scan", severity="performance", reads=("structure",))
+def check_perf_nested_scan(ctx):
+    scans, _ = ctx.structure_scan
+    if not scans:
+        return None
+    found = [
+        f"{scan['outer'][:-1]}... {scan_label(scan)} ...) [{'O(n^2)' if scan['outerData'] else 'O(n*m)'}]"
+        for scan in scans if scan["outer"]
+    ]
+    if not found:
+        return PASS
+    return (
+        f"Scans of DATA nested in an iteration callback (one full scan per item): {found[:3]} "
+        "— group DATA once in useMemo (reduce into an object keyed by the item) and look the groups up"
+    )
+
+
+@rule("perf-chart-raw-data", severity="performance", reads=("tags",))
+def check_perf_chart_raw_data(ctx):
+    charts = [t for t in ctx.each(ctx.facts["tags"]) if t["name"] in CHART_DATA_TAGS and "data" in t["attrs"]]
+    if not charts:
+        return None
+    raw = []
+    for t in charts:
+        kind, value = t["attrs"]["data"]
+        expr = value.strip() if kind == "expr" else ""
+        if expr == DATA_NAME or (expr.startswith(RAW_ROWS_PREFIXES) and ".slice(" not in expr):
+            raw.append(f"<{t['name']} data={{{expr}}}>")
+    if not raw:
+        return PASS
+    return (
+        f"Charts bound to the raw DATA rows (one SVG element per row) [O(n) per render]: {raw[:3]} "
+        "— aggregate in useMemo (group by category/period, top N) and pass the result"
+    )
+
+
+@rule("perf-inline-literal", severity="performance")
+def check_perf_inline_literal(ctx):
+    _, literals = ctx.structure_scan
+    if not literals:
+        return PASS
+    found = [
+        f"line {ctx.code.count(chr(10), 0, literal['pos']) + 1}: {literal['size']:,} chars "
+        f"[{'O(size) per render' if literal['render'] else 'O(size) parse'}]"
+        for literal in literals
+    ]
+    return (
+        f"Large inline array/object literals: {found[:3]} — data belongs in src/data.js (DATA); "
+        "a literal in the render body is rebuilt on every render"
+    )
+
+
+def placeholder_rule(rule_id, target, placeholder, packed=()):
+    """Rule: the file holds `placeholder` — or, given `packed`, every one of these literals of
+    the packed module written in its place."""
+
+    @rule(rule_id, scopes=("validate",), target=target, literal=(placeholder, *packed))
+    def check_placeholder(ctx):
+        if placeholder in ctx.code or (packed and all(literal in ctx.code for literal in packed)):
+            return PASS
+        alternative = f" (or the {PACKED_DATA_FORMAT} module written by pack_data.py)" if packed else ""
+        return f"{TARGET_PATHS[target]} must contain {placeholder} placeholder{alternative}"
+    return check_placeholder
+
+
+# src/data.js written by the data-analyzer's pack_data.py (module_source(), keep in sync): the
+# payload is a JSON.parse() string starting with its format key, and DATA is what the decoder returns
+PACKED_DATA_FORMAT = "columnar-v1"
+PACKED_DATA_MARKERS = (
+    f'JSON.parse("{{\\"format\\":\\"{PACKED_DATA_FORMAT}\\"',
+    "export const DATA = unpack(PACKED);",
+)
+
+placeholder_rule("data-placeholder", "data", "__INJECT_DATA__", packed=PACKED_DATA_MARKERS)
+placeholder_rule("db-proxy-placeholder", "db", "__DB_PROXY_URL__")
+placeholder_rule("db-credentials-placeholder", "db", "__DB_CREDENTIALS__")
+
+
+def previous_run(cache, target, scope):
+    """The cached previous run if it came from the same ruleset and target/scope, else None."""
+    if not cache or target != "app":
+        return None
+    if (cache.get("format"), cache.get("ruleset"), cache.get("target"), cache.get("scope")) != (
+            CACHE_FORMAT, RULESET_VERSION, target, scope):
+        return None
+    return cache
+
+
+def run_rules(code, target="app", scope="review", timings=None,
+              check_budget_ms=CHECK_BUDGET_MS, file_budget_ms=FILE_BUDGET_MS, cache=None, hits=None):
+    """Evaluate every registered rule for `target`/`scope` over one file, lexing it at most once.
+
+    When `timings` is a dict, the time spent per rule id (and in "(lex)") is added to it, in ms.
+    When `hits` is a list, the id of every failing rule is appended to it. Performance rules
+    only add their findings to "performance": they count neither as passed/failed nor as hits.
+    A rule still running past `check_budget_ms`, or starting after `file_budget_ms` is spent,
+    is listed in "skipped" (key present only when something was skipped).
+
+    When `cache` is a dict holding a previous run over an earlier version of the file, only the
+    changed blocks are lexed again and only rules reading changed facts are evaluated; the
+    result is the same as a full run. `cache` is then replaced with this run's state.
+    """
+    ctx = RuleContext(code)
+    rules = [r for r in RULES if r["target"] == target and scope in r["scopes"]]
+    file_deadline = time.perf_counter() + file_budget_ms / 1000
+    previous = previous_run(cache, target, scope)
+    changed = None
+    lexer = None
+    if target == "app":
+        start = time.perf_counter()
+        splice = None
+        if previous is not None:
+            splice = Splice(previous, code)
+            if timings is not None:
+                timings["(diff)"] = timings.get("(diff)", 0.0) + (time.perf_counter() - start) * 1000
+                start = time.perf_counter()
+        lexer = JsxLexer(code, splice)
+        ctx.facts = lexer.run()
+        if splice is not None:
+            changed = changed_facts(previous["store"], lexer.store, lexer.reused)
+        if timings is not None:
+            timings["(lex)"] = timings.get("(lex)", 0.0) + (time.perf_counter() - start) * 1000
+
+    errors = []
+    warnings = []
+    performance = []
+    skipped = []
+    results = {}
+    passed = 0
+    failed = 0
+    for r in rules:
+        if (changed is not None and r["reads"] is not None and not r["reads"] & changed
+                and r["id"] in previous["results"]):
+            result = previous["results"][r["id"]]
+        else:
+            start = time.perf_counter()
+            if start > file_deadline:
+                skipped.append({"rule": r["id"], "reason": SKIPPED_REASON})
+                continue
+            ctx.deadline = min(start + check_budget_ms / 1000, file_deadline)
+            try:
+                result = r["check"](ctx)
+            except BudgetExceeded:
+                result = BudgetExceeded
+            if timings is not None:
+                timings[r["id"]] = timings.get(r["id"], 0.0) + (time.perf_counter() - start) * 1000
+            if result is BudgetExceeded:
+                skipped.append({"rule": r["id"], "reason": SKIPPED_REASON})
+                continue
+        results[r["id"]] = result
+        if result is None:
+            continue
+        if r["severity"] == "performance":
+            # Render-cost findings, not checks: kept out of passed/failed and of the rule hits
+            if result is not PASS:
+                performance.append(result)
+            continue
+        if result is PASS:
+            passed += 1
+            continue
+        failed += 1
+        (errors if r["severity"] == "error" else warnings).append(result)
+        if hits is not None:
+            hits.append(r["id"])
+
+    if cache is not None:
+        cache.clear()
+        if lexer is not None:
+            cache.update({
+                "format": CACHE_FORMAT,
+                "ruleset": RULESET_VERSION,
+                "target": target,
+                "scope": scope,
+                "code": code,
+                "store": lexer.store,
+                "segments": lexer.segments,
+                "elements": lexer.elements,
+                "results": results,
+            })
+
+    result = {"errors": errors, "warnings": warnings, "performance": performance, "passed": passed, "failed": failed}
+    if skipped:
+        result["skipped"] = skipped
+    return result
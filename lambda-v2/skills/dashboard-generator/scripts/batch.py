@@ -0,0 +1,199 @@
+"""
+batch.py — Run one of the dashboard checkers over a corpus of archived outputs.
+
+Shared by validate_output.py and check_code.py (--batch): the items are read from
+directories, globs and NDJSON files, checked on a process pool and reported as one
+NDJSON line each, in input order, followed by a summary line (rule hit counts, error
+rate and its delta against a previous run's report, throughput).
+
+As with app_rules.py, edit lambda-v2/shared/batch.py and copy it into both skills'
+scripts/ folders (test-scripts.py fails while a copy differs).
+"""
+
+import glob
+import json
+import os
+import sys
+import time
+from collections import Counter, deque
+
+# Items submitted to the pool ahead of the one being reported, per worker
+IN_FLIGHT_PER_WORKER = 16
+NDJSON_SUFFIXES = (".ndjson", ".jsonl")
+
+
+# Also copied into web-app-reviewer/scripts/check_web_app.py and data-analyzer/scripts/
+# analyze_bundle.py, whose skills do not ship batch.py: keep the three in sync
+def available_cores():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # macOS / Windows
+        return os.cpu_count() or 1
+
+
+def iter_items(sources, suffixes):
+    """(item id, path, NDJSON line) of every item, in order; one of path / line is None.
+
+    A source is "-" (NDJSON on stdin), a directory (its files ending in one of `suffixes`,
+    in sorted path order) or a glob; an .ndjson / .jsonl file holds one item per line,
+    identified as "<file>:<line number>" unless the record carries an "id".
+    """
+    for source in sources:
+        if source == "-":
+            yield from iter_lines("<stdin>", sys.stdin)
+            continue
+        if os.path.isdir(source):
+            paths = []
+            for root, dirs, files in os.walk(source):
+                dirs.sort()
+                paths.extend(os.path.join(root, name) for name in sorted(files) if name.endswith(suffixes))
+        else:
+            paths = sorted(glob.glob(source, recursive=True))
+        for path in paths:
+            if path.endswith(NDJSON_SUFFIXES):
+                with open(path, "r", encoding="utf-8") as f:
+                    yield from iter_lines(path, f)
+            else:
+                yield path, path, None
+
+
+def iter_lines(name, f):
+    for line_no, line in enumerate(f, 1):
+        if line.strip():
+            yield f"{name}:{line_no}", None, line
+
+
+def read_record(line, keys):
+    """(id or None, value) of one NDJSON item: {"id": ..., <one of keys>: value}, or the bare value."""
+    record = json.loads(line)
+    if isinstance(record, dict):
+        for key in keys:
+            if key in record:
+                return record.get("id"), record[key]
+    return None, record
+
+
+def check_one(check_item, item_id, path, line):
+    """Item result line for one item; `check_item(path, line)` returns {errors, warnings, rules[, id]}."""
+    start = time.perf_counter()
+    try:
+        result = {"id": item_id, **check_item(path, line)}
+        result["status"] = "fail" if result["errors"] else "pass"
+    except Exception as e:  # one item that breaks a check must not abort the batch
+        result = {"id": item_id, "status": "invalid", "errors": [f"{type(e).__name__}: {e}"],
+                  "warnings": [], "rules": []}
+    result["ms"] = round((time.perf_counter() - start) * 1000, 3)
+    return {"type": "item", **result}
+
+
+def check_items(items, check_item, workers):
+    """check_one() results for `items`, in input order.
+
+    With several workers, items are checked on a process pool with at most
+    IN_FLIGHT_PER_WORKER items per worker submitted ahead of the next result.
+    """
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        try:
+            pool = ProcessPoolExecutor(max_workers=workers)
+        except (OSError, NotImplementedError):
+            pool = None  # no process support (e.g. no /dev/shm): check serially
+        if pool is not None:
+            with pool:
+                pending = deque()
+                for item in items:
+                    pending.append(pool.submit(check_one, check_item, *item))
+                    if len(pending) >= workers * IN_FLIGHT_PER_WORKER:
+                        yield pending.popleft().result()
+                while pending:
+                    yield pending.popleft().result()
+            return
+    for item in items:
+        yield check_one(check_item, *item)
+
+
+def load_report(path):
+    """Summary line of a previous run saved with --report, or None."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            report = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return report if isinstance(report, dict) and report.get("type") == "summary" else None
+
+
+def rate(count, total):
+    return round(count / total, 6) if total else 0.0
+
+
+def run_batch(sources, suffixes, check_item, workers, ruleset, previous=None, out=sys.stdout):
+    """Check every item of `sources`, writing one NDJSON line per item, then the summary line.
+
+    Returns the summary: item counts by status, error rate, failing rule counts ("(structure)"
+    for malformed outputs), throughput, and — given the `previous` summary — the change in
+    error rate and in each rule's hit rate (per item).
+    """
+    start = time.perf_counter()
+    statuses = Counter()
+    rule_hits = Counter()
+    for result in check_items(iter_items(sources, suffixes), check_item, workers):
+        statuses[result["status"]] += 1
+        rule_hits.update(result["rules"])
+        out.write(json.dumps(result, ensure_ascii=False) + "\n")
+    elapsed = time.perf_counter() - start
+
+    total = sum(statuses.values())
+    summary = {
+        "type": "summary",
+        "ruleset": ruleset,
+        "items": total,
+        "passed": statuses["pass"],
+        "failed": statuses["fail"],
+        "invalid": statuses["invalid"],
+        "errorRate": rate(statuses["fail"] + statuses["invalid"], total),
+        "ruleHits": dict(rule_hits.most_common()),
+        "elapsedS": round(elapsed, 3),
+        "itemsPerSecond": round(total / elapsed, 1) if elapsed else None,
+        "workers": workers,
+        "delta": None,
+    }
+    if previous is not None:
+        previous_total = previous.get("items", 0)
+        previous_hits = previous.get("ruleHits", {})
+        rule_deltas = {}
+        for rule_id in sorted(set(rule_hits) | set(previous_hits)):
+            change = rate(rule_hits[rule_id], total) - rate(previous_hits.get(rule_id, 0), previous_total)
+            if round(change, 6):
+                rule_deltas[rule_id] = round(change, 6)
+        summary["delta"] = {
+            "previousRuleset": previous.get("ruleset"),
+            "previousItems": previous_total,
+            "errorRate": round(summary["errorRate"] - previous.get("errorRate", 0.0), 6),
+            "ruleHitRates": rule_deltas,
+        }
+    out.write(json.dumps(summary, ensure_ascii=False) + "\n")
+    out.flush()
+    return summary
+
+
+def add_arguments(parser):
+    """The --batch options, shared by both scripts."""
+    parser.add_argument("--batch", action="append", default=[], metavar="SOURCE",
+                        help="Check a corpus instead of one file: a directory, a glob, an .ndjson file or - "
+                             "(repeatable); prints one NDJSON line per item, then a summary line")
+    parser.add_argument("--workers", type=int, default=available_cores(),
+                        help="--batch: processes checking items in parallel (default: available cores)")
+    parser.add_argument("--previous", default=None, metavar="PATH",
+                        help="--batch: summary saved by an earlier --report, to report the deltas against")
+    parser.add_argument("--report", default=None, metavar="PATH",
+                        help="--batch: also save the summary line to PATH (JSON)")
+
+
+def main(args, suffixes, check_item, ruleset):
+    """Run --batch as parsed by add_arguments(); returns the summary."""
+    previous = load_report(args.previous) if args.previous else None
+    summary = run_batch(args.batch, suffixes, check_item, args.workers, ruleset, previous=previous)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            f.write(json.dumps(summary, ensure_ascii=False, indent=2))
+    return summary
@@ -4,147 +4,345 @@ Validate dashboard generator JSON output for common errors.
 
 Usage: python validate_output.py <output.json>
 Or:    echo '{"files": {...}}' | python validate_output.py -
+Or:    python validate_output.py --profile <output.json>   (prints ms per rule)
+Or:    python validate_output.py --batch archive/ [--batch 'more/*.json' | outputs.ndjson | -]
+                                 [--workers N] [--previous report.json] [--report report.json]
+       (one NDJSON result line per output, then a summary line — see batch.py)
+
+Content rules are shared with dashboard-reviewer/scripts/check_code.py (app_rules.py).
+
+The output is parsed as a stream (JsonStream, CHUNK_CHARS at a time), so an Excel-mode
+src/data.js carrying a large dataset is never held in memory: structural errors are
+reported as soon as they are decided, and files whose rules only look for a placeholder
+(src/data.js, src/db.js) are scanned chunk by chunk. Only src/App.jsx is kept whole, for
+its lexer-based rules.
 """
 
+import argparse
 import json
 import re
 import sys
+from json.decoder import scanstring
 
+import batch
+from app_rules import RULES, RULESET_VERSION, TARGET_PATHS, run_rules
 
-def validate_output(output_json):
+# Characters read from the output per chunk
+CHUNK_CHARS = 1 << 16
+
+WHITESPACE_RE = re.compile(r"[ \t\n\r]*")
+HIGH_SURROGATE_END_RE = re.compile(r"\\u[dD][89abAB][0-9a-fA-F]{2}\Z")
+NUMBER_RE = re.compile(r"-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?")
+# Literal values json.load accepts (NaN / Infinity included)
+LITERALS = ("true", "false", "null", "NaN", "Infinity", "-Infinity")
+# Rule id counted for structural errors in --batch rule hits
+STRUCTURE_HIT = "(structure)"
+
+
+def structure_error(errors, hits, message):
+    errors.append(message)
+    if hits is not None:
+        hits.append(STRUCTURE_HIT)
+
+
+def validate_output(output_json, timings=None, hits=None):
+    """Errors and warnings for a parsed generator output. `hits` collects failing rule ids."""
     errors = []
     warnings = []
 
     # 1. Check JSON structure
     if not isinstance(output_json, dict):
-        errors.append("Output must be a JSON object")
+        structure_error(errors, hits, "Output must be a JSON object")
         return errors, warnings
 
     if "files" not in output_json:
-        errors.append("Output must have 'files' key")
+        structure_error(errors, hits, "Output must have 'files' key")
         return errors, warnings
 
     files = output_json["files"]
 
     if not isinstance(files, dict):
-        errors.append("'files' must be an object")
+        structure_error(errors, hits, "'files' must be an object")
         return errors, warnings
 
     # 2. Check required files
     if "src/App.jsx" not in files:
-        errors.append("Missing required file: src/App.jsx")
-
-    # 3. Validate App.jsx content
-    if "src/App.jsx" in files:
-        app_code = files["src/App.jsx"]
-
-        # Check imports
-        if "import React" not in app_code and "import {" not in app_code:
-            warnings.append("App.jsx may be missing React import")
-
-        # Check for emojis
-        emoji_pattern = re.compile(
-            r"[\U0001F600-\U0001F64F\U0001F300-\U0001F5FF"
-            r"\U0001F680-\U0001F6FF\U0001F1E0-\U0001F1FF"
-            r"\u2600-\u26FF\u2700-\u27BF]"
-        )
-        if emoji_pattern.search(app_code):
-            errors.append("App.jsx contains emojis — forbidden!")
-
-        # Check PieChart without Cell or Legend
-        if "PieChart" in app_code and "<Pie" in app_code:
-            if "<Cell" not in app_code:
-                errors.append("PieChart without <Cell> — all slices will be grey!")
-            if "<Legend" not in app_code:
-                errors.append("PieChart without <Legend> — users cannot identify slices!")
-
-        # Check COLORS array when charts present
-        chart_types = ["PieChart", "BarChart", "AreaChart", "LineChart"]
-        has_charts = any(ct in app_code for ct in chart_types)
-        if has_charts and "COLORS" not in app_code:
-            warnings.append("Charts detected but COLORS array not defined")
-
-        # Check ds.css import (should NOT be in App.jsx)
-        if re.search(r"""import\s+['"].*ds\.css['"]""", app_code):
-            errors.append("App.jsx imports ds.css — forbidden (already in main.jsx)")
-
-        # Check gradient ID uniqueness (sparklines)
-        gradient_ids = re.findall(r'id=["\']([^"\']+Grad[^"\']*)["\']', app_code)
-        if len(gradient_ids) != len(set(gradient_ids)):
-            errors.append("Duplicate SVG gradient IDs — sparklines need unique IDs")
-
-        # Fabrication keywords — PROMOTED TO ERROR
-        fabrication_keywords = [
-            r"Precedent", r"Previous", r"Objectif", r"Target",
-            r"Last Year", r"Annee derniere", r"Budget"
-        ]
-        found_fab = []
-        for kw in fabrication_keywords:
-            if re.search(kw, app_code, re.IGNORECASE):
-                found_fab.append(kw)
-        if found_fab:
-            errors.append(
-                f"Fabrication keywords detected: {found_fab} — remove or compute from real data"
-            )
-
-        # Hardcoded numbers in insight/takeaway strings
-        insight_hardcoded = re.findall(
-            r"""(?:text|insight|takeaway)\s*[:=]\s*["'][^"']*\d+[.,]?\d*\s*(?:%|EUR|K|M|\u20ac|\$)[^"']*["']""",
-            app_code,
-        )
-        if insight_hardcoded:
-            errors.append(
-                f"Hardcoded numbers in insights: {insight_hardcoded[:3]} — use template literals with computed values"
-            )
-
-        # Static takeaways without useMemo
-        has_takeaways = re.search(r"(?:takeaways|insights)\s*=\s*\[", app_code)
-        has_memo = re.search(r"(?:takeaways|insights)\s*=\s*useMemo", app_code)
-        if has_takeaways and ("insight-item" in app_code or "insight-bar" in app_code):
-            if not has_memo:
-                errors.append(
-                    "takeaways/insights defined without useMemo — must use useMemo with template literals"
-                )
-
-    # 4. Check data.js (Excel mode)
-    if "src/data.js" in files:
-        data_code = files["src/data.js"]
-        if "__INJECT_DATA__" not in data_code:
-            errors.append("src/data.js must contain __INJECT_DATA__ placeholder")
-
-    # 5. Check db.js (Database mode)
-    if "src/db.js" in files:
-        db_code = files["src/db.js"]
-        if "__DB_PROXY_URL__" not in db_code:
-            errors.append("src/db.js must contain __DB_PROXY_URL__ placeholder")
-        if "__DB_CREDENTIALS__" not in db_code:
-            errors.append("src/db.js must contain __DB_CREDENTIALS__ placeholder")
+        structure_error(errors, hits, "Missing required file: src/App.jsx")
+
+    # 3. Content rules for App.jsx, data.js (Excel mode) and db.js (Database mode) — see app_rules.RULES
+    for target, path in TARGET_PATHS.items():
+        if path in files and not isinstance(files[path], str):
+            structure_error(errors, hits, f"{path} must be a string")
+        elif path in files:
+            result = run_rules(files[path], target=target, scope="validate", timings=timings, hits=hits)
+            errors.extend(result["errors"])
+            warnings.extend(result["warnings"])
+            warnings.extend(f"{path}: {skip['rule']} {skip['reason']}" for skip in result.get("skipped", []))
+
+    return errors, warnings
+
+
+class JsonStream:
+    """Pull parser over a JSON text file, holding at most about CHUNK_CHARS of it.
+
+    Values are consumed in document order: members() walks an object, string_pieces()
+    decodes a string piece by piece and skip_value() steps over anything else. Malformed
+    JSON raises ValueError.
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self.buf = ""
+        self.pos = 0
+        self.consumed = 0  # characters dropped from the buffer so far
+
+    def fill(self):
+        """Append the next chunk to the buffer; False at end of input."""
+        chunk = self.f.read(CHUNK_CHARS)
+        self.consumed += self.pos
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return bool(chunk)
+
+    def error(self, message):
+        raise ValueError(f"{message} (char {self.consumed + self.pos})")
+
+    def peek(self):
+        """Next non-whitespace character, not consumed ("" at end of input)."""
+        while True:
+            self.pos = WHITESPACE_RE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf) or not self.fill():
+                return self.buf[self.pos:self.pos + 1]
+
+    def expect(self, char):
+        if self.peek() != char:
+            self.error(f"Expecting {char!r}")
+        self.pos += 1
+
+    def string_pieces(self):
+        """Decoded pieces of the string starting here, up to and including its closing quote."""
+        self.expect('"')
+        while True:
+            try:
+                value, self.pos = scanstring(self.buf, self.pos)
+            except json.JSONDecodeError as e:
+                # Only an error the end of the buffer may have caused means "read on"
+                if not e.msg.startswith("Unterminated") and e.pos < len(self.buf) - 6:
+                    self.pos = e.pos
+                    self.error(e.msg)
+            else:
+                if value:
+                    yield value
+                return
+            # No closing quote yet: decode up to the last complete escape, then read on
+            end = len(self.buf)
+            last = self.buf.rfind("\\", max(self.pos, end - 6))
+            if last >= 0:
+                end = len(self.buf[self.pos:last + 1].rstrip("\\")) + self.pos
+            # Keep a trailing high surrogate with the low one that may start the next chunk
+            if self.ends_with_high_surrogate(end):
+                end -= 6
+            if end > self.pos:
+                yield scanstring(self.buf[self.pos:end] + '"', 0)[0]
+            self.pos = end
+            if not self.fill():
+                self.error("Unterminated string")
+
+    def ends_with_high_surrogate(self, end):
+        """Whether the string body buf[pos:end] ends with a \\uD800-\\uDBFF escape."""
+        match = HIGH_SURROGATE_END_RE.search(self.buf, self.pos, end)
+        if not match:
+            return False
+        # An even number of backslashes before it: the last one starts the escape
+        start = match.start()
+        backslashes = (start - self.pos) - len(self.buf[self.pos:start].rstrip("\\"))
+        return backslashes % 2 == 0
+
+    def read_string(self):
+        return "".join(self.string_pieces())
+
+    def members(self):
+        """Keys of the object starting here; the caller consumes each value before the next key."""
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            if self.peek() != '"':
+                self.error("Expecting property name enclosed in double quotes")
+            key = self.read_string()
+            self.expect(":")
+            yield key
+            char = self.peek()
+            self.pos += 1
+            if char == "}":
+                return
+            if char != ",":
+                self.pos -= 1
+                self.error("Expecting ',' delimiter")
+
+    def skip_value(self):
+        char = self.peek()
+        if char == '"':
+            for _ in self.string_pieces():
+                pass
+        elif char == "{":
+            for _ in self.members():
+                self.skip_value()
+        elif char == "[":
+            self.pos += 1
+            if self.peek() == "]":
+                self.pos += 1
+                return
+            while True:
+                self.skip_value()
+                char = self.peek()
+                if char not in ",]":
+                    self.error("Expecting ',' delimiter")
+                self.pos += 1
+                if char == "]":
+                    return
+        else:
+            # A number or literal is short: make sure it is not cut by the end of the buffer
+            while len(self.buf) - self.pos < 64 and self.fill():
+                pass
+            for literal in LITERALS:
+                if self.buf.startswith(literal, self.pos):
+                    self.pos += len(literal)
+                    return
+            number = NUMBER_RE.match(self.buf, self.pos)
+            if not number:
+                self.error("Expecting value")
+            self.pos = number.end()
+
+    def end(self):
+        if self.peek():
+            self.error("Extra data")
+
+
+def streamed_file(stream, target, timings, hits):
+    """run_rules() result for the file body starting here, read from the stream.
+
+    When every rule of the target only looks for a literal (see app_rules.rule), the body
+    is scanned chunk by chunk and the rules run over the literals found instead.
+    """
+    rules = [r for r in RULES if r["target"] == target and "validate" in r["scopes"]]
+    if any(r["literal"] is None for r in rules):
+        return run_rules(stream.read_string(), target=target, scope="validate", timings=timings, hits=hits)
+    literals = {literal for r in rules for literal in r["literal"]}
+    found = set()
+    overlap = max(map(len, literals)) - 1
+    tail = ""
+    for piece in stream.string_pieces():
+        window = tail + piece
+        found.update(literal for literal in literals - found if literal in window)
+        tail = window[-overlap:] if overlap else ""
+    return run_rules("\0".join(sorted(found)), target=target, scope="validate", timings=timings, hits=hits)
+
+
+def validate_stream(f, timings=None, hits=None):
+    """validate_output() over the JSON text read from `f`, without loading it whole.
+
+    Stops reading at the first fatal structural error; raises ValueError on malformed JSON.
+    """
+    errors = []
+    warnings = []
+    stream = JsonStream(f)
+
+    if stream.peek() != "{":
+        stream.skip_value()  # malformed JSON is reported as such
+        structure_error(errors, hits, "Output must be a JSON object")
+        return errors, warnings
+
+    results = None
+    for key in stream.members():
+        if key != "files":
+            stream.skip_value()
+            continue
+        if stream.peek() != "{":
+            stream.skip_value()
+            structure_error(errors, hits, "'files' must be an object")
+            return errors, warnings
+        results = {}  # a repeated "files" key replaces the earlier one, as with json.load
+        for path in stream.members():
+            target = next((t for t, p in TARGET_PATHS.items() if p == path), None)
+            if target is None:
+                stream.skip_value()
+            elif stream.peek() != '"':
+                stream.skip_value()
+                results[path] = {"errors": [f"{path} must be a string"], "warnings": [], "hits": [STRUCTURE_HIT]}
+            else:
+                results[path] = {"hits": []}
+                results[path].update(streamed_file(stream, target, timings, results[path]["hits"]))
+    stream.end()
+
+    if results is None:
+        structure_error(errors, hits, "Output must have 'files' key")
+        return errors, warnings
+
+    if "src/App.jsx" not in results:
+        structure_error(errors, hits, "Missing required file: src/App.jsx")
+
+    for path in TARGET_PATHS.values():
+        if path in results:
+            result = results[path]
+            errors.extend(result["errors"])
+            warnings.extend(result["warnings"])
+            if hits is not None:
+                hits.extend(result["hits"])
+            warnings.extend(f"{path}: {skip['rule']} {skip['reason']}" for skip in result.get("skipped", []))
 
     return errors, warnings
 
 
+def check_batch_item(path, line):
+    """--batch check of one output file (streamed) or NDJSON line ({"id": ..., "output": {...}} or the output)."""
+    hits = []
+    item = {}
+    if path is not None:
+        with open(path, "r", encoding="utf-8") as f:
+            errors, warnings = validate_stream(f, hits=hits)
+    else:
+        item_id, output = batch.read_record(line, ("output",))
+        if item_id is not None:
+            item["id"] = item_id
+        errors, warnings = validate_output(output, hits=hits)
+    return {**item, "errors": errors, "warnings": warnings, "rules": hits}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Validate dashboard generator JSON output for common errors.")
+    parser.add_argument("file", nargs="?", help="Generator output (JSON) to validate, or - for stdin")
+    parser.add_argument("--profile", action="store_true", help="Print ms per rule")
+    batch.add_arguments(parser)
+    return parser.parse_args(argv)
+
+
 def main():
-    # Read input
-    if len(sys.argv) < 2:
-        print("Usage: python validate_output.py <output.json>")
-        print("   or: echo '{...}' | python validate_output.py -")
+    args = parse_args()
+    if args.batch:
+        batch.main(args, (".json",), check_batch_item, RULESET_VERSION)
+        sys.exit(0)
+    if not args.file:
+        print("Usage: python validate_output.py [--profile] <output.json>")
+        print("   or: echo '{...}' | python validate_output.py [--profile] -")
+        print("   or: python validate_output.py --batch <dir | glob | file.ndjson | -> [--workers N]")
         sys.exit(1)
 
+    timings = {} if args.profile else None
     try:
-        if sys.argv[1] == "-":
-            output = json.load(sys.stdin)
+        if args.file == "-":
+            errors, warnings = validate_stream(sys.stdin, timings=timings)
         else:
-            with open(sys.argv[1], "r", encoding="utf-8") as f:
-                output = json.load(f)
+            with open(args.file, "r", encoding="utf-8") as f:
+                errors, warnings = validate_stream(f, timings=timings)
     except FileNotFoundError:
-        print(f"Error: File {sys.argv[1]} not found")
+        print(f"Error: File {args.file} not found")
         sys.exit(1)
-    except json.JSONDecodeError as e:
+    except ValueError as e:
         print(f"Error: Invalid JSON — {e}")
         sys.exit(1)
 
-    errors, warnings = validate_output(output)
-
     if errors:
         print("ERRORS:")
         for err in errors:
@@ -158,6 +356,11 @@ def main():
     if not errors and not warnings:
         print("OK — validation passed, no errors or warnings")
 
+    if args.profile:
+        print("TIMINGS (ms):")
+        for rule_id, ms in sorted(timings.items(), key=lambda item: -item[1]):
+            print(f"  {rule_id}: {ms:.3f}")
+
     sys.exit(1 if errors else 0)
 
 
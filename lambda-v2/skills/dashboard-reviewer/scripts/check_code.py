@@ -4,287 +4,138 @@ Static quality checks for React dashboard code (App.jsx).
 
 Usage: python check_code.py <file.jsx>
    or: echo '<code>' | python check_code.py -
-
-Returns JSON with errors, warnings, passed/failed counts.
+   or: python check_code.py --profile <file.jsx>   (adds "timings": ms per rule id, plus "(lex)")
+   --check-budget-ms / --file-budget-ms override the time budgets
+   --cache /tmp/check_code_cache.json   re-review: reuse the previous run saved there
+   or: python check_code.py --batch archive/ [--batch 'more/*.jsx' | outputs.ndjson | -]
+                            [--workers N] [--previous report.json] [--report report.json]
+       (one NDJSON result line per App.jsx, then a summary line — see batch.py; a .json
+       item or NDJSON record is a generator output, whose src/App.jsx is checked)
+
+Returns JSON with errors, warnings, performance, passed/failed counts, and "skipped"
+(rules reported as "skipped: budget exceeded") when a budget ran out.
+
+"performance" lists render-cost findings (perf-* rules), each with its estimated cost
+class in brackets (n: DATA rows): scans of DATA in the render body outside useMemo
+[O(n)/O(n log n)], scans nested in an iteration callback [O(n*m)/O(n^2)], charts bound
+to the raw DATA rows, large inline literals. They do not fail the check and are not
+counted in passed/failed.
+
+The checks themselves live in app_rules.py (shared with validate_output.py):
+the code is lexed once into facts and every rule is a query over those facts,
+so matches inside comments or unrelated identifiers (e.g. `e.target`) do not count.
+
+With --cache, a fix iteration only lexes the lines that changed since the previous
+run and only re-evaluates rules reading facts that changed; the output is the same
+as a full run.
 """
 
+import argparse
 import json
-import re
 import sys
 
+import batch
+from app_rules import CHECK_BUDGET_MS, FILE_BUDGET_MS, RULESET_VERSION, TARGET_PATHS, run_rules
 
-def check_code(code):
-    errors = []
-    warnings = []
-    checks_passed = 0
-    checks_failed = 0
-
-    def check(condition, message, is_error=True):
-        nonlocal checks_passed, checks_failed
-        if condition:
-            checks_passed += 1
-        else:
-            checks_failed += 1
-            if is_error:
-                errors.append(message)
-            else:
-                warnings.append(message)
-
-    # 1. React import
-    check(
-        "import React" in code or "import {" in code,
-        "Missing React import",
-        is_error=False,
-    )
-
-    # 2. Recharts imports when charts are used
-    chart_components = ["PieChart", "BarChart", "AreaChart", "LineChart", "RadarChart"]
-    has_charts = any(comp in code for comp in chart_components)
-
-    if has_charts:
-        check(
-            "from 'recharts'" in code or 'from "recharts"' in code,
-            "Charts used but no recharts import",
-        )
-
-        # 3. ResponsiveContainer
-        check(
-            "ResponsiveContainer" in code,
-            "Charts used without ResponsiveContainer import",
-            is_error=False,
-        )
-
-        # 4. COLORS array
-        check(
-            "COLORS" in code,
-            "Charts used but COLORS array not defined",
-            is_error=False,
-        )
-
-    # 5. PieChart with Cell + Legend
-    if "PieChart" in code and "<Pie" in code:
-        check(
-            "<Cell" in code,
-            "PieChart without <Cell> — all slices will be grey!",
-        )
-        check(
-            "<Legend" in code,
-            "PieChart without <Legend> — users cannot identify what each slice represents!",
-        )
-
-    # 6. Formatting functions
-    has_numbers = re.search(r"\.toFixed\(|\.toLocaleString\(|Number\(", code)
-    if has_numbers:
-        check(
-            re.search(r"\bfmt\b|\bfmtCur\b|\bfmtPct\b", code) is not None,
-            "Number formatting detected but no fmt/fmtCur/fmtPct helper defined",
-            is_error=False,
-        )
-
-    # 7. No emojis
-    emoji_pattern = re.compile(
-        r"[\U0001F600-\U0001F64F\U0001F300-\U0001F5FF"
-        r"\U0001F680-\U0001F6FF\U0001F1E0-\U0001F1FF"
-        r"\u2600-\u26FF\u2700-\u27BF]"
-    )
-    check(
-        not emoji_pattern.search(code),
-        "Code contains emojis — forbidden in dashboard output",
-    )
-
-    # 8. No ds.css import (already in main.jsx)
-    check(
-        not re.search(r"""import\s+['"].*ds\.css['"]""", code),
-        "App.jsx imports ds.css — forbidden (already in main.jsx)",
-    )
-
-    # 9. SVG gradient ID uniqueness
-    gradient_ids = re.findall(r'id=["\']([^"\']+Grad[^"\']*)["\']', code)
-    if gradient_ids:
-        check(
-            len(gradient_ids) == len(set(gradient_ids)),
-            f"Duplicate SVG gradient IDs: {[x for x in gradient_ids if gradient_ids.count(x) > 1]}",
-        )
-
-    # 10. Insight/Key Takeaways section
-    check(
-        "insight-item" in code or "insight-bar" in code or "key-takeaway" in code or "Points cl" in code,
-        "Missing 'Points cles' / insights section — OBLIGATOIRE en bas de Vue d'Ensemble",
-    )
-
-    # 11. Filter select styling
-    has_filters = "<select" in code
-    if has_filters:
-        check(
-            "background" in code and "#1A2332" in code,
-            "Filter <select> missing required dark background styling (background:'#1A2332')",
-        )
-
-    # 12. No raw IDs as chart axes
-    id_datakeys = re.findall(
-        r'dataKey=["\'](\w*(?:_id|Id|_ID|ID)\w*)["\']', code
-    )
-    check(
-        len(id_datakeys) == 0,
-        f"Raw ID columns used as chart dataKey: {id_datakeys} — use names/categories instead",
-    )
-
-    # 13. Content-area wrapper
-    check(
-        "content-area" in code,
-        "Missing 'content-area' wrapper class — required for proper layout",
-        is_error=False,
-    )
-
-    # 14. Drawer/hamburger pattern
-    check(
-        "drawer" in code.lower() or "hamburger" in code.lower() or "menuOpen" in code,
-        "Missing drawer/hamburger menu pattern",
-        is_error=False,
-    )
-
-    # 15. Fabrication keywords — PROMOTED TO ERROR
-    fabrication_keywords = [
-        "Precedent", "Previous", "Objectif", "Target",
-        "Last Year", "Annee derniere", "Budget",
-    ]
-    found_fabrication = []
-    for kw in fabrication_keywords:
-        if re.search(kw, code, re.IGNORECASE):
-            found_fabrication.append(kw)
-    if found_fabrication:
-        errors.append(
-            f"Fabrication keywords detected: {found_fabrication} — these comparisons require data columns that likely don't exist. Remove or compute from real data."
-        )
-
-    # 16. Hardcoded numbers in insight/takeaway strings
-    # Detect: text: "Le CA est de 1.5M EUR" or text: "augmentation de 15.3%"
-    insight_hardcoded = re.findall(
-        r"""(?:text|insight|takeaway)\s*[:=]\s*["'][^"']*\d+[.,]?\d*\s*(?:%|EUR|K|M|\u20ac|\$)[^"']*["']""",
-        code,
-    )
-    if insight_hardcoded:
-        check(
-            False,
-            f"Hardcoded numbers in insights/takeaways: {insight_hardcoded[:3]} — insights must use template literals with computed values (useMemo + backticks)",
-        )
-    else:
-        checks_passed += 1
-
-    # 17. Static takeaways array (not using useMemo)
-    has_takeaways = re.search(r"(?:takeaways|insights)\s*=\s*\[", code)
-    has_takeaways_memo = re.search(r"(?:takeaways|insights)\s*=\s*useMemo\s*\(", code)
-    if has_takeaways and ("insight-item" in code or "insight-bar" in code):
-        check(
-            has_takeaways_memo is not None,
-            "takeaways/insights array is statically defined — must use useMemo(() => { ...compute... }, []) with template literals",
-        )
 
-    # 18. Hardcoded percentages in badge-up/badge-down context
-    badge_hardcoded = re.findall(
-        r"""badge-(?:up|down)[^>]*>\s*[+-]?\d+[.,]?\d*\s*%""",
-        code,
-    )
-    check(
-        len(badge_hardcoded) == 0,
-        f"Hardcoded percentages in badges: {badge_hardcoded[:3]} — variation badges must display computed values",
-    )
+def check_code(code, timings=None, check_budget_ms=CHECK_BUDGET_MS, file_budget_ms=FILE_BUDGET_MS, cache=None,
+               hits=None):
+    """Run every "review" rule over App.jsx (see app_rules.RULES). `timings` collects ms per rule.
 
-    # 19. Hardcoded large numbers in kpi-value spans
-    # Detect: className="kpi-value">1,523,456 or kpi-value">{1523456}
-    kpi_hardcoded = re.findall(
-        r"""kpi-value[^>]*>\s*\{?\s*["']?[\d,]{4,}\.?\d*["']?\s*\}?\s*<""",
-        code,
-    )
-    check(
-        len(kpi_hardcoded) == 0,
-        f"Hardcoded numbers in KPI values: {len(kpi_hardcoded)} instances — KPI values must be computed expressions (e.g., {{fmtCur(total)}})",
+    `cache` (a dict) carries the previous run between fix iterations — see app_rules.run_rules.
+    `hits` collects the ids of the failing rules.
+    """
+    return run_rules(
+        code, target="app", scope="review", timings=timings,
+        check_budget_ms=check_budget_ms, file_budget_ms=file_budget_ms, cache=cache, hits=hits,
     )
 
-    # 20. BarChart/AreaChart/LineChart without child data elements
-    for chart_type, child_tag in [("BarChart", "<Bar "), ("AreaChart", "<Area "), ("LineChart", "<Line ")]:
-        if f"<{chart_type}" in code and f"</{chart_type}>" in code:
-            check(
-                child_tag in code,
-                f"{chart_type} without {child_tag.strip()} child — chart will render empty!",
-            )
 
-    # 21. YAxis without tickFormatter
-    if "<YAxis" in code:
-        yaxis_count = code.count("<YAxis")
-        yaxis_with_formatter = len(re.findall(r"<YAxis[^>]*tickFormatter", code))
-        check(
-            yaxis_with_formatter >= yaxis_count,
-            f"{yaxis_count - yaxis_with_formatter} YAxis element(s) missing tickFormatter — numbers won't be formatted",
-            is_error=False,
-        )
+def app_code(value):
+    """App.jsx code of a --batch item: the code itself, or a generator output holding it."""
+    if isinstance(value, dict) and isinstance(value.get("files"), dict):
+        value = value["files"].get(TARGET_PATHS["app"])
+    if not isinstance(value, str):
+        raise ValueError(f"No {TARGET_PATHS['app']} code in item")
+    return value
 
-    # 22. Missing fmt/fmtCur/fmtPct function definitions when used
-    uses_fmt = re.search(r"\bfmt\(|\bfmtCur\(|\bfmtPct\(", code)
-    defines_fmt = re.search(r"(?:const|function|let)\s+fmt\b", code)
-    if uses_fmt:
-        check(
-            defines_fmt is not None,
-            "Code calls fmt/fmtCur/fmtPct but no formatting function is defined — will crash at runtime",
-        )
 
-    # 23. Raw ID columns in table headers
-    table_id_headers = re.findall(
-        r"""(?:th[^>]*>|table-header[^>]*>)\s*["']?(\w*(?:_id|_ID|Id)\w*)["']?""", code
-    )
-    if table_id_headers:
-        check(
-            False,
-            f"Raw ID columns in table headers: {table_id_headers[:3]} — use descriptive names instead",
-            is_error=False,
-        )
+def check_batch_item(path, line):
+    """--batch check of one file (App.jsx, or a generator output if .json) or NDJSON line
+    ({"id": ..., "code": "..."}, {"id": ..., "output": {...}} or a generator output)."""
+    item = {}
+    if path is not None:
+        with open(path, "r", encoding="utf-8") as f:
+            code = app_code(json.load(f)) if path.endswith(".json") else f.read()
     else:
-        checks_passed += 1
-
-    # 24. Recharts components used but not imported
-    recharts_used = set(re.findall(
-        r"<(BarChart|PieChart|AreaChart|LineChart|ResponsiveContainer|Tooltip|XAxis|YAxis|CartesianGrid|Bar|Pie|Area|Line|Cell|Legend)\b",
-        code,
-    ))
-    if recharts_used:
-        import_match = re.search(r"import\s*\{([^}]+)\}\s*from\s*['\"]recharts['\"]", code)
-        if import_match:
-            imported = {s.strip() for s in import_match.group(1).split(",")}
-            missing = recharts_used - imported
-            if missing:
-                check(
-                    False,
-                    f"Recharts components used but not imported: {', '.join(sorted(missing))}",
-                )
-            else:
-                checks_passed += 1
-        # else: already caught by check #2
-
-    return {
-        "errors": errors,
-        "warnings": warnings,
-        "passed": checks_passed,
-        "failed": checks_failed,
-    }
+        item_id, value = batch.read_record(line, ("code", "output"))
+        if item_id is not None:
+            item["id"] = item_id
+        code = app_code(value)
+    hits = []
+    result = check_code(code, hits=hits)
+    return {**item, "errors": result["errors"], "warnings": result["warnings"], "performance": result["performance"],
+            "rules": hits}
+
+
+def load_cache(path):
+    """Previous run saved with --cache, or {} if there is none (or it cannot be read)."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Static quality checks for React dashboard code (App.jsx).")
+    parser.add_argument("file", nargs="?", help="App.jsx to check, or - for stdin")
+    parser.add_argument("--profile", action="store_true", help="Add ms per rule to the output")
+    parser.add_argument("--check-budget-ms", type=float, default=CHECK_BUDGET_MS,
+                        help=f"Time budget per rule (default: {CHECK_BUDGET_MS})")
+    parser.add_argument("--file-budget-ms", type=float, default=FILE_BUDGET_MS,
+                        help=f"Time budget for the whole file (default: {FILE_BUDGET_MS})")
+    parser.add_argument("--cache", default=None, metavar="PATH",
+                        help="JSON file holding the previous run; re-checks only what changed, then updates it")
+    batch.add_arguments(parser)
+    return parser.parse_args(argv)
 
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python check_code.py <file.jsx>")
-        print("   or: echo '<code>' | python check_code.py -")
+    args = parse_args()
+    if args.batch:
+        batch.main(args, (".jsx", ".json"), check_batch_item, RULESET_VERSION)
+        sys.exit(0)
+    if not args.file:
+        print("Usage: python check_code.py [--profile] [--cache PATH] <file.jsx>")
+        print("   or: echo '<code>' | python check_code.py [--profile] [--cache PATH] -")
+        print("   or: python check_code.py --batch <dir | glob | file.ndjson | -> [--workers N]")
         sys.exit(1)
 
     try:
-        if sys.argv[1] == "-":
+        if args.file == "-":
             code = sys.stdin.read()
         else:
-            with open(sys.argv[1], "r", encoding="utf-8") as f:
+            with open(args.file, "r", encoding="utf-8") as f:
                 code = f.read()
     except FileNotFoundError:
-        print(json.dumps({"errors": [f"File {sys.argv[1]} not found"], "warnings": [], "passed": 0, "failed": 1}))
+        print(json.dumps({"errors": [f"File {args.file} not found"], "warnings": [], "performance": [], "passed": 0,
+                          "failed": 1}))
         sys.exit(1)
 
-    result = check_code(code)
+    timings = {} if args.profile else None
+    cache = load_cache(args.cache) if args.cache else None
+    result = check_code(
+        code, timings=timings, check_budget_ms=args.check_budget_ms, file_budget_ms=args.file_budget_ms,
+        cache=cache,
+    )
+    if args.cache:
+        # json.dumps (unlike json.dump) runs the C encoder
+        with open(args.cache, "w", encoding="utf-8") as f:
+            f.write(json.dumps(cache))
+    if args.profile:
+        result["timings"] = {rule_id: round(ms, 3) for rule_id, ms in timings.items()}
     print(json.dumps(result, indent=2))
     sys.exit(1 if result["errors"] else 0)
 
@@ -0,0 +1,255 @@
+"""
+analyze_bundle.py — Run the four-script analysis on several named datasets in one process.
+
+Reads: /tmp/bundle.json (object: dataset name -> array of objects, e.g. one per Excel sheet),
+       or --input book.xlsx: one dataset per sheet, read directly (see load_data.py)
+Writes: /tmp/analyze_bundle_result.json
+
+Each dataset goes through analyze_columns -> detect_periods -> compute_stats -> suggest_charts
+and check_quality, imported once and run on a process pool (--workers), instead of cold
+interpreter starts per script and dataset. The result is keyed by dataset name, plus a cross-dataset summary:
+- sharedColumns: column names present in several datasets (with their type in each)
+- joinKeyCandidates: column pairs of two datasets whose distinct values overlap, found by
+  intersecting sorted 64-bit hashes of each column's normalized values
+
+Usage: python analyze_bundle.py [--input PATH] [--sheet NAME|N ...] [--header-row N] [--max-rows N]
+                                [--workers N] [--profile full|chart-recs-only|kpis] [--render-budget 1000]
+                                [--compact] [--cap KEY=N ...]   (see output.py)
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import warnings
+import pandas as pd
+import numpy as np
+
+import load_data
+import output
+from analyze_columns import analyze
+from check_quality import check
+from compute_stats import PROFILES, compute
+from detect_periods import detect
+from suggest_charts import RENDER_BUDGET, suggest
+
+INPUT_PATH = "/tmp/bundle.json"
+OUTPUT_PATH = "/tmp/analyze_bundle_result.json"
+
+# Column types whose values can identify rows of another dataset
+KEY_TYPES = ("categorical", "text", "date", "numeric")
+# Integer columns that are neither unique nor named like an id are likely metrics (counts,
+# quantities): they never match each other, and match another column only when they also
+# cover most of it (MIN_METRIC_JACCARD)
+ID_PATTERNS = re.compile(r'(id$|^id|\bid\b|code|ref|num|matricule|identifiant|siret|siren|_no$|key|cle)', re.IGNORECASE)
+# Share of the smaller value set found in the other column for a join-key candidate
+MIN_CONTAINMENT = 0.8
+MIN_METRIC_JACCARD = 0.5
+MIN_DISTINCT_VALUES = 2
+MAX_JOIN_CANDIDATES = 20
+
+
+# Copy of available_cores() in lambda-v2/shared/batch.py (this skill is uploaded without it):
+# keep in sync
+def available_cores():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # macOS / Windows
+        return os.cpu_count() or 1
+
+
+def value_hashes(series):
+    """Sorted distinct 64-bit hashes of a column's normalized values, or None if it cannot be a key.
+
+    Values are compared as trimmed lowercase text; integer-valued numbers as integers, so the
+    id 12 matches "12" in another sheet. Non-integer numbers (metrics) are not keys.
+    """
+    non_null = series.dropna()
+    if len(non_null) == 0:
+        return None
+    if pd.api.types.is_bool_dtype(non_null):
+        return None
+    if pd.api.types.is_numeric_dtype(non_null):
+        values = non_null.to_numpy(dtype=float)
+        if not np.all(np.mod(values, 1) == 0):
+            return None
+        text = pd.Series(values.astype(np.int64)).astype(str)
+    else:
+        text = non_null.astype(str).str.strip().str.lower()
+    return np.unique(pd.util.hash_pandas_object(text, index=False).to_numpy())
+
+
+def analyze_dataset(name, data, profile, render_budget):
+    """(name, analysis, {column: (value hashes, metric-like)}) for one dataset — the four scripts' results."""
+    start = time.perf_counter()
+    try:
+        if not isinstance(data, (list, pd.DataFrame)):
+            raise ValueError("expected an array of objects")
+        with warnings.catch_warnings():
+            # pandas' "Could not infer format" while probing for dates — once per dataset otherwise
+            warnings.simplefilter("ignore", UserWarning)
+            columns_info = analyze(data)
+        periods_info = detect(data, columns_info)
+        stats_info = compute(data, columns_info, periods_info, profile=profile)
+        analysis = {
+            "columns": columns_info,
+            "periods": periods_info,
+            "stats": stats_info,
+            "chartRecommendations": suggest(columns_info, periods_info, stats_info, render_budget=render_budget),
+            "quality": check(data, columns_info),
+        }
+        df = pd.DataFrame(data)
+        hashes = {}
+        for col_info in columns_info:
+            if col_info["type"] in KEY_TYPES and col_info["name"] in df.columns:
+                column_hashes = value_hashes(df[col_info["name"]])
+                if column_hashes is not None and len(column_hashes) >= MIN_DISTINCT_VALUES:
+                    metric_like = (col_info["type"] == "numeric" and not is_unique(col_info)
+                                   and not ID_PATTERNS.search(col_info["name"]))
+                    hashes[col_info["name"]] = (column_hashes, metric_like)
+    except Exception as e:  # one malformed dataset must not abort the whole bundle
+        analysis, hashes = {"error": f"{type(e).__name__}: {e}"}, {}
+    analysis["elapsedMs"] = round((time.perf_counter() - start) * 1000, 1)
+    return name, analysis, hashes
+
+
+def analyze_datasets(bundle, workers, profile, render_budget):
+    """analyze_dataset() results, in bundle order; on a process pool when there are several workers."""
+    jobs = [(name, data, profile, render_budget) for name, data in bundle.items()]
+    workers = min(workers, len(jobs))
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        try:
+            pool = ProcessPoolExecutor(max_workers=workers)
+        except (OSError, NotImplementedError):
+            pool = None  # no process support (e.g. no /dev/shm): analyze serially
+        if pool is not None:
+            with pool:
+                return list(pool.map(analyze_dataset, *zip(*jobs)))
+    return [analyze_dataset(*job) for job in jobs]
+
+
+def overlap_count(left, right):
+    """Number of hashes two sorted distinct hash arrays have in common."""
+    if len(left) > len(right):
+        left, right = right, left
+    positions = np.searchsorted(right, left)
+    positions[positions == len(right)] = 0
+    return int(np.count_nonzero(right[positions] == left))
+
+
+def is_unique(col_info):
+    """Whether a column holds one row per value (as many distinct values as non-null rows)."""
+    return col_info["uniqueCount"] == col_info["totalCount"] - col_info["nullCount"]
+
+
+def relation(left_unique, right_unique):
+    if left_unique and right_unique:
+        return "one-to-one"
+    if left_unique or right_unique:
+        return "one-to-many"
+    return "many-to-many"
+
+
+def summarize(results):
+    """Cross-dataset summary: shared column names and join-key candidates."""
+    analyses = {name: analysis for name, analysis, _ in results}
+    column_types = {}
+    for name, analysis in analyses.items():
+        for col_info in analysis.get("columns", []):
+            column_types.setdefault(col_info["name"], {})[name] = col_info["type"]
+    shared = [
+        {"column": column, "datasets": list(types), "types": types}
+        for column, types in column_types.items() if len(types) > 1
+    ]
+
+    unique = {
+        (name, col_info["name"]): is_unique(col_info)
+        for name, analysis in analyses.items() for col_info in analysis.get("columns", [])
+    }
+    keyed = [(name, column, *entry) for name, _, hashes in results for column, entry in hashes.items()]
+    candidates = []
+    for i, (left_name, left_column, left, left_metric) in enumerate(keyed):
+        for right_name, right_column, right, right_metric in keyed[i + 1:]:
+            if right_name == left_name or (left_metric and right_metric):
+                continue
+            common = overlap_count(left, right)
+            containment = common / min(len(left), len(right))
+            jaccard = common / (len(left) + len(right) - common)
+            if (common < MIN_DISTINCT_VALUES or containment < MIN_CONTAINMENT
+                    or ((left_metric or right_metric) and jaccard < MIN_METRIC_JACCARD)):
+                continue
+            left_unique, right_unique = unique[(left_name, left_column)], unique[(right_name, right_column)]
+            candidates.append({
+                "left": {"dataset": left_name, "column": left_column, "distinctValues": len(left)},
+                "right": {"dataset": right_name, "column": right_column, "distinctValues": len(right)},
+                "commonValues": common,
+                "containment": round(containment, 3),
+                "jaccard": round(jaccard, 3),
+                "relation": relation(left_unique, right_unique),
+            })
+    # Keys first (a unique side), then the best overlap
+    candidates.sort(key=lambda c: (c["relation"] == "many-to-many", -c["containment"], -c["jaccard"], -c["commonValues"]))
+    return {
+        "datasetCount": len(analyses),
+        "failed": [name for name, analysis in analyses.items() if "error" in analysis],
+        "sharedColumns": shared,
+        "joinKeyCandidates": candidates[:MAX_JOIN_CANDIDATES],
+    }
+
+
+def analyze_bundle(bundle, workers=1, profile="full", render_budget=RENDER_BUDGET):
+    """Analysis of every dataset of `bundle` ({name: rows}), keyed by name, plus the summary."""
+    start = time.perf_counter()
+    results = analyze_datasets(bundle, workers, profile, render_budget)
+    summary = summarize(results)
+    summary["elapsedMs"] = round((time.perf_counter() - start) * 1000, 1)
+    return {"datasets": {name: analysis for name, analysis, _ in results}, "summary": summary}
+
+
+def read_bundle(path, sheets=None, header_row=None, max_rows=None):
+    """{name: rows or frame}: the JSON bundle, every sheet of a workbook, or a CSV file as one dataset."""
+    fmt = load_data.source_format(path)
+    if fmt == "xlsx":
+        return load_data.read_workbook(path, sheets, header_row, max_rows)
+    if fmt == "csv":
+        name = os.path.splitext(os.path.basename(path))[0]
+        return {name: load_data.read_csv(path, header_row, max_rows)[0]}
+    with open(path, 'r', encoding='utf-8') as f:
+        bundle = json.load(f)
+    if isinstance(bundle, dict) and max_rows is not None:
+        bundle = {name: data[:max_rows] if isinstance(data, list) else data for name, data in bundle.items()}
+    return bundle
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze several named datasets (e.g. Excel sheets) in one process.")
+    parser.add_argument("--workers", type=int, default=available_cores(),
+                        help="Processes analyzing datasets in parallel (default: available cores)")
+    parser.add_argument("--profile", default="full", choices=sorted(PROFILES),
+                        help="Named set of stats to compute per dataset (default: full)")
+    parser.add_argument("--render-budget", type=int, default=RENDER_BUDGET,
+                        help=f"Max SVG elements per chart before aggregating (default: {RENDER_BUDGET})")
+    load_data.add_arguments(parser, default=INPUT_PATH, several_sheets=True)
+    output.add_arguments(parser)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    try:
+        bundle = read_bundle(args.input, args.sheet, args.header_row, args.max_rows)
+    except (OSError, ValueError) as e:
+        print(json.dumps({"error": str(e)}))
+        sys.exit(1)
+
+    if not isinstance(bundle, dict):
+        print(json.dumps({"error": f"{args.input} must be an object: dataset name -> array of objects"}))
+        sys.exit(1)
+
+    result = analyze_bundle(bundle, workers=args.workers, profile=args.profile, render_budget=args.render_budget)
+
+    output.write_result(result, OUTPUT_PATH, args)
@@ -1,19 +1,23 @@
 """
 analyze_columns.py — Detect column types, unique values, nulls, and samples.
 
-Reads: /tmp/data.json (array of objects)
+Reads: /tmp/data.json (array of objects), or --input an .xlsx/.csv file (see load_data.py)
 Writes: /tmp/analyze_columns_result.json
 
 Column types: numeric, categorical, date, currency, percentage, text
+
+Usage: python analyze_columns.py [--input PATH ...] [--compact] [--cap KEY=N ...]   (see output.py)
 """
 
-import json
+import argparse
 import sys
 import re
 import pandas as pd
 import numpy as np
 
-INPUT_PATH = "/tmp/data.json"
+import load_data
+import output
+
 OUTPUT_PATH = "/tmp/analyze_columns_result.json"
 
 CURRENCY_PATTERNS = re.compile(r'(eur|usd|\$|€|£|revenue|chiffre|ca_|montant|prix|cost|cout|budget|salaire|depense|recette)', re.IGNORECASE)
@@ -120,13 +124,18 @@ def analyze(data):
     return columns
 
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Detect column types, unique values, nulls, and samples.")
+    load_data.add_arguments(parser)
+    output.add_arguments(parser)
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
-    with open(INPUT_PATH, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    args = parse_args()
 
-    result = analyze(data)
+    data = load_data.read_input(args)
 
-    with open(OUTPUT_PATH, 'w', encoding='utf-8') as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
+    result = analyze(data)
 
-    print(json.dumps(result, ensure_ascii=False, indent=2))
+    output.write_result(result, OUTPUT_PATH, args)
@@ -0,0 +1,209 @@
+"""
+check_quality.py — Find duplicate rows, constant columns and key candidates.
+
+Reads: /tmp/data.json (or --input .xlsx/.csv, see load_data.py) + /tmp/analyze_columns_result.json
+Writes: /tmp/check_quality_result.json
+
+Every column is hashed once (64-bit, pandas' hash_pandas_object); the same hashes give
+- duplicateRows: rows equal to an earlier row (row hash = combination of the column hashes,
+  then checked value by value, so a hash collision is never reported), grouped with the
+  row they repeat. Rows are 0-based positions in the data.
+- constantColumns / nearConstantColumns: a single non-null value, or one value holding at
+  least NEAR_CONSTANT_SHARE of the non-null rows; emptyColumns have no value at all
+- keyCandidates: columns, then pairs of columns (combined hashes), with one distinct value
+  per row and no nulls, once duplicate rows are set aside. Only categorical, text, date and
+  integer-valued numeric columns can be keys (not currency, percentages or other metrics);
+  a pair is only tried when its columns can have enough combinations and neither is a key
+  alone.
+
+Every step is a linear pass over the hashes (factorize), plus one per column pair tried.
+
+Usage: python check_quality.py [--input PATH ...] [--compact] [--cap KEY=N ...]   (see output.py)
+"""
+
+import argparse
+import json
+import pandas as pd
+import numpy as np
+
+import load_data
+import output
+
+COLUMNS_PATH = "/tmp/analyze_columns_result.json"
+OUTPUT_PATH = "/tmp/check_quality_result.json"
+
+# Column types whose values can identify rows (as in analyze_bundle.py)
+KEY_TYPES = ("categorical", "text", "date", "numeric")
+
+NEAR_CONSTANT_SHARE = 0.95
+MAX_DUPLICATE_GROUPS = 20
+MAX_GROUP_ROWS = 10
+# Pairs are tried among the key-like columns with the most distinct values
+MAX_PAIR_COLUMNS = 30
+MAX_COMPOSITE_KEYS = 10
+HASH_MULTIPLIER = np.uint64(0x100000001B3)
+
+
+def column_hashes(series):
+    """64-bit hash of every cell of a column: equal values hash alike, nulls too."""
+    try:
+        return pd.util.hash_pandas_object(series, index=False).to_numpy()
+    except TypeError:  # unhashable cells (nested arrays/objects): hashed as text
+        return pd.util.hash_pandas_object(series.astype(str), index=False).to_numpy()
+
+
+def combine_hashes(left, right):
+    """Order-dependent combination of two hash arrays (uint64 arithmetic wraps around)."""
+    return (left * HASH_MULTIPLIER) ^ right
+
+
+def first_occurrences(keys):
+    """(codes, first): factorize codes of `keys`, and the first row of each code."""
+    codes, _ = pd.factorize(keys)
+    # Codes are numbered in order of first appearance: a row starts a code when it exceeds
+    # every code before it
+    seen = np.maximum.accumulate(codes)
+    is_first = np.empty(len(codes), dtype=bool)
+    is_first[:1] = True
+    is_first[1:] = codes[1:] > seen[:-1]
+    return codes, np.flatnonzero(is_first)
+
+
+def same_values(series, rows, others):
+    """Whether series[rows[i]] equals series[others[i]] (nulls equal each other), for every i."""
+    left = series.iloc[rows].reset_index(drop=True)
+    right = series.iloc[others].reset_index(drop=True)
+    try:
+        equal = (left == right).to_numpy(dtype=bool)
+    except (TypeError, ValueError):
+        equal = (left.astype(str) == right.astype(str)).to_numpy(dtype=bool)
+    return equal | (left.isna() & right.isna()).to_numpy()
+
+
+def find_duplicates(df, hashes):
+    """Sorted positions of the rows repeating an earlier row, and the row each one repeats."""
+    row_count = len(df)
+    if row_count == 0 or not hashes:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    names = list(hashes)
+    row_hashes = hashes[names[0]]
+    for name in names[1:]:
+        row_hashes = combine_hashes(row_hashes, hashes[name])
+    codes, first = first_occurrences(row_hashes)
+    rows = np.setdiff1d(np.arange(row_count), first, assume_unique=True)
+    originals = first[codes[rows]]
+    confirmed = np.ones(len(rows), dtype=bool)
+    for name in names:
+        if not confirmed.any():
+            break
+        confirmed &= same_values(df[name], rows, originals)
+    return rows[confirmed], originals[confirmed]
+
+
+def duplicate_report(rows, originals):
+    """duplicateRows: count, and the largest groups (original row first)."""
+    groups = {}
+    for row, original in zip(rows.tolist(), originals.tolist()):
+        groups.setdefault(original, [original]).append(row)
+    ordered = sorted(groups.values(), key=lambda group: (-len(group), group[0]))
+    return {
+        "count": len(rows),
+        "groupCount": len(groups),
+        "groups": [{"rows": group[:MAX_GROUP_ROWS], "count": len(group)} for group in ordered[:MAX_DUPLICATE_GROUPS]],
+    }
+
+
+def is_key_like(series, col_type):
+    """Whether a column's values can identify rows: a KEY_TYPES column, not booleans nor non-integer numbers."""
+    if col_type not in KEY_TYPES or pd.api.types.is_bool_dtype(series):
+        return False
+    if pd.api.types.is_float_dtype(series):
+        values = series.dropna().to_numpy(dtype=float)
+        return bool(np.all(np.mod(values, 1) == 0))
+    return True
+
+
+def check(data, columns_info):
+    """Duplicate rows, constant/near-constant/empty columns and key candidates of `data`."""
+    df = pd.DataFrame(data)
+    types = {c["name"]: c["type"] for c in columns_info}
+    row_count = len(df)
+    hashes = {name: column_hashes(df[name]) for name in df.columns}
+
+    rows, originals = find_duplicates(df, hashes)
+    kept = np.ones(row_count, dtype=bool)
+    kept[rows] = False
+    distinct_rows = row_count - len(rows)
+
+    constant, near_constant, empty = [], [], []
+    keys, pair_columns = [], []
+    for name in df.columns:
+        series = df[name]
+        nulls = series.isna().to_numpy()
+        null_count = int(nulls.sum())
+        non_null = hashes[name][~nulls]
+        if len(non_null) == 0:
+            empty.append(name)
+            continue
+        codes, first = first_occurrences(non_null)
+        counts = np.bincount(codes)
+        top = int(counts.argmax())
+        value = series[~nulls].iloc[first[top]]
+        if isinstance(value, np.generic):
+            value = value.item()
+        distinct = len(first)
+        if distinct == 1:
+            constant.append({"column": name, "value": value, "nullCount": null_count})
+        elif counts[top] >= NEAR_CONSTANT_SHARE * len(non_null):
+            near_constant.append({"column": name, "value": value,
+                                  "share": round(float(counts[top]) / len(non_null), 3), "nullCount": null_count})
+
+        # Duplicate rows repeat existing values: the distinct count is the same without them
+        if null_count or distinct < 2 or not is_key_like(series, types.get(name)):
+            continue
+        if distinct == distinct_rows:
+            keys.append({"columns": [name], "distinctValues": distinct})
+        else:
+            pair_columns.append((name, distinct))
+
+    pair_columns = sorted(pair_columns, key=lambda c: -c[1])[:MAX_PAIR_COLUMNS]
+    composite = []
+    for i, (left, left_distinct) in enumerate(pair_columns):
+        for right, right_distinct in pair_columns[i + 1:]:
+            if left_distinct * right_distinct < distinct_rows:
+                continue
+            combined = combine_hashes(hashes[left][kept], hashes[right][kept])
+            if len(pd.unique(combined)) == distinct_rows:
+                composite.append({"columns": [left, right], "distinctValues": [left_distinct, right_distinct]})
+    # Fewest combinations first: the most natural keys (e.g. date + region)
+    composite.sort(key=lambda c: c["distinctValues"][0] * c["distinctValues"][1])
+
+    return {
+        "rowCount": row_count,
+        "distinctRowCount": distinct_rows,
+        "duplicateRows": duplicate_report(rows, originals),
+        "constantColumns": constant,
+        "nearConstantColumns": near_constant,
+        "emptyColumns": empty,
+        "keyCandidates": keys + composite[:MAX_COMPOSITE_KEYS],
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Find duplicate rows, constant columns and key candidates.")
+    load_data.add_arguments(parser)
+    output.add_arguments(parser)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    data = load_data.read_input(args)
+
+    with open(COLUMNS_PATH, 'r', encoding='utf-8') as f:
+        columns_info = json.load(f)
+
+    result = check(data, columns_info)
+
+    output.write_result(result, OUTPUT_PATH, args)
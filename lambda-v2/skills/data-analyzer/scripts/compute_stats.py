@@ -1,23 +1,91 @@
 """
 compute_stats.py — Compute statistics per column.
 
-Reads: /tmp/data.json + /tmp/analyze_columns_result.json + /tmp/detect_periods_result.json
+Reads: /tmp/data.json (or --input .xlsx/.csv, see load_data.py) + /tmp/analyze_columns_result.json + /tmp/detect_periods_result.json
 Writes: /tmp/compute_stats_result.json
 
 Numeric columns: min, max, mean, median, sum, stddev, quartiles, period values.
 Categorical columns: value counts, top value.
+
+Currency columns are summed exactly: cleaned values are scaled to int64 minor units (the
+smallest of 10^2, 10^3, 10^4 at which every value is whole; beyond, values are rounded to
+cents), so sum, mean, period values and variations come from integer sums instead of
+rounded float sums. The scale is reported as `scale` (100 = cents).
+
+Usage: python compute_stats.py [--profile full|chart-recs-only|kpis] [--fields min,sum,...] [--sort-index]
+                                [--input PATH ...] [--compact] [--cap KEY=N ...]   (see output.py)
+
+Only the requested fields are computed: the profile/field list is resolved into
+an execution plan, and intermediates (cleaned values, quantiles, per-period
+sums) are computed once and shared by the stats that need them.
+
+--sort-index adds, for numeric and date columns, a stable ascending row permutation
+(base64 little-endian uint16/uint32) plus page counts, so Table views can fetch any
+page of any sort order without re-sorting rows in the browser.
 """
 
+import argparse
+import base64
 import json
 import re
 import pandas as pd
 import numpy as np
 
-INPUT_PATH = "/tmp/data.json"
+import load_data
+import output
+
 COLUMNS_PATH = "/tmp/analyze_columns_result.json"
 PERIODS_PATH = "/tmp/detect_periods_result.json"
 OUTPUT_PATH = "/tmp/compute_stats_result.json"
 
+NUMERIC_FIELDS = (
+    "min", "max", "mean", "median", "sum", "stddev", "count",
+    "quartiles", "outliers", "periodValues", "variation", "trend",
+    "cv", "cluster", "redundantWith",
+)
+CATEGORICAL_FIELDS = ("uniqueCount", "topValue", "topCount", "valueCounts")
+DATE_FIELDS = ("uniqueCount", "sample")
+# Opt-in fields: never part of a profile, only computed when explicitly requested
+SORT_FIELDS = ("sortIndex",)
+ALL_FIELDS = set(NUMERIC_FIELDS) | set(CATEGORICAL_FIELDS) | set(DATE_FIELDS) | set(SORT_FIELDS)
+
+PAGE_SIZES = (10, 25, 50, 100)
+
+# Decimals tried for currency minor units; values needing more are rounded to the first
+CURRENCY_DECIMALS = (2, 3, 4)
+# Largest magnitude (in minor units) a float64 value holds exactly
+MAX_EXACT_MINOR = 2 ** 53
+MAX_INT64 = np.iinfo(np.int64).max
+
+# Correlation matrix is computed on at most this many rows (seeded sample beyond)
+CORRELATION_SAMPLE_ROWS = 50000
+# |r| at or above which two metrics are reported as redundant
+REDUNDANCY_THRESHOLD = 0.95
+
+# Named field sets for known consumers
+PROFILES = {
+    "full": ALL_FIELDS - set(SORT_FIELDS),
+    # Exactly what suggest_charts.py reads
+    "chart-recs-only": {"min", "sum", "stddev", "count", "uniqueCount", "cv", "cluster"},
+    # KPI cards, sparklines and variation badges in the generator prompt
+    "kpis": {"min", "max", "mean", "sum", "count", "periodValues", "variation", "trend", "topValue", "uniqueCount"},
+}
+
+# Intermediate steps each field depends on (shared between fields)
+FIELD_STEPS = {
+    "median": {"quantiles"},
+    "quartiles": {"quantiles"},
+    "outliers": {"quantiles"},
+    "periodValues": {"periodSums"},
+    "variation": {"periodSums"},
+    "trend": {"periodSums"},
+    "cluster": {"correlation"},
+    "redundantWith": {"correlation"},
+    "topValue": {"valueCounts"},
+    "topCount": {"valueCounts"},
+    "valueCounts": {"valueCounts"},
+}
+
 
 def clean_numeric(series):
     """Try to convert a series to numeric, stripping currency/percentage symbols."""
@@ -35,134 +103,360 @@ def clean_numeric(series):
     return pd.to_numeric(cleaned, errors='coerce')
 
 
-def compute_numeric_stats(series, col_info, df, periods_info):
-    """Compute stats for a numeric/currency/percentage column."""
-    numeric = clean_numeric(series).dropna()
+def currency_scale(numeric):
+    """Minor-unit scale of a cleaned currency column (see the module docstring), or None when
+    its values are too large for exact int64 sums."""
+    values = numeric.dropna().to_numpy(dtype=float)
+    if len(values) == 0:
+        return None
+    largest = float(np.abs(values).max())
+    for decimals in CURRENCY_DECIMALS:
+        scale = 10 ** decimals
+        if not largest * scale < MAX_EXACT_MINOR or largest * scale * len(values) >= MAX_INT64:
+            break
+        if np.array_equal(np.rint(values * scale) / scale, values):
+            return scale
+    scale = 10 ** CURRENCY_DECIMALS[0]
+    if not largest * scale < MAX_EXACT_MINOR or largest * scale * len(values) >= MAX_INT64:
+        return None
+    return scale
+
+
+def to_minor_units(numeric, scale):
+    """Cleaned (non-null) values as int64 minor units, index kept for period groupbys."""
+    return pd.Series(np.rint(numeric.to_numpy(dtype=float) * scale).astype(np.int64), index=numeric.index)
+
+
+def build_plan(fields=None, profile="full"):
+    """Resolve a field list (or a named profile) into the fields to emit and the intermediate steps to run."""
+    if fields is None:
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown profile '{profile}' (expected one of: {', '.join(sorted(PROFILES))})")
+        fields = PROFILES[profile]
+    fields = set(fields)
+    unknown = fields - ALL_FIELDS
+    if unknown:
+        raise ValueError(f"Unknown stats fields: {sorted(unknown)}")
+
+    steps = set()
+    for field in fields:
+        steps |= FIELD_STEPS.get(field, set())
+    return {"fields": fields, "steps": steps}
+
+
+def normalize_period_keys(df, periods_info):
+    """Normalized period label per row — computed once, shared by every numeric column."""
+    if not (periods_info.get("hasPeriods") and periods_info.get("periodColumn")):
+        return None
+    period_col = periods_info["periodColumn"]
+    if period_col not in df.columns:
+        return None
+    # Categorical dtype: every groupby on the keys reuses the same codes instead of re-hashing strings
+    return df[period_col].astype(str).str.lower().str.strip().astype("category")
+
+
+def compute_period_values(numeric, period_keys, periods_info, scale=None):
+    """Sum a cleaned numeric column per detected period with a single groupby.
+
+    With a `scale`, `numeric` holds int64 minor units: the sums are exact.
+    """
+    sums = numeric.groupby(period_keys.loc[numeric.index], observed=True).sum()
+    period_values = []
+    for period in periods_info.get("periods", []):
+        key = str(period).lower().strip()
+        if key not in sums.index:
+            val = 0
+        elif scale is not None:
+            val = int(sums[key]) / scale
+        else:
+            val = round(float(sums[key]), 2)
+        period_values.append({"period": str(period), "value": val})
+    return period_values
+
+
+def encode_sort_index(values):
+    """Stable ascending argsort of a column, packed for the browser.
+
+    Missing values (NaN/NaT) sort last, so `validCount` marks where they start; a
+    descending view reads the first `validCount` offsets backwards.
+    """
+    row_count = len(values)
+    dtype = "<u2" if row_count <= np.iinfo(np.uint16).max else "<u4"
+    permutation = np.argsort(values, kind="stable").astype(dtype)
+    valid_count = int(row_count - pd.isna(values).sum())
+    return {
+        "encoding": "base64",
+        "dtype": "uint16" if dtype == "<u2" else "uint32",
+        "validCount": valid_count,
+        "pageCounts": {str(size): -(-row_count // size) for size in PAGE_SIZES},
+        "data": base64.b64encode(permutation.tobytes()).decode("ascii"),
+    }
+
+
+def compute_numeric_stats(numeric, plan, period_keys=None, periods_info=None, scale=None):
+    """Compute the planned stats for a cleaned numeric/currency/percentage column.
+
+    With a `scale` (currency columns), sum, mean and period values are computed on int64
+    minor units.
+    """
     if len(numeric) == 0:
         return {"error": "no numeric values"}
 
-    q1 = float(numeric.quantile(0.25))
-    q3 = float(numeric.quantile(0.75))
-    iqr = q3 - q1
-    lower_bound = q1 - 1.5 * iqr
-    upper_bound = q3 + 1.5 * iqr
-    outlier_count = int(((numeric < lower_bound) | (numeric > upper_bound)).sum())
-
-    stats = {
-        "min": round(float(numeric.min()), 2),
-        "max": round(float(numeric.max()), 2),
-        "mean": round(float(numeric.mean()), 2),
-        "median": round(float(numeric.median()), 2),
-        "sum": round(float(numeric.sum()), 2),
-        "stddev": round(float(numeric.std()), 2) if len(numeric) > 1 else 0,
-        "count": int(len(numeric)),
-        "quartiles": {
-            "Q1": round(q1, 2),
-            "Q2": round(float(numeric.quantile(0.50)), 2),
-            "Q3": round(q3, 2),
-        },
-        "outliers": {
-            "count": outlier_count,
+    fields, steps = plan["fields"], plan["steps"]
+    stats = {}
+
+    minor = None
+    if scale is not None and (fields & {"sum", "mean"} or "periodSums" in steps):
+        minor = to_minor_units(numeric, scale)
+        minor_sum = int(minor.sum())
+        stats["scale"] = scale
+
+    if "quantiles" in steps:
+        q1, q2, q3 = (float(q) for q in np.quantile(numeric.to_numpy(dtype=float), [0.25, 0.5, 0.75]))
+
+    if "min" in fields:
+        stats["min"] = round(float(numeric.min()), 2)
+    if "max" in fields:
+        stats["max"] = round(float(numeric.max()), 2)
+    if "mean" in fields:
+        stats["mean"] = round(minor_sum / (len(minor) * scale) if minor is not None else float(numeric.mean()), 2)
+    if "median" in fields:
+        stats["median"] = round(q2, 2)
+    if "sum" in fields:
+        stats["sum"] = minor_sum / scale if minor is not None else round(float(numeric.sum()), 2)
+    if "stddev" in fields:
+        stats["stddev"] = round(float(numeric.std()), 2) if len(numeric) > 1 else 0
+    if "count" in fields:
+        stats["count"] = int(len(numeric))
+    if "cv" in fields:
+        # Scale-free variability (stddev / |mean|), comparable across metrics of different units
+        mean = float(numeric.mean())
+        stats["cv"] = round(float(numeric.std()) / abs(mean), 3) if len(numeric) > 1 and mean != 0 else 0
+    if "quartiles" in fields:
+        stats["quartiles"] = {"Q1": round(q1, 2), "Q2": round(q2, 2), "Q3": round(q3, 2)}
+    if "outliers" in fields:
+        iqr = q3 - q1
+        lower_bound = q1 - 1.5 * iqr
+        upper_bound = q3 + 1.5 * iqr
+        stats["outliers"] = {
+            "count": int(((numeric < lower_bound) | (numeric > upper_bound)).sum()),
             "lowerBound": round(lower_bound, 2),
             "upperBound": round(upper_bound, 2),
         }
-    }
 
     # If periods exist, compute per-period values (for sparklines and variations)
-    if periods_info.get("hasPeriods") and periods_info.get("periodColumn"):
-        period_col = periods_info["periodColumn"]
-        if period_col in df.columns:
-            period_values = []
-            for period in periods_info.get("periods", []):
-                mask = df[period_col].astype(str).str.lower().str.strip() == str(period).lower().strip()
-                period_data = clean_numeric(df.loc[mask, col_info["name"]]).dropna()
-                val = round(float(period_data.sum()), 2) if len(period_data) > 0 else 0
-                period_values.append({"period": str(period), "value": val})
+    if "periodSums" in steps and period_keys is not None:
+        if minor is not None:
+            period_values = compute_period_values(minor, period_keys, periods_info, scale)
+        else:
+            period_values = compute_period_values(numeric, period_keys, periods_info)
 
+        if "periodValues" in fields:
             stats["periodValues"] = period_values
 
-            # Compute variation (last vs previous period) and trend direction
-            if len(period_values) >= 2 and periods_info.get("canCompare"):
-                prev_val = period_values[-2]["value"]
-                last_val = period_values[-1]["value"]
-                if prev_val != 0:
-                    variation = round(((last_val - prev_val) / abs(prev_val)) * 100, 1)
-                    stats["variation"] = {
-                        "firstPeriod": period_values[-2]["period"],
-                        "lastPeriod": period_values[-1]["period"],
-                        "firstValue": prev_val,
-                        "lastValue": last_val,
-                        "changePercent": variation
-                    }
-
-                # Trend direction over all periods
-                vals = [pv["value"] for pv in period_values if pv["value"] != 0]
-                if len(vals) >= 3:
-                    increases = sum(1 for i in range(1, len(vals)) if vals[i] > vals[i-1])
-                    decreases = sum(1 for i in range(1, len(vals)) if vals[i] < vals[i-1])
-                    if increases > decreases:
-                        stats["trend"] = "up"
-                    elif decreases > increases:
-                        stats["trend"] = "down"
-                    else:
-                        stats["trend"] = "stable"
+        # Compute variation (last vs previous period) and trend direction
+        if len(period_values) >= 2 and periods_info.get("canCompare"):
+            prev_val = period_values[-2]["value"]
+            last_val = period_values[-1]["value"]
+            if "variation" in fields and prev_val != 0:
+                variation = round(((last_val - prev_val) / abs(prev_val)) * 100, 1)
+                stats["variation"] = {
+                    "firstPeriod": period_values[-2]["period"],
+                    "lastPeriod": period_values[-1]["period"],
+                    "firstValue": prev_val,
+                    "lastValue": last_val,
+                    "changePercent": variation
+                }
+
+            # Trend direction over all periods
+            vals = [pv["value"] for pv in period_values if pv["value"] != 0]
+            if "trend" in fields and len(vals) >= 3:
+                increases = sum(1 for i in range(1, len(vals)) if vals[i] > vals[i-1])
+                decreases = sum(1 for i in range(1, len(vals)) if vals[i] < vals[i-1])
+                if increases > decreases:
+                    stats["trend"] = "up"
+                elif decreases > increases:
+                    stats["trend"] = "down"
+                else:
+                    stats["trend"] = "stable"
 
     return stats
 
 
-def compute_categorical_stats(series):
-    """Compute stats for a categorical column."""
+def count_values(non_null):
+    """value_counts() ordered by count, ties by first appearance — also for dictionary-encoded columns."""
+    if not isinstance(non_null.dtype, pd.CategoricalDtype):
+        return non_null.value_counts()
+    # Categorical value_counts() would list unobserved categories and break ties by category order
+    present, first_seen, counts = np.unique(non_null.cat.codes.to_numpy(), return_index=True, return_counts=True)
+    order = np.lexsort((first_seen, -counts))
+    return pd.Series(counts[order], index=non_null.cat.categories[present[order]])
+
+
+def compute_categorical_stats(series, plan):
+    """Compute the planned stats for a categorical column."""
+    fields, steps = plan["fields"], plan["steps"]
     non_null = series.dropna()
-    value_counts = non_null.value_counts()
+    stats = {}
 
-    return {
-        "uniqueCount": int(non_null.nunique()),
-        "topValue": str(value_counts.index[0]) if len(value_counts) > 0 else None,
-        "topCount": int(value_counts.iloc[0]) if len(value_counts) > 0 else 0,
-        "valueCounts": [
+    # value_counts also yields the unique count, so nunique() is only run when it is not needed
+    value_counts = count_values(non_null) if "valueCounts" in steps else None
+
+    if "uniqueCount" in fields:
+        stats["uniqueCount"] = int(len(value_counts)) if value_counts is not None else int(non_null.nunique())
+    if "topValue" in fields:
+        stats["topValue"] = str(value_counts.index[0]) if len(value_counts) > 0 else None
+    if "topCount" in fields:
+        stats["topCount"] = int(value_counts.iloc[0]) if len(value_counts) > 0 else 0
+    if "valueCounts" in fields:
+        stats["valueCounts"] = [
             {"value": str(val), "count": int(cnt)}
             for val, cnt in value_counts.head(15).items()
         ]
-    }
+    return stats
 
 
-def compute(data, columns_info, periods_info):
-    df = pd.DataFrame(data)
+def compute_date_stats(series, plan):
+    """For date columns, just report unique periods."""
+    fields = plan["fields"]
+    stats = {}
+    if "uniqueCount" in fields:
+        stats["uniqueCount"] = int(series.nunique())
+    if "sample" in fields:
+        stats["sample"] = [str(v) for v in series.dropna().unique()[:10]]
+    if "sortIndex" in fields:
+        dates = pd.to_datetime(series.astype("object"), dayfirst=True, errors="coerce")
+        # Month names / quarters do not parse as dates; their order is given by detect_periods.py
+        if dates.notna().any():
+            stats["sortIndex"] = encode_sort_index(dates.to_numpy(dtype="datetime64[ns]"))
+    return stats
+
+
+def correlation_clusters(cleaned, sample_rows=CORRELATION_SAMPLE_ROWS, threshold=REDUNDANCY_THRESHOLD):
+    """Group near-duplicate numeric columns using one correlation matrix product.
+
+    All columns are standardized into a single matrix and correlated with one BLAS
+    matmul (z.T @ z); missing values are mean-imputed so they contribute nothing.
+    Each cluster is represented by its first column in dataset order.
+    Returns {column: representative column}.
+    """
+    names = list(cleaned)
+    if not names:
+        return {}
+
+    row_count = len(cleaned[names[0]])
+    rows = slice(None)
+    if row_count > sample_rows:
+        rows = np.sort(np.random.default_rng(0).choice(row_count, sample_rows, replace=False))
+    matrix = np.column_stack([cleaned[name].to_numpy(dtype=float)[rows] for name in names])
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.nan_to_num(np.nanmean(matrix, axis=0)) if len(matrix) else np.zeros(len(names))
+        std = np.nan_to_num(np.nanstd(matrix, axis=0)) if len(matrix) else np.zeros(len(names))
+        z = np.nan_to_num((matrix - mean) / np.where(std > 0, std, 1))
+    corr = (z.T @ z) / max(len(z), 1)
+
+    representative = {}
+    for i, name in enumerate(names):
+        if name in representative:
+            continue
+        for j in np.flatnonzero(np.abs(corr[i]) >= threshold):
+            representative.setdefault(names[j], name)
+        representative[name] = name
+    return representative
+
+
+def compute_frame(df, columns_info, periods_info, plan, cleaned=None, period_keys=None, scales=None):
+    """Compute planned stats over a DataFrame (the full dataset or a filtered row subset).
+
+    `cleaned` optionally maps numeric column names to already-cleaned series aligned with `df`,
+    so callers that query many subsets (filter_index.py) clean each column only once; `scales`
+    likewise maps currency columns to their currency_scale() on the full dataset.
+    """
     stats = {}
+    # sortIndex encodes the cleaned values too
+    wants_numeric = bool(plan["fields"] & (set(NUMERIC_FIELDS) | set(SORT_FIELDS)))
+
+    # Clean every numeric column once; the correlation step needs them all together
+    numeric_cols = {}
+    if wants_numeric:
+        cleaned = cleaned or {}
+        for col_info in columns_info:
+            col_name = col_info["name"]
+            if col_info["type"] in ("numeric", "currency", "percentage"):
+                if col_name in cleaned:
+                    numeric_cols[col_name] = cleaned[col_name]
+                elif col_name in df.columns:
+                    numeric_cols[col_name] = clean_numeric(df[col_name])
+
+    clusters = correlation_clusters(numeric_cols) if "correlation" in plan["steps"] else {}
 
     for col_info in columns_info:
         col_name = col_info["name"]
         col_type = col_info["type"]
 
-        if col_name not in df.columns:
+        if col_name not in df.columns and col_name not in numeric_cols:
             continue
 
-        series = df[col_name]
-
         if col_type in ("numeric", "currency", "percentage"):
-            stats[col_name] = {
-                "type": col_type,
-                **compute_numeric_stats(series, col_info, df, periods_info)
-            }
+            col_stats = {"type": col_type}
+            if wants_numeric:
+                numeric = numeric_cols[col_name]
+                scale = None
+                if col_type == "currency":
+                    scale = scales[col_name] if scales and col_name in scales else currency_scale(numeric)
+                col_stats.update(compute_numeric_stats(numeric.dropna(), plan, period_keys, periods_info, scale))
+                if "cluster" in plan["fields"]:
+                    col_stats["cluster"] = clusters[col_name]
+                if "redundantWith" in plan["fields"]:
+                    col_stats["redundantWith"] = [
+                        other for other, rep in clusters.items()
+                        if rep == clusters[col_name] and other != col_name
+                    ]
+                if "sortIndex" in plan["fields"]:
+                    col_stats["sortIndex"] = encode_sort_index(numeric.to_numpy(dtype=float))
+            stats[col_name] = col_stats
         elif col_type == "categorical":
             stats[col_name] = {
                 "type": "categorical",
-                **compute_categorical_stats(series)
+                **compute_categorical_stats(df[col_name], plan)
             }
         elif col_type == "date":
-            # For date columns, just report unique periods
             stats[col_name] = {
                 "type": "date",
-                "uniqueCount": int(series.nunique()),
-                "sample": [str(v) for v in series.dropna().unique()[:10]]
+                **compute_date_stats(df[col_name], plan)
             }
 
     return stats
 
 
+def compute(data, columns_info, periods_info, fields=None, profile="full"):
+    plan = build_plan(fields, profile)
+    df = pd.DataFrame(data)
+    period_keys = normalize_period_keys(df, periods_info) if "periodSums" in plan["steps"] else None
+    return compute_frame(df, columns_info, periods_info, plan, period_keys=period_keys)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Compute statistics per column.")
+    parser.add_argument("--profile", default="full", choices=sorted(PROFILES),
+                        help="Named set of stats to compute (default: full)")
+    parser.add_argument("--fields", default=None,
+                        help="Comma-separated stats fields to compute (overrides --profile)")
+    parser.add_argument("--sort-index", action="store_true",
+                        help="Also emit sort permutations and page counts for numeric/date columns")
+    load_data.add_arguments(parser)
+    output.add_arguments(parser)
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
-    with open(INPUT_PATH, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    args = parse_args()
+    fields = [f.strip() for f in args.fields.split(",") if f.strip()] if args.fields else None
+    if args.sort_index:
+        fields = sorted(fields or PROFILES[args.profile]) + ["sortIndex"]
+
+    data = load_data.read_input(args)
 
     with open(COLUMNS_PATH, 'r', encoding='utf-8') as f:
         columns_info = json.load(f)
@@ -170,9 +464,6 @@ if __name__ == "__main__":
     with open(PERIODS_PATH, 'r', encoding='utf-8') as f:
         periods_info = json.load(f)
 
-    result = compute(data, columns_info, periods_info)
-
-    with open(OUTPUT_PATH, 'w', encoding='utf-8') as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
+    result = compute(data, columns_info, periods_info, fields=fields, profile=args.profile)
 
-    print(json.dumps(result, ensure_ascii=False, indent=2))
+    output.write_result(result, OUTPUT_PATH, args)
@@ -1,17 +1,22 @@
 """
 detect_periods.py — Detect temporal columns and determine period comparability.
 
-Reads: /tmp/data.json + /tmp/analyze_columns_result.json
+Reads: /tmp/data.json (or --input .xlsx/.csv, see load_data.py) + /tmp/analyze_columns_result.json
 Writes: /tmp/detect_periods_result.json
 
 Detects: monthly, quarterly, yearly, daily, weekly periods.
+
+Usage: python detect_periods.py [--input PATH ...] [--compact] [--cap KEY=N ...]   (see output.py)
 """
 
+import argparse
 import json
 import re
 import pandas as pd
 
-INPUT_PATH = "/tmp/data.json"
+import load_data
+import output
+
 COLUMNS_PATH = "/tmp/analyze_columns_result.json"
 OUTPUT_PATH = "/tmp/detect_periods_result.json"
 
@@ -161,16 +166,21 @@ def detect(data, columns_info):
     }
 
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Detect temporal columns and determine period comparability.")
+    load_data.add_arguments(parser)
+    output.add_arguments(parser)
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
-    with open(INPUT_PATH, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    args = parse_args()
+
+    data = load_data.read_input(args)
 
     with open(COLUMNS_PATH, 'r', encoding='utf-8') as f:
         columns_info = json.load(f)
 
     result = detect(data, columns_info)
 
-    with open(OUTPUT_PATH, 'w', encoding='utf-8') as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
-
-    print(json.dumps(result, ensure_ascii=False, indent=2))
+    output.write_result(result, OUTPUT_PATH, args)
@@ -0,0 +1,228 @@
+"""
+filter_index.py — Per-value row indexes for filter-aware stats.
+
+Reads: /tmp/data.json (or --input .xlsx/.csv, see load_data.py) + /tmp/analyze_columns_result.json + /tmp/detect_periods_result.json
+Writes: /tmp/filter_index_result.json (index summary)
+
+Builds a sorted row-offset posting list for every categorical value and every period
+bucket, then answers compute_stats-shaped queries for any conjunction of filters by
+intersecting postings — no rescan of the full dataset per filter change.
+
+Usage:
+  python filter_index.py                                   Build the index, write the summary
+  python filter_index.py --filter Region=Nord --filter Mois=mars,avril
+                                                           One query (values of one column are OR-ed)
+  python filter_index.py --serve [--profile kpis]          Worker mode: one JSON filter object per
+                                                           stdin line, one JSON stats result per line
+  --compact / --cap KEY=N apply to the result (see output.py); --serve lines are always compact
+"""
+
+import argparse
+import json
+import sys
+import time
+import pandas as pd
+import numpy as np
+
+import load_data
+import output
+
+from compute_stats import (
+    PROFILES, build_plan, clean_numeric, compute_frame, currency_scale, normalize_period_keys,
+)
+
+COLUMNS_PATH = "/tmp/analyze_columns_result.json"
+PERIODS_PATH = "/tmp/detect_periods_result.json"
+OUTPUT_PATH = "/tmp/filter_index_result.json"
+
+
+def offset_dtype(row_count):
+    """Smallest unsigned dtype able to hold every row offset."""
+    return np.uint16 if row_count <= np.iinfo(np.uint16).max else np.uint32
+
+
+def build_postings(keys, dtype):
+    """Map each distinct key to the sorted array of row offsets holding it (one stable argsort)."""
+    codes, uniques = pd.factorize(keys, use_na_sentinel=True)
+    order = np.argsort(codes, kind="stable").astype(dtype)
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    start = int((codes < 0).sum())  # NaN rows (code -1) sort first and are not indexed
+    postings = {}
+    for code, count in enumerate(counts):
+        postings[str(uniques[code])] = order[start:start + count]
+        start += count
+    return postings
+
+
+def build_index(data, columns_info, periods_info):
+    """Build postings for categorical columns and the period column, plus cleaned numeric columns."""
+    df = pd.DataFrame(data)
+    row_count = len(df)
+    dtype = offset_dtype(row_count)
+
+    postings = {}
+    for col_info in columns_info:
+        if col_info["type"] == "categorical" and col_info["name"] in df.columns:
+            postings[col_info["name"]] = build_postings(df[col_info["name"]].astype("object"), dtype)
+
+    # Period buckets are keyed by the normalized labels detect_periods.py reports
+    period_keys = normalize_period_keys(df, periods_info)
+    period_col = periods_info["periodColumn"] if period_keys is not None else None
+    if period_keys is not None:
+        postings[period_col] = build_postings(period_keys.where(df[period_col].notna()), dtype)
+
+    cleaned = {
+        c["name"]: clean_numeric(df[c["name"]])
+        for c in columns_info
+        if c["type"] in ("numeric", "currency", "percentage") and c["name"] in df.columns
+    }
+    # Currency scales come from the full dataset, so every query sums in the same minor units
+    scales = {c["name"]: currency_scale(cleaned[c["name"]]) for c in columns_info
+              if c["type"] == "currency" and c["name"] in cleaned}
+    # Only non-numeric columns are sliced per query; numeric ones come from `cleaned`.
+    # Categorical/date columns are dictionary-encoded once so per-query counts work on codes.
+    frame = df[[c for c in df.columns if c not in cleaned]].copy()
+    for col_info in columns_info:
+        if col_info["type"] in ("categorical", "date") and col_info["name"] in frame.columns:
+            series = frame[col_info["name"]]
+            frame[col_info["name"]] = series.astype(pd.CategoricalDtype(pd.unique(series.dropna())))
+
+    return {
+        "rowCount": row_count,
+        "postings": postings,
+        "frame": frame,
+        "cleaned": cleaned,
+        "scales": scales,
+        "periodKeys": period_keys,
+        "periodColumn": period_col,
+        "columnsInfo": columns_info,
+        "periodsInfo": periods_info,
+    }
+
+
+def select_rows(index, filters):
+    """Sorted row offsets matching every filter. `filters` maps column -> value or list of values."""
+    selections = []
+    for col_name, wanted in filters.items():
+        if col_name not in index["postings"]:
+            raise ValueError(f"Column '{col_name}' is not indexed (indexed: {', '.join(index['postings'])})")
+        col_postings = index["postings"][col_name]
+        values = wanted if isinstance(wanted, list) else [wanted]
+        if col_name == index["periodColumn"]:
+            values = [str(v).lower().strip() for v in values]
+        lists = [col_postings[str(v)] for v in values if str(v) in col_postings]
+        if not lists:
+            return np.empty(0, dtype=np.int64)
+        selections.append(lists[0] if len(lists) == 1 else np.sort(np.concatenate(lists)))
+
+    if not selections:
+        return np.arange(index["rowCount"])
+
+    # Intersect smallest first so every step is bounded by the most selective filter
+    selections.sort(key=len)
+    rows = selections[0]
+    for other in selections[1:]:
+        if len(rows) == 0:
+            break
+        rows = np.intersect1d(rows, other, assume_unique=True)
+    return rows.astype(np.int64)
+
+
+def query(index, filters, fields=None, profile="full"):
+    """compute_stats-shaped result for the rows matching every filter."""
+    plan = build_plan(fields, profile)
+    rows = select_rows(index, filters)
+    cleaned = {name: series.iloc[rows] for name, series in index["cleaned"].items()}
+    period_keys = index["periodKeys"].iloc[rows] if index["periodKeys"] is not None else None
+    return compute_frame(
+        index["frame"].iloc[rows], index["columnsInfo"], index["periodsInfo"], plan,
+        cleaned=cleaned, period_keys=period_keys, scales=index["scales"],
+    )
+
+
+def summarize(index):
+    """Index shape for the JSON result: indexed columns, value counts, postings bytes."""
+    return {
+        "rowCount": index["rowCount"],
+        "offsetDtype": np.dtype(offset_dtype(index["rowCount"])).name,
+        "indexedColumns": [
+            {
+                "column": col_name,
+                "valueCount": len(col_postings),
+                "bytes": int(sum(p.nbytes for p in col_postings.values())),
+            }
+            for col_name, col_postings in index["postings"].items()
+        ],
+    }
+
+
+def parse_filters(specs):
+    """['Region=Nord', 'Mois=mars,avril'] -> {'Region': ['Nord'], 'Mois': ['mars', 'avril']}"""
+    filters = {}
+    for spec in specs:
+        col_name, sep, values = spec.partition("=")
+        if not sep:
+            raise ValueError(f"Invalid filter '{spec}' (expected column=value[,value...])")
+        filters.setdefault(col_name, []).extend(values.split(","))
+    return filters
+
+
+def serve(index, fields, profile, caps=None, stdin=sys.stdin, stdout=sys.stdout):
+    """Answer one JSON filter object per input line until EOF (compact JSON, --cap applied)."""
+    for line in stdin:
+        line = line.strip()
+        if not line:
+            continue
+        start = time.perf_counter()
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be an object")
+            stats = query(index, request, fields=fields, profile=profile)
+            response = {"stats": stats, "elapsedMs": round((time.perf_counter() - start) * 1000, 2)}
+        except (ValueError, json.JSONDecodeError) as e:
+            response = {"error": str(e)}
+        stdout.write(output.dumps(response, compact=True, caps=caps) + "\n")
+        stdout.flush()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Filter-aware stats backed by per-value row indexes.")
+    parser.add_argument("--filter", action="append", default=[], metavar="COLUMN=VALUE[,VALUE]",
+                        help="Filter to apply (repeatable; filters on different columns are AND-ed)")
+    parser.add_argument("--serve", action="store_true",
+                        help="Worker mode: read one JSON filter object per stdin line")
+    parser.add_argument("--profile", default="full", choices=sorted(PROFILES),
+                        help="Named set of stats to compute per query (default: full)")
+    parser.add_argument("--fields", default=None,
+                        help="Comma-separated stats fields to compute (overrides --profile)")
+    load_data.add_arguments(parser)
+    output.add_arguments(parser)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    fields = [f.strip() for f in args.fields.split(",") if f.strip()] if args.fields else None
+
+    data = load_data.read_input(args)
+
+    with open(COLUMNS_PATH, 'r', encoding='utf-8') as f:
+        columns_info = json.load(f)
+
+    with open(PERIODS_PATH, 'r', encoding='utf-8') as f:
+        periods_info = json.load(f)
+
+    index = build_index(data, columns_info, periods_info)
+    del data
+
+    if args.serve:
+        serve(index, fields, args.profile, caps=dict(args.cap))
+        sys.exit(0)
+
+    if args.filter:
+        result = query(index, parse_filters(args.filter), fields=fields, profile=args.profile)
+    else:
+        result = summarize(index)
+
+    output.write_result(result, OUTPUT_PATH, args)
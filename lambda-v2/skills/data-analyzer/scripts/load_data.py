@@ -0,0 +1,344 @@
+"""
+load_data.py — Read the dataset to analyze: JSON rows, an .xlsx sheet or a CSV file.
+
+Shared by the single-dataset analyzer scripts (--input, --sheet, --header-row, --max-rows).
+Run on its own, it loads the input once and describes it.
+
+Reads: --input (default /tmp/data.json)
+  .json  array of objects, as before
+  .xlsx  one sheet, streamed row by row (openpyxl read-only mode) into one list per column
+  .csv   read in chunks of CSV_CHUNK_ROWS rows; separator sniffed (, ; tab |), decimal comma
+         when the separator is ";", UTF-8 then Windows-1252
+Writes: /tmp/load_data_result.json (format, sheets, header row, columns, row count)
+        /tmp/data_frame.pkl (the loaded columns, reused by the next script reading the same
+        file with the same options instead of parsing the workbook again)
+
+The header row is the first of the first HEADER_SCAN_ROWS rows whose filled cells are all
+distinct labels (text that is not a number) and fill at least half the widest of these rows:
+title and blank rows above a table are skipped. --header-row N (1-based) forces it. Blank
+header cells are named "Colonne N"; rows with no value are skipped; --max-rows keeps the
+first N data rows. Dates and times become ISO text, as in the JSON export.
+
+Usage: python load_data.py [--input PATH] [--sheet NAME|N] [--header-row N] [--max-rows N]
+                           [--compact] [--cap KEY=N ...]   (see output.py)
+"""
+
+import argparse
+import csv
+import datetime
+import itertools
+import json
+import os
+import pickle
+import sys
+import time
+import pandas as pd
+
+import output
+
+INPUT_PATH = "/tmp/data.json"
+CACHE_PATH = "/tmp/data_frame.pkl"
+OUTPUT_PATH = "/tmp/load_data_result.json"
+
+FORMATS = {".json": "json", ".xlsx": "xlsx", ".xlsm": "xlsx", ".csv": "csv", ".tsv": "csv", ".txt": "csv"}
+HEADER_SCAN_ROWS = 20
+CSV_CHUNK_ROWS = 50_000
+CSV_SNIFF_BYTES = 64 * 1024
+CSV_DELIMITERS = ",;\t|"
+CSV_ENCODINGS = ("utf-8-sig", "cp1252")
+
+
+def source_format(path):
+    """'json', 'xlsx' or 'csv' from the file extension; ValueError otherwise."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FORMATS:
+        raise ValueError(f"Unsupported input '{path}' (expected {', '.join(sorted(FORMATS))})")
+    return FORMATS[extension]
+
+
+def is_blank(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def is_number_text(text):
+    """Whether a CSV cell reads as a number ('1 234,5', '12%', '-3.2e5')."""
+    text = text.strip().replace(" ", "").replace("\u00a0", "").replace("\u202f", "").rstrip("%€$£").replace(",", ".")
+    try:
+        float(text)
+    except ValueError:
+        return False
+    return True
+
+
+def is_label(value):
+    return isinstance(value, str) and not is_number_text(value)
+
+
+def detect_header_row(rows):
+    """0-based index, among `rows`, of the header row (see the module docstring); 0 if none qualifies."""
+    filled = [[value for value in row if not is_blank(value)] for row in rows]
+    widest = max((len(cells) for cells in filled), default=0)
+    for i, cells in enumerate(filled):
+        if (cells and 2 * len(cells) >= widest and all(is_label(value) for value in cells)
+                and len({value.strip() for value in cells}) == len(cells)):
+            return i
+    return 0
+
+
+def column_names(header):
+    """Header cells as distinct column names ("Colonne N" when blank, "name_2" when repeated)."""
+    names, seen = [], set()
+    for j, value in enumerate(header):
+        name = str(value).strip() if not is_blank(value) else f"Colonne {j + 1}"
+        base, k = name, 2
+        while name in seen:
+            name, k = f"{base}_{k}", k + 1
+        seen.add(name)
+        names.append(name)
+    return names
+
+
+def header_width(header):
+    """Number of columns: up to the last non-blank header cell."""
+    width = len(header)
+    while width and is_blank(header[width - 1]):
+        width -= 1
+    return width
+
+
+def cell_value(value):
+    """An .xlsx cell as the JSON export has it: dates and times as ISO text."""
+    if isinstance(value, datetime.datetime):
+        if value.time() == datetime.time():
+            return value.strftime("%Y-%m-%d")
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return value
+
+
+def split_header(rows, header_row):
+    """(0-based header index, buffered rows, names) from the first rows of a sheet/file."""
+    scanned = list(itertools.islice(rows, max(HEADER_SCAN_ROWS, header_row or 0)))
+    if header_row is not None:
+        if header_row < 1 or header_row > len(scanned):
+            raise ValueError(f"Header row {header_row} is out of range (the table has {len(scanned)} rows)")
+        index = header_row - 1
+    else:
+        index = detect_header_row(scanned)
+    header = list(scanned[index]) if scanned else []
+    return index, scanned[index + 1:], column_names(header[:header_width(header)])
+
+
+def open_workbook(path):
+    try:
+        import openpyxl
+    except ImportError:
+        raise ValueError("Reading .xlsx files needs openpyxl (pip install openpyxl)") from None
+    return openpyxl.load_workbook(path, read_only=True, data_only=True)
+
+
+def select_sheet(sheet_names, sheet):
+    """Sheet name for --sheet: a name, or a 1-based position; the first sheet by default."""
+    if sheet is None:
+        return sheet_names[0]
+    if sheet in sheet_names:
+        return sheet
+    if sheet.isdigit() and 1 <= int(sheet) <= len(sheet_names):
+        return sheet_names[int(sheet) - 1]
+    raise ValueError(f"Sheet '{sheet}' not found (sheets: {', '.join(sheet_names)})")
+
+
+def read_sheet(worksheet, header_row=None, max_rows=None):
+    """(frame, 1-based header row, truncated) of one read-only worksheet, built column by column."""
+    worksheet.reset_dimensions()  # stored dimensions can be wrong: read every row there is
+    rows = worksheet.iter_rows(values_only=True)
+    index, buffered, names = split_header(rows, header_row)
+    width = len(names)
+    columns = [[] for _ in names]
+    count, truncated = 0, False
+    for row in itertools.chain(buffered, rows):
+        cells = row[:width]
+        if all(is_blank(value) for value in cells):
+            continue
+        if max_rows is not None and count == max_rows:
+            truncated = True
+            break
+        for j, column in enumerate(columns):
+            column.append(cell_value(cells[j]) if j < len(cells) else None)
+        count += 1
+    return pd.DataFrame(dict(zip(names, columns))), index + 1, truncated
+
+
+def read_xlsx(path, sheet=None, header_row=None, max_rows=None):
+    """(frame, info) of one sheet of an .xlsx workbook."""
+    workbook = open_workbook(path)
+    try:
+        sheet_names = workbook.sheetnames
+        name = select_sheet(sheet_names, sheet)
+        frame, header_index, truncated = read_sheet(workbook[name], header_row, max_rows)
+    finally:
+        workbook.close()
+    return frame, {"sheet": name, "sheets": sheet_names, "headerRow": header_index, "truncated": truncated}
+
+
+def read_workbook(path, sheets=None, header_row=None, max_rows=None):
+    """{sheet name: frame} for the `sheets` of an .xlsx workbook (all sheets with a table by default)."""
+    workbook = open_workbook(path)
+    try:
+        names = [select_sheet(workbook.sheetnames, sheet) for sheet in sheets] if sheets else workbook.sheetnames
+        frames = {}
+        for name in names:
+            frame = read_sheet(workbook[name], header_row, max_rows)[0]
+            if sheets or len(frame.columns):
+                frames[name] = frame
+    finally:
+        workbook.close()
+    return frames
+
+
+def sniff_delimiter(sample):
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=CSV_DELIMITERS).delimiter
+    except csv.Error:
+        return ","
+
+
+def read_csv_frame(path, encoding, header_row=None, max_rows=None):
+    """(frame, 1-based header row, truncated) of a CSV file read with `encoding`."""
+    with open(path, "r", encoding=encoding, newline="") as f:
+        delimiter = sniff_delimiter(f.read(CSV_SNIFF_BYTES))
+        f.seek(0)
+        reader = csv.reader(f, delimiter=delimiter)
+        index, _, names = split_header(reader, header_row)
+        # Physical lines up to the header (quoted cells may span several)
+        f.seek(0)
+        reader = csv.reader(f, delimiter=delimiter)
+        for _ in range(index + 1):
+            next(reader, None)
+        header_lines = reader.line_num
+
+    chunks, count, truncated = [], 0, False
+    reader = pd.read_csv(
+        path, sep=delimiter, decimal="," if delimiter == ";" else ".", encoding=encoding,
+        header=None, names=names, index_col=False, skiprows=header_lines,
+        keep_default_na=False, na_values=[""], float_precision="round_trip", chunksize=CSV_CHUNK_ROWS,
+    )
+    with reader:
+        for chunk in reader:
+            chunk = chunk.dropna(how="all")
+            if max_rows is not None and count + len(chunk) > max_rows:
+                chunks.append(chunk.iloc[:max_rows - count])
+                truncated = True
+                break
+            chunks.append(chunk)
+            count += len(chunk)
+    frame = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=names)
+    return frame, index + 1, truncated
+
+
+def read_csv(path, header_row=None, max_rows=None):
+    """(frame, info) of a CSV file."""
+    for encoding in CSV_ENCODINGS:
+        try:
+            frame, header_index, truncated = read_csv_frame(path, encoding, header_row, max_rows)
+            break
+        except UnicodeDecodeError:
+            continue
+    else:
+        raise ValueError(f"Could not decode '{path}' (tried {', '.join(CSV_ENCODINGS)})")
+    return frame, {"sheet": None, "headerRow": header_index, "encoding": encoding, "truncated": truncated}
+
+
+def read_cached(key):
+    """(frame, info) stored by write_cached() for the same file and options, else None."""
+    try:
+        with open(CACHE_PATH, "rb") as f:
+            cached_key, frame, info = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, ValueError, TypeError):
+        return None
+    return (frame, info) if cached_key == key else None
+
+
+def write_cached(key, frame, info):
+    try:
+        with open(CACHE_PATH, "wb") as f:
+            pickle.dump((key, frame, info), f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError:
+        pass  # the cache only saves the next script a parse
+
+
+def load(path=INPUT_PATH, sheet=None, header_row=None, max_rows=None):
+    """(data, info): the JSON rows, or a DataFrame of the .xlsx sheet / CSV file; `info` describes it."""
+    fmt = source_format(path)
+    if fmt == "json":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        truncated = max_rows is not None and isinstance(data, list) and len(data) > max_rows
+        if truncated:
+            data = data[:max_rows]
+        return data, {"source": path, "format": fmt, "rowCount": len(data), "truncated": truncated}
+
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size, sheet, header_row, max_rows)
+    cached = read_cached(key)
+    if cached is not None:
+        return cached
+    if fmt == "xlsx":
+        frame, info = read_xlsx(path, sheet, header_row, max_rows)
+    else:
+        frame, info = read_csv(path, header_row, max_rows)
+    info = {"source": path, "format": fmt, **info, "columns": list(frame.columns), "rowCount": len(frame)}
+    write_cached(key, frame, info)
+    return frame, info
+
+
+def read_input(args):
+    """The dataset selected by the input options (see add_arguments)."""
+    return load(args.input, sheet=args.sheet, header_row=args.header_row, max_rows=args.max_rows)[0]
+
+
+def positive_int(text):
+    if not text.isdigit() or int(text) < 1:
+        raise argparse.ArgumentTypeError(f"Invalid value '{text}' (expected a positive integer)")
+    return int(text)
+
+
+def add_arguments(parser, default=INPUT_PATH, several_sheets=False):
+    """The input options, shared by the analyzer scripts."""
+    parser.add_argument("--input", default=default,
+                        help=f"Dataset to read: .json rows, .xlsx workbook or .csv file (default: {default})")
+    if several_sheets:
+        parser.add_argument("--sheet", action="append", default=None, metavar="NAME|N",
+                            help=".xlsx: sheet to read, by name or 1-based position (repeatable; default: all)")
+    else:
+        parser.add_argument("--sheet", default=None, metavar="NAME|N",
+                            help=".xlsx: sheet to read, by name or 1-based position (default: the first)")
+    parser.add_argument("--header-row", type=positive_int, default=None, metavar="N",
+                        help=".xlsx/.csv: 1-based row holding the column names (default: detected)")
+    parser.add_argument("--max-rows", type=positive_int, default=None, metavar="N",
+                        help="Read at most N data rows")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load the dataset (.json, .xlsx or .csv) and describe it.")
+    add_arguments(parser)
+    output.add_arguments(parser)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    start = time.perf_counter()
+
+    try:
+        data, result = load(args.input, sheet=args.sheet, header_row=args.header_row, max_rows=args.max_rows)
+    except (OSError, ValueError) as e:
+        print(json.dumps({"error": str(e)}))
+        sys.exit(1)
+
+    if isinstance(data, list):
+        result["columns"] = list(dict.fromkeys(key for row in data if isinstance(row, dict) for key in row))
+    result["elapsedMs"] = round((time.perf_counter() - start) * 1000, 1)
+
+    output.write_result(result, OUTPUT_PATH, args)
@@ -0,0 +1,82 @@
+"""
+output.py — Write an analyzer result to its /tmp result file and to stdout.
+
+Shared by every data-analyzer script: the result is serialized once and the same text
+is written to both destinations. The scripts' functions return plain Python values (their
+results are also imported, e.g. by analyze_bundle.py); the encoder's `to_json` hook only
+converts a NumPy scalar or array that slipped through.
+
+--compact drops the indentation (smaller result, fewer tokens in the model's context);
+--cap KEY=N keeps at most N items of every `KEY` array (e.g. periods, periodValues,
+valueCounts) and records the number dropped next to it as `<KEY>Omitted`.
+"""
+
+import argparse
+import json
+import sys
+
+import numpy as np
+
+# Arrays ordered oldest to newest: a cap keeps their last (most recent) items
+KEEP_LAST = {"periods", "periodValues"}
+
+
+def to_json(value):
+    """json.dumps `default` hook: NumPy scalars as Python numbers, arrays as lists."""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def cap_arrays(value, caps):
+    """Copy of `value` with every array under a key of `caps` cut to at most caps[key] items."""
+    if isinstance(value, dict):
+        capped = {}
+        for key, item in value.items():
+            limit = caps.get(key)
+            if limit is not None and isinstance(item, list) and len(item) > limit:
+                kept = item[len(item) - limit:] if key in KEEP_LAST else item[:limit]
+                capped[key] = [cap_arrays(entry, caps) for entry in kept]
+                capped[f"{key}Omitted"] = len(item) - limit
+            else:
+                capped[key] = cap_arrays(item, caps)
+        return capped
+    if isinstance(value, list):
+        return [cap_arrays(entry, caps) for entry in value]
+    return value
+
+
+def dumps(result, compact=False, caps=None):
+    """JSON text of a result (indented unless `compact`), after applying `caps`."""
+    if caps:
+        result = cap_arrays(result, caps)
+    if compact:
+        return json.dumps(result, ensure_ascii=False, separators=(",", ":"), default=to_json)
+    return json.dumps(result, ensure_ascii=False, indent=2, default=to_json)
+
+
+def write_result(result, path, args, stdout=sys.stdout):
+    """Serialize `result` once (per --compact / --cap) to `path` and to stdout."""
+    text = dumps(result, compact=args.compact, caps=dict(args.cap))
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    stdout.write(text + "\n")
+
+
+def parse_cap(spec):
+    """'periods=60' -> ('periods', 60)"""
+    key, sep, limit = spec.partition("=")
+    if not sep or not key or not limit.isdigit():
+        raise argparse.ArgumentTypeError(f"Invalid cap '{spec}' (expected KEY=N, e.g. periods=60)")
+    return key, int(limit)
+
+
+def add_arguments(parser):
+    """The output options, shared by every analyzer script."""
+    parser.add_argument("--compact", action="store_true",
+                        help="Write compact JSON (no indentation) to the result file and stdout")
+    parser.add_argument("--cap", action="append", type=parse_cap, default=[], metavar="KEY=N",
+                        help="Keep at most N items of every KEY array, e.g. periods=60, valueCounts=10 "
+                             "(repeatable; periods/periodValues keep the most recent)")
@@ -0,0 +1,247 @@
+"""
+pack_data.py — Pack the dataset into a columnar, dictionary-encoded src/data.js module.
+
+Reads: /tmp/data.json (array of objects)
+Writes: /tmp/data.js (drop-in src/data.js: packed payload + decoder, `export const DATA` rows)
+        /tmp/pack_data_result.json (columns' encodings, size report)
+
+An array of row objects repeats every key on every row. The packed payload stores one
+array per column instead, in the encoding that takes the fewest bytes:
+  dict   values: distinct values, codes: index into `values` per row
+  date   format: strftime pattern, unit: "day"|"second", base: epoch offset of the earliest
+         value, data: offset from `base` per row — only when every value round-trips exactly
+         through `format`
+  plain  data: the values themselves
+
+Decoder contract (columnar-v1): {"format": "columnar-v1", "rowCount": N, "columns": [
+{"name", "encoding", ...}]}; row i of a column is values[codes[i]], base + data[i] formatted
+with `format` (UTC), or data[i]; null stays null. Rows listed in a column's optional
+`missing` did not have the key at all. Decoded rows have their keys in column order (first
+appearance). The decoder is the `unpack` function of the module (DECODER_JS); unpack() below
+is its Python twin, used to check every payload round-trips before it is written.
+
+Usage: python pack_data.py [--compact] [--cap KEY=N ...]   (see output.py)
+"""
+
+import argparse
+import calendar
+import datetime
+import gzip
+import json
+
+import output
+
+INPUT_PATH = "/tmp/data.json"
+MODULE_PATH = "/tmp/data.js"
+OUTPUT_PATH = "/tmp/pack_data_result.json"
+
+# Also checked by the decoder: validate_output.py accepts the src/data.js module_source() writes
+# (app_rules.PACKED_DATA_MARKERS — keep in sync)
+PACKED_FORMAT = "columnar-v1"
+
+# Date formats tried for string columns, with their offset unit
+DATE_FORMATS = (
+    ("%Y-%m-%d", "day"),
+    ("%d/%m/%Y", "day"),
+    ("%m/%d/%Y", "day"),
+    ("%Y/%m/%d", "day"),
+    ("%d-%m-%Y", "day"),
+    ("%Y-%m-%dT%H:%M:%S", "second"),
+    ("%Y-%m-%d %H:%M:%S", "second"),
+)
+UNIT_SECONDS = {"day": 86400, "second": 1}
+EPOCH = datetime.datetime(1970, 1, 1)
+
+DECODER_JS = """function unpack(p) {
+  if (p.format !== 'columnar-v1') throw new Error('Unsupported data format: ' + p.format);
+  const pad = (n, w = 2) => String(n).padStart(w, '0');
+  const part = { Y: d => pad(d.getUTCFullYear(), 4), m: d => pad(d.getUTCMonth() + 1), d: d => pad(d.getUTCDate()),
+    H: d => pad(d.getUTCHours()), M: d => pad(d.getUTCMinutes()), S: d => pad(d.getUTCSeconds()) };
+  const cols = p.columns.map(c => {
+    let get = i => c.data[i];
+    if (c.encoding === 'dict') get = i => c.values[c.codes[i]];
+    if (c.encoding === 'date') {
+      const unit = c.unit === 'day' ? 86400000 : 1000, fmt = c.format.split(/%([YmdHMS])/), seen = new Map();
+      get = i => {
+        const o = c.data[i];
+        if (o === null) return null;
+        let s = seen.get(o);
+        if (s === undefined) {
+          const d = new Date((c.base + o) * unit);
+          s = '';
+          for (let k = 0; k < fmt.length; k++) s += k % 2 ? part[fmt[k]](d) : fmt[k];
+          seen.set(o, s);
+        }
+        return s;
+      };
+    }
+    return { name: c.name, get, missing: c.missing && new Set(c.missing) };
+  });
+  const rows = new Array(p.rowCount);
+  for (let i = 0; i < p.rowCount; i++) {
+    const row = {};
+    for (const c of cols) if (!c.missing || !c.missing.has(i)) row[c.name] = c.get(i);
+    rows[i] = row;
+  }
+  return rows;
+}"""
+
+
+def text_size(value):
+    """Bytes of the compact JSON text of `value`."""
+    return len(json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def date_encoding(values):
+    """(format, unit, {value: epoch offset}) if every non-null value is a date string that
+    round-trips through one of DATE_FORMATS, else None."""
+    distinct = set()
+    for value in values:
+        if value is not None:
+            if not isinstance(value, str):
+                return None
+            distinct.add(value)
+    if not distinct:
+        return None
+    for fmt, unit in DATE_FORMATS:
+        offsets = {}
+        for value in distinct:
+            try:
+                parsed = datetime.datetime.strptime(value, fmt)
+            except ValueError:
+                break
+            if parsed.strftime(fmt) != value:  # e.g. no zero padding: would not decode as written
+                break
+            offsets[value] = calendar.timegm(parsed.timetuple()) // UNIT_SECONDS[unit]
+        else:
+            return fmt, unit, offsets
+    return None
+
+
+def pack_column(name, values, missing):
+    """Smallest encoding of one column (`values` has None at the `missing` rows)."""
+    candidates = [{"name": name, "encoding": "plain", "data": values}]
+
+    try:
+        table = {}
+        # Keyed by type too, so that 1, 1.0 and true stay distinct values
+        codes = [None if i in missing else table.setdefault((type(v), v), len(table)) for i, v in enumerate(values)]
+        candidates.append({"name": name, "encoding": "dict", "values": [v for _, v in table], "codes": codes})
+    except TypeError:
+        pass  # unhashable cells (nested arrays/objects) stay plain
+
+    dates = date_encoding(values)
+    if dates is not None:
+        fmt, unit, offsets = dates
+        base = min(offsets.values())
+        candidates.append({
+            "name": name, "encoding": "date", "format": fmt, "unit": unit, "base": base,
+            "data": [None if v is None else offsets[v] - base for v in values],
+        })
+
+    column = min(candidates, key=text_size)
+    if missing:
+        column["missing"] = sorted(missing)
+    return column
+
+
+def pack(rows):
+    """columnar-v1 payload of a list of row objects."""
+    names = {}
+    for row in rows:
+        for key in row:
+            names.setdefault(key, None)
+    columns = []
+    for name in names:
+        missing = {i for i, row in enumerate(rows) if name not in row}
+        columns.append(pack_column(name, [row.get(name) for row in rows], missing))
+    return {"format": PACKED_FORMAT, "rowCount": len(rows), "columns": columns}
+
+
+def unpack(packed):
+    """Rows of a columnar-v1 payload (Python twin of DECODER_JS)."""
+    rows = [{} for _ in range(packed["rowCount"])]
+    for column in packed["columns"]:
+        missing = set(column.get("missing", ()))
+        encoding = column["encoding"]
+        for i, row in enumerate(rows):
+            if i in missing:
+                continue
+            if encoding == "dict":
+                value = column["values"][column["codes"][i]]
+            else:
+                value = column["data"][i]
+            if encoding == "date" and value is not None:
+                seconds = (column["base"] + value) * UNIT_SECONDS[column["unit"]]
+                value = (EPOCH + datetime.timedelta(seconds=seconds)).strftime(column["format"])
+            row[column["name"]] = value
+    return rows
+
+
+def module_source(packed):
+    """src/data.js exporting the decoded rows as DATA, like the "__INJECT_DATA__" version.
+
+    The payload is embedded as a JSON string: JSON.parse() reads it faster than the engine
+    parses the same object literal.
+    """
+    payload = json.dumps(packed, ensure_ascii=False, separators=(",", ":"))
+    return (f"const PACKED = JSON.parse({json.dumps(payload, ensure_ascii=False)});\n\n"
+            f"{DECODER_JS}\n\nexport const DATA = unpack(PACKED);\n")
+
+
+def size_report(rows, source):
+    raw = json.dumps(rows, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    packed = source.encode("utf-8")
+    return {
+        "rawBytes": len(raw),
+        "packedBytes": len(packed),
+        "decoderBytes": len(DECODER_JS.encode("utf-8")),
+        "rawGzipBytes": len(gzip.compress(raw, 6)),
+        "packedGzipBytes": len(gzip.compress(packed, 6)),
+        "ratio": round(len(packed) / len(raw), 3) if raw else None,
+    }
+
+
+def pack_module(rows):
+    """(src/data.js source, result) for `rows`; raises ValueError if the payload does not round-trip."""
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        raise ValueError("Input must be an array of objects")
+    packed = pack(rows)
+    if unpack(packed) != rows:
+        raise ValueError("Packed payload does not decode to the input rows")
+    source = module_source(packed)
+    return source, {
+        "format": PACKED_FORMAT,
+        "rowCount": packed["rowCount"],
+        "columns": [
+            {key: column[key] for key in ("name", "encoding", "format", "unit") if key in column}
+            | ({"distinct": len(column["values"])} if column["encoding"] == "dict" else {})
+            for column in packed["columns"]
+        ],
+        "sizes": size_report(rows, source),
+        "module": MODULE_PATH,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Pack the dataset into a columnar src/data.js module.")
+    output.add_arguments(parser)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    with open(INPUT_PATH, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    try:
+        source, result = pack_module(data)
+    except ValueError as e:
+        source, result = None, {"error": str(e)}
+
+    if source is not None:
+        with open(MODULE_PATH, 'w', encoding='utf-8') as f:
+            f.write(source)
+
+    output.write_result(result, OUTPUT_PATH, args)
@@ -5,17 +5,117 @@ Reads: /tmp/analyze_columns_result.json + /tmp/detect_periods_result.json + /tmp
 Writes: /tmp/suggest_charts_result.json
 
 Recommendations: AreaChart, LineChart, BarChart, PieChart, StackedBarChart, Table
+
+Usage: python suggest_charts.py [--render-budget 1000] [--compact] [--cap KEY=N ...]   (see output.py)
+
+Every recommendation carries `estimatedPoints` (points x series, or bars x segments) and a
+`renderCost` class. Temporal charts over the render budget are aggregated to a coarser
+period (`granularity`), and stacked bars keep the top categories plus an "Autres" bucket.
 """
 
+import argparse
+import datetime
 import json
+import math
+
+import output
 
 COLUMNS_PATH = "/tmp/analyze_columns_result.json"
 PERIODS_PATH = "/tmp/detect_periods_result.json"
 STATS_PATH = "/tmp/compute_stats_result.json"
 OUTPUT_PATH = "/tmp/suggest_charts_result.json"
 
+# Max SVG elements (points x series, bars x segments) for a chart to stay responsive
+RENDER_BUDGET = 1000
+MAX_STACK_SEGMENTS = 8
+TABLE_PAGE_SIZE = 25
+OTHER_BUCKET = "Autres"
+
+GRANULARITIES = ["daily", "weekly", "monthly", "quarterly", "yearly"]
+
+
+def render_cost(points, budget):
+    """Cost class of a chart drawing `points` SVG elements."""
+    if points <= budget // 4:
+        return "light"
+    if points <= budget:
+        return "medium"
+    return "heavy"
+
+
+def with_cost(rec, points, budget):
+    rec["estimatedPoints"] = int(points)
+    rec["renderCost"] = render_cost(points, budget)
+    return rec
+
+
+def period_bucket(date, granularity):
+    if granularity == "weekly":
+        return date.isocalendar()[:2]
+    if granularity == "monthly":
+        return (date.year, date.month)
+    if granularity == "quarterly":
+        return (date.year, (date.month - 1) // 3)
+    if granularity == "yearly":
+        return date.year
+    return date
+
+
+def fit_granularity(periods_info, elements_per_period, budget):
+    """Finest period granularity whose element count fits the budget.
+
+    Returns (granularity, period_count). Only ISO-dated periods (from detect_periods.py
+    datetime detection) can be re-bucketed; month names and quarters are kept as-is.
+    When detect_periods.py ran with --cap periods=N, the coarser counts are extrapolated
+    from the periods kept.
+    """
+    period_type = periods_info.get("periodType", "")
+    periods = periods_info.get("periods", [])
+    total = len(periods) + periods_info.get("periodsOmitted", 0)
+    if total * elements_per_period <= budget or period_type not in GRANULARITIES:
+        return period_type, total
+    try:
+        dates = [datetime.date.fromisoformat(str(p)) for p in periods]
+    except ValueError:
+        return period_type, total
+
+    period_count = total
+    for granularity in GRANULARITIES[GRANULARITIES.index(period_type) + 1:]:
+        period_count = math.ceil(len({period_bucket(d, granularity) for d in dates}) * total / len(dates))
+        if period_count * elements_per_period <= budget:
+            return granularity, period_count
+    return GRANULARITIES[-1], period_count
 
-def suggest(columns_info, periods_info, stats_info):
+
+def temporal_chart(rec, periods_info, budget):
+    """Attach the point estimate to a period-based chart, coarsening the period if needed."""
+    series_count = len(rec["yKeys"])
+    granularity, period_count = fit_granularity(periods_info, series_count, budget)
+    if granularity != periods_info.get("periodType", ""):
+        rec["granularity"] = granularity
+        rec["reason"] += f" — agrege en {granularity} (budget de rendu)"
+    return with_cost(rec, period_count * series_count, budget)
+
+
+def distinct_metrics(numeric_cols, stats_info):
+    """Keep one metric per redundancy cluster reported by compute_stats.py (`cluster`)."""
+    seen = set()
+    distinct = []
+    for col in numeric_cols:
+        cluster = stats_info.get(col["name"], {}).get("cluster", col["name"])
+        if cluster not in seen:
+            seen.add(cluster)
+            distinct.append(col)
+    return distinct
+
+
+def variability(col, stats_info):
+    """Scale-free variability (cv) when available, raw stddev for older stats results."""
+    col_stats = stats_info.get(col["name"], {})
+    return col_stats.get("cv", col_stats.get("stddev", 0))
+
+
+def suggest(columns_info, periods_info, stats_info, render_budget=RENDER_BUDGET):
     recommendations = []
 
     # Classify columns
@@ -27,49 +127,54 @@ def suggest(columns_info, periods_info, stats_info):
     period_col = periods_info.get("periodColumn")
     period_type = periods_info.get("periodType", "")
 
+    # Near-duplicate metrics (e.g. HT/TTC) would draw the same line twice
+    metric_cols = distinct_metrics(numeric_cols, stats_info)
+    pruned = len(numeric_cols) - len(metric_cols)
+
     # 1. Temporal trends — numeric over time
     if has_periods and period_col and numeric_cols:
-        if len(numeric_cols) == 1:
-            col = numeric_cols[0]
-            recommendations.append({
+        if len(metric_cols) == 1:
+            col = metric_cols[0]
+            recommendations.append(temporal_chart({
                 "chartType": "AreaChart",
                 "xKey": period_col,
                 "yKeys": [col["name"]],
                 "reason": f"Tendance temporelle de {col['name']} ({period_type})",
                 "title": f"Evolution de {col['name']}"
-            })
-        elif len(numeric_cols) <= 4:
-            recommendations.append({
+            }, periods_info, render_budget))
+        elif len(metric_cols) <= 4:
+            recommendations.append(temporal_chart({
                 "chartType": "LineChart",
                 "xKey": period_col,
-                "yKeys": [c["name"] for c in numeric_cols],
-                "reason": f"Comparaison de {len(numeric_cols)} metriques sur {period_type}",
+                "yKeys": [c["name"] for c in metric_cols],
+                "reason": f"Comparaison de {len(metric_cols)} metriques sur {period_type}"
+                          + (f" ({pruned} metrique(s) redondante(s) ecartee(s))" if pruned else ""),
                 "title": "Evolution des indicateurs"
-            })
+            }, periods_info, render_budget))
         else:
-            # Too many — pick top 3 by variance
-            sorted_cols = sorted(numeric_cols,
-                key=lambda c: stats_info.get(c["name"], {}).get("stddev", 0),
+            # Too many — pick the 3 most variable, one per redundancy cluster
+            sorted_cols = sorted(metric_cols,
+                key=lambda c: variability(c, stats_info),
                 reverse=True)[:3]
-            recommendations.append({
+            recommendations.append(temporal_chart({
                 "chartType": "LineChart",
                 "xKey": period_col,
                 "yKeys": [c["name"] for c in sorted_cols],
-                "reason": f"Top 3 metriques les plus variables sur {period_type}",
+                "reason": f"Top 3 metriques les plus variables (non redondantes) sur {period_type}",
                 "title": "Indicateurs principaux"
-            })
+            }, periods_info, render_budget))
 
         # Also add AreaChart for the main metric if LineChart was chosen
-        if len(numeric_cols) > 1:
+        if len(metric_cols) > 1:
             main_col = max(numeric_cols,
                 key=lambda c: stats_info.get(c["name"], {}).get("sum", 0))
-            recommendations.append({
+            recommendations.append(temporal_chart({
                 "chartType": "AreaChart",
                 "xKey": period_col,
                 "yKeys": [main_col["name"]],
                 "reason": f"Tendance du principal indicateur ({main_col['name']})",
                 "title": f"Evolution de {main_col['name']}"
-            })
+            }, periods_info, render_budget))
 
     # 2. Category comparison — BarChart
     if categorical_cols and numeric_cols:
@@ -83,13 +188,13 @@ def suggest(columns_info, periods_info, stats_info):
             main_numeric = max(numeric_cols,
                 key=lambda c: stats_info.get(c["name"], {}).get("sum", 0))
 
-            recommendations.append({
+            recommendations.append(with_cost({
                 "chartType": "BarChart",
                 "xKey": cat_col["name"],
                 "yKeys": [main_numeric["name"]],
                 "reason": f"Comparaison de {main_numeric['name']} par {cat_col['name']} ({unique_count} categories)",
                 "title": f"{main_numeric['name']} par {cat_col['name']}"
-            })
+            }, unique_count, render_budget))
 
     # 3. PieChart — distribution for low-cardinality categories
     if categorical_cols and numeric_cols:
@@ -105,13 +210,13 @@ def suggest(columns_info, periods_info, stats_info):
                 min_val = main_stats.get("min", 0)
                 if min_val < 0:
                     continue  # Negative values — skip PieChart
-                recommendations.append({
+                recommendations.append(with_cost({
                     "chartType": "PieChart",
                     "xKey": cat_col["name"],
                     "yKeys": [main_numeric["name"]],
                     "reason": f"Repartition de {main_numeric['name']} par {cat_col['name']} ({unique_count} categories, ideal pour PieChart)",
                     "title": f"Repartition par {cat_col['name']}"
-                })
+                }, unique_count, render_budget))
             elif unique_count <= 10:
                 # Suggest BarChart instead of PieChart for 7-10 categories
                 pass  # Already covered by BarChart above
@@ -122,39 +227,56 @@ def suggest(columns_info, periods_info, stats_info):
         cat_stats = stats_info.get(cat_col["name"], {})
         unique_count = cat_stats.get("uniqueCount", cat_col.get("uniqueCount", 0))
 
-        if unique_count <= 8:
+        # Segments per bar: all categories, or the top ones plus an "Autres" bucket
+        segments = min(unique_count, MAX_STACK_SEGMENTS)
+        granularity, period_count = fit_granularity(periods_info, segments, render_budget)
+        while period_count * segments > render_budget and segments > 2:
+            segments -= 1
+
+        if unique_count > 0:
             main_numeric = max(numeric_cols,
                 key=lambda c: stats_info.get(c["name"], {}).get("sum", 0))
-            recommendations.append({
+            rec = {
                 "chartType": "StackedBarChart",
                 "xKey": period_col,
                 "yKeys": [main_numeric["name"]],
                 "stackKey": cat_col["name"],
                 "reason": f"Composition de {main_numeric['name']} par {cat_col['name']} au fil du temps",
-                "title": f"{main_numeric['name']} par {cat_col['name']} ({period_type})"
-            })
+                "title": f"{main_numeric['name']} par {cat_col['name']} ({granularity})"
+            }
+            if segments < unique_count:
+                rec["topN"] = segments - 1
+                rec["otherBucket"] = OTHER_BUCKET
+                rec["reason"] += f" — top {segments - 1} + {OTHER_BUCKET}"
+            if granularity != period_type:
+                rec["granularity"] = granularity
+                rec["reason"] += f" — agrege en {granularity} (budget de rendu)"
+            recommendations.append(with_cost(rec, period_count * segments, render_budget))
 
     # 5. No periods, multiple numerics — grouped bar (cap at 20 rows)
     if not has_periods and len(numeric_cols) >= 2 and not categorical_cols:
         main_stats = stats_info.get(numeric_cols[0]["name"], {})
         row_count = main_stats.get("count", 0)
         if row_count <= 20:
-            recommendations.append({
+            y_keys = [c["name"] for c in numeric_cols[1:4]]
+            recommendations.append(with_cost({
                 "chartType": "BarChart",
                 "xKey": numeric_cols[0]["name"],
-                "yKeys": [c["name"] for c in numeric_cols[1:4]],
+                "yKeys": y_keys,
                 "reason": "Comparaison directe entre metriques numeriques",
                 "title": "Comparaison des indicateurs"
-            })
+            }, row_count * len(y_keys), render_budget))
 
     # 6. Table recommendation — always suggest if there are enough columns
     if len(columns_info) >= 3:
-        recommendations.append({
+        # Paginated: only one page of cells is rendered at a time
+        row_count = max((c.get("totalCount", 0) for c in columns_info), default=0)
+        recommendations.append(with_cost({
             "chartType": "Table",
             "columns": [c["name"] for c in columns_info],
             "reason": "Vue tabulaire des donnees brutes avec tri et filtrage",
             "title": "Donnees detaillees"
-        })
+        }, min(row_count, TABLE_PAGE_SIZE) * len(columns_info), render_budget))
 
     # Remove duplicates (same chartType + same xKey)
     seen = set()
@@ -169,7 +291,17 @@ def suggest(columns_info, periods_info, stats_info):
     return unique_recs[:6]
 
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Recommend chart types based on data analysis.")
+    parser.add_argument("--render-budget", type=int, default=RENDER_BUDGET,
+                        help=f"Max SVG elements per chart before aggregating (default: {RENDER_BUDGET})")
+    output.add_arguments(parser)
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
+    args = parse_args()
+
     with open(COLUMNS_PATH, 'r', encoding='utf-8') as f:
         columns_info = json.load(f)
 
@@ -179,9 +311,6 @@ if __name__ == "__main__":
     with open(STATS_PATH, 'r', encoding='utf-8') as f:
         stats_info = json.load(f)
 
-    result = suggest(columns_info, periods_info, stats_info)
-
-    with open(OUTPUT_PATH, 'w', encoding='utf-8') as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
+    result = suggest(columns_info, periods_info, stats_info, render_budget=args.render_budget)
 
-    print(json.dumps(result, ensure_ascii=False, indent=2))
+    output.write_result(result, OUTPUT_PATH, args)
@@ -10,158 +10,892 @@ Checks for:
 - Missing error handling in async functions
 - Insecure patterns (dangerouslySetInnerHTML, href="javascript:")
 - Large files
+- Performance ("performance" severity): whole-library imports, JSON.parse of large inline
+  strings, lists rendered without pagination or virtualization, setInterval without
+  clearInterval, images without dimensions or lazy loading
+
+Usage: python check_web_app.py [--check-budget-ms N] [--file-budget-ms N] [--cache PATH] [--workers N]
+                                [--max-file-bytes N] [--minified reduced|skip] [--format json|ndjson]
+                                [--max-issues N] [--fail-fast-on SEVERITY] /path/to/webapp/
+
+Files are discovered with os.scandir, honoring .gitignore / .ignore files (see
+ignore_rule) and skipping SKIP_DIRS. Files over --max-file-bytes are not read, and
+files whose first few KB look minified or generated (long lines, or character
+entropy of encoded data) only get the secret checks (--minified reduced) or none
+(--minified skip). Both are listed with the reason in "skipped_files" and
+"reduced_files".
+
+Patterns are written to match in linear time (no overlapping quantifiers), and
+every check runs under a per-check and per-file time budget: a check that runs
+out is listed in "skipped_checks" as "skipped: budget exceeded" instead of
+stalling the review (e.g. on a minified bundle).
+
+With --cache, each file's results are kept on disk by content hash (see
+ResultCache): a re-run skips unchanged files after a stat, and a file that changed
+only has its changed lines scanned again. The issues are the same as a full run.
+
+Files are checked on a process pool (--workers, default: available cores) and
+merged in sorted path order, so the output is the same as with --workers 1.
+
+The summary also reports "source_bytes" (total size of the code files found) and
+"largest_files", from the sizes the discovery walk already stat()ed.
+
+--format ndjson writes each issue as a {"type": "issue", ...} line as soon as its file
+is merged, then a {"type": "summary", ...} line with the counts and lists of the json
+report. --max-issues N and --fail-fast-on SEVERITY stop the scan early (files not
+started yet are dropped); "stopped" then says why, and --fail-fast-on exits with status 1.
 """
 
 import sys
 import os
 import re
 import json
+import time
+import argparse
+import bisect
+import difflib
+import hashlib
+import itertools
+import math
+from collections import Counter, deque
+
+# Time budgets (ms): per check, and for the whole file
+CHECK_BUDGET_MS = 250
+FILE_BUDGET_MS = 2000
+SKIPPED_REASON = 'skipped: budget exceeded'
+# Issue severities, most severe first (--fail-fast-on stops at that level or above)
+SEVERITIES = ('critical', 'high', 'medium', 'low', 'performance')
+
+SECRET_PATTERNS = [
+    # The token is captured in a lookahead and re-matched by backreference (an atomic group):
+    # a long token with no closing quote is scanned once instead of being backtracked over
+    (re.compile(r'(?i)(api[_-]?key|apikey|secret[_-]?key|access[_-]?token|password|passwd|private[_-]?key)\s*[:=]\s*["\'](?=([A-Za-z0-9+/=_\-]{8,}))\2["\']'), 'HARDCODED_SECRET', 'Potential hardcoded secret — use environment variables'),
+    (re.compile(r'(?i)(sk-[A-Za-z0-9]{32,}|AKIA[A-Z0-9]{16}|ghp_[A-Za-z0-9]{36})'), 'EXPOSED_KEY', 'Looks like an API key or token hardcoded in source'),
+]
+
+
+class Budget:
+    """Per-check and per-file time limits for one file.
+
+    Checks walk the file through lines(), which stops early once the running check's
+    deadline (or the file's) has passed and records the check in `skipped`. `timings`
+    collects the ms spent per line check (prefilter included).
+    """
+
+    def __init__(self, check_ms=CHECK_BUDGET_MS, file_ms=FILE_BUDGET_MS):
+        self.check_s = check_ms / 1000
+        self.file_deadline = time.perf_counter() + file_ms / 1000
+        self.skipped = []
+        self.timings = {}
+
+    def lines(self, rule, numbered):
+        """The (line number, line) pairs of `numbered`, under the budget of `rule`."""
+        deadline = min(time.perf_counter() + self.check_s, self.file_deadline)
+        for i, line in numbered:
+            if time.perf_counter() > deadline:
+                self.skipped.append(rule)
+                return
+            yield i, line
+
+
+def commented(line):
+    return line.strip().startswith('//')
+
+
+def secret_check(pattern):
+    return lambda line: pattern.search(line) and 'process.env' not in line and 'import.meta.env' not in line
+
+
+EVAL_RE = re.compile(r'\beval\s*\(')
+INNERHTML_RE = re.compile(r'\.innerHTML\s*=')
+DOCUMENT_WRITE_RE = re.compile(r'\bdocument\.write\s*\(')
+JAVASCRIPT_HREF_RE = re.compile(r'href\s*=\s*["\']javascript:', re.IGNORECASE)
+THEN_RE = re.compile(r'\.then\s*\(')
+CONSOLE_RE = re.compile(r'\bconsole\.(log|warn|error|debug|info)\s*\(')
+DEBUGGER_RE = re.compile(r'\bdebugger\b')
+BROWSER_DIALOG_RE = re.compile(r'\b(alert|confirm|prompt)\s*\(')
+TODO_RE = re.compile(r'\b(TODO|FIXME|HACK|XXX)\b')
+MAP_RE = re.compile(r'\.map\s*\(\s*[\w(]')
+# Default or namespace import (or require) of a package that is only tree-shaken through named imports
+WHOLE_LIBRARY_RE = re.compile(
+    r"""(?:\bimport\s+(?:\*\s*as\s+)?[\w$]+\s+from\s*|\brequire\(\s*)['"]"""
+    r"""(?:lodash|underscore|ramda|rxjs|date-fns|antd|@mui/material|@mui/icons-material|lucide-react"""
+    r"""|react-icons/[\w-]+|@fortawesome/[\w-]+)['"]""")
+INLINE_JSON_PARSE_RE = re.compile(r'JSON\.parse\(\s*[\'"`]')
+SET_INTERVAL_RE = re.compile(r'\bsetInterval\s*\(')
+IMG_TAG_RE = re.compile(r'<img\b', re.IGNORECASE)
+# End of a tag: `/>`, or a `>` that does not end an arrow (`=>`) in an attribute value
+TAG_END_RE = re.compile(r'/>|(?<!=)>')
+LIST_ROW_RE = re.compile(r'<(?:tr|li)\b|<\w*(?:Row|Item)\b')
+# Lines this long holding JSON.parse('...') parse a large inline blob at load time
+INLINE_JSON_CHARS = 100_000
+# Lines after an <img> line searched for the end of its tag
+IMG_TAG_LINES = 5
+VIRTUALIZATION_LIBRARIES = ('react-window', 'react-virtualized', 'react-virtuoso', '@tanstack/react-virtual',
+                            'vue-virtual-scroller')
+
+# Line-local checks, in report order: whether a line matches depends on that line only,
+# so a re-check can keep the previous run's result for every unchanged line
+LINE_CHECKS = [(rule, secret_check(pattern)) for pattern, rule, _ in SECRET_PATTERNS] + [
+    ('EVAL_USAGE', lambda line: EVAL_RE.search(line) and not commented(line)),
+    ('UNSAFE_INNERHTML', lambda line: INNERHTML_RE.search(line) and not commented(line)),
+    ('DANGEROUS_HTML', lambda line: 'dangerouslySetInnerHTML' in line),
+    ('DOCUMENT_WRITE', lambda line: DOCUMENT_WRITE_RE.search(line) and not commented(line)),
+    ('JAVASCRIPT_HREF', lambda line: JAVASCRIPT_HREF_RE.search(line)),
+    ('MISSING_CATCH', lambda line: THEN_RE.search(line)),  # candidates; the window check is per file
+    ('CONSOLE_STATEMENTS', lambda line: CONSOLE_RE.search(line) and not commented(line)),
+    ('DEBUGGER_STATEMENT', lambda line: DEBUGGER_RE.search(line) and not commented(line)),
+    ('BROWSER_DIALOG', lambda line: BROWSER_DIALOG_RE.search(line) and not commented(line)),
+    ('TODO_COMMENTS', lambda line: TODO_RE.search(line)),
+    ('MISSING_KEY_PROP', lambda line: MAP_RE.search(line) and 'key=' not in line),  # .jsx/.tsx only
+    ('WHOLE_LIBRARY_IMPORT', lambda line: WHOLE_LIBRARY_RE.search(line) and not commented(line)),
+    ('INLINE_JSON_PARSE', lambda line: len(line) >= INLINE_JSON_CHARS and INLINE_JSON_PARSE_RE.search(line)),
+    ('UNVIRTUALIZED_LIST', lambda line: MAP_RE.search(line) and '.slice(' not in line),  # .jsx/.tsx only; candidates
+    ('INTERVAL_WITHOUT_CLEANUP', lambda line: SET_INTERVAL_RE.search(line) and not commented(line)),
+    ('UNOPTIMIZED_IMAGE', lambda line: IMG_TAG_RE.search(line)),  # candidates; the tag is read per file
+]
+# Checks that only apply to .jsx/.tsx files
+JSX_CHECKS = ('MISSING_KEY_PROP', 'UNVIRTUALIZED_LIST')
+
+# Literal prefilter: a line can only match a check if it holds one of its literals, so
+# each file is searched for the literals (str.find) and the patterns above only run on
+# the lines found. Case-insensitive checks search the lowercased file.
+TRIGGERS = {
+    'HARDCODED_SECRET': (('api', 'secret', 'access', 'passw', 'private'), True),
+    'EXPOSED_KEY': (('sk-', 'akia', 'ghp_'), True),
+    'EVAL_USAGE': (('eval',), False),
+    'UNSAFE_INNERHTML': (('.innerHTML',), False),
+    'DANGEROUS_HTML': (('dangerouslySetInnerHTML',), False),
+    'DOCUMENT_WRITE': (('document.write',), False),
+    'JAVASCRIPT_HREF': (('javascript:',), True),
+    'MISSING_CATCH': (('.then',), False),
+    'CONSOLE_STATEMENTS': (('console.',), False),
+    'DEBUGGER_STATEMENT': (('debugger',), False),
+    'BROWSER_DIALOG': (('alert', 'confirm', 'prompt'), False),
+    'TODO_COMMENTS': (('TODO', 'FIXME', 'HACK', 'XXX'), False),
+    'MISSING_KEY_PROP': (('.map',), False),
+    'WHOLE_LIBRARY_IMPORT': (('lodash', 'underscore', 'ramda', 'rxjs', 'date-fns', 'antd', '@mui/', 'lucide-react',
+                              'react-icons', '@fortawesome'), False),
+    'INLINE_JSON_PARSE': (('JSON.parse',), False),
+    'UNVIRTUALIZED_LIST': (('.map',), False),
+    'INTERVAL_WITHOUT_CLEANUP': (('setInterval',), False),
+    'UNOPTIMIZED_IMAGE': (('<img',), True),
+}
+
+# Checks run on minified / generated files: line-based style checks mean nothing on a
+# bundle, but a key pasted into one is still exposed, and an inline JSON blob still parsed
+REDUCED_CHECKS = ('HARDCODED_SECRET', 'EXPOSED_KEY', 'INLINE_JSON_PARSE')
+
+# A cached run is only reused by the same version of these checks
+with open(__file__, 'rb') as _f:
+    RULESET_VERSION = hashlib.sha1(_f.read()).hexdigest()[:12]
+
+
+def line_map(old_lines, new_lines):
+    """For each new line, the index of the same line in the old version, or None if it changed."""
+    limit = min(len(old_lines), len(new_lines))
+    prefix = 0
+    while prefix < limit and old_lines[prefix] == new_lines[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and old_lines[-1 - suffix] == new_lines[-1 - suffix]:
+        suffix += 1
+    # Only the region between the common prefix and suffix needs a real diff
+    matcher = difflib.SequenceMatcher(
+        None, old_lines[prefix:len(old_lines) - suffix], new_lines[prefix:len(new_lines) - suffix],
+    )
+    mapping = list(range(prefix)) + [None] * (len(new_lines) - prefix)
+    for a, b, size in matcher.get_matching_blocks():
+        mapping[prefix + b:prefix + b + size] = range(prefix + a, prefix + a + size)
+    mapping[len(new_lines) - suffix:] = range(len(old_lines) - suffix, len(old_lines))
+    return mapping
+
 
-def check_file(filepath, content):
+def line_starts(text):
+    """Offset of every line of `text` (as split by splitlines), plus the end as a sentinel."""
+    return [0, *itertools.accumulate(map(len, text.splitlines(keepends=True)))]
+
+
+def trigger_lines(text, starts, literals):
+    """Sorted 1-based numbers of the lines of `text` holding one of `literals`."""
+    found = set()
+    for literal in literals:
+        pos = text.find(literal)
+        while pos >= 0:
+            line = bisect.bisect_right(starts, pos)
+            found.add(line)
+            # One occurrence per line is enough: go on from the next line
+            pos = text.find(literal, starts[line])
+    return sorted(found)
+
+
+def triggered(rule, line):
+    literals, ignore_case = TRIGGERS[rule]
+    if ignore_case:
+        line = line.lower()
+    return any(literal in line for literal in literals)
+
+
+def image_tag(lines, line_no):
+    """Text of the first <img> tag starting on line `line_no` (1-based), read over up to IMG_TAG_LINES lines."""
+    window = '\n'.join(lines[line_no - 1:line_no - 1 + IMG_TAG_LINES])
+    tag = window[IMG_TAG_RE.search(window).start():]
+    end = TAG_END_RE.search(tag)
+    return tag[:end.end()] if end else tag
+
+
+def scan_lines(filepath, content, lines, lowered, budget, previous=None, rules=None):
+    """Line numbers matched by each line-local check (`lowered`: content.lower()).
+
+    `rules` limits the scan to those checks (reduced mode); the others get no entry.
+
+    With `previous` (the cached run over an earlier version of the file), unchanged lines
+    keep their previous result and only changed lines are scanned; checks the budget cut
+    short last time are scanned in full.
+    """
+    checks = [(rule, matches) for rule, matches in LINE_CHECKS
+              if (rule not in JSX_CHECKS or filepath.endswith(('.jsx', '.tsx')))
+              and (rules is None or rule in rules)]
+    full = [rule for rule, _ in checks
+            if previous is None or rule not in previous['hits'] or rule in previous['skipped']]
+    if full:
+        starts = line_starts(content)
+        # Lowercasing a few characters (e.g. U+0130) changes their length
+        lowered_starts = starts if len(lowered) == len(content) else line_starts(lowered)
+    if previous is not None:
+        mapping = line_map(previous['content'].splitlines(), lines)
+        new_line = {old + 1: i + 1 for i, old in enumerate(mapping) if old is not None}
+        changed = [(i + 1, lines[i]) for i, old in enumerate(mapping) if old is None]
+
+    hits = {}
+    for rule, matches in checks:
+        start = time.perf_counter()
+        if rule in full:
+            literals, ignore_case = TRIGGERS[rule]
+            candidates = (trigger_lines(lowered, lowered_starts, literals) if ignore_case
+                          else trigger_lines(content, starts, literals))
+            numbered = ((i, lines[i - 1]) for i in candidates)
+            hits[rule] = [i for i, line in budget.lines(rule, numbered) if matches(line)]
+        else:
+            kept = [new_line[i] for i in previous['hits'][rule] if i in new_line]
+            found = [i for i, line in budget.lines(rule, changed) if triggered(rule, line) and matches(line)]
+            hits[rule] = sorted(kept + found)
+        budget.timings[rule] = budget.timings.get(rule, 0.0) + (time.perf_counter() - start) * 1000
+    return hits
+
+
+def check_file(filepath, content, budget=None, cache=None, reduced=False):
+    """Issues found in one file; checks that ran out of time are appended to `budget.skipped`.
+
+    `cache` (a dict) carries the previous run over this file between fix iterations: when it
+    holds one, only the changed lines are scanned again — the issues are the same as a full
+    run. It is then replaced with this run's state.
+
+    `reduced` (minified or generated files) runs the REDUCED_CHECKS only.
+    """
     issues = []
     lines = content.splitlines()
     rel_path = filepath
+    budget = budget or Budget()
+    previous = cache if cache and cache.get('ruleset') == RULESET_VERSION else None
+    # File-level facts, computed once
+    lowered = content.lower()
+    sanitized = 'DOMPurify' in content or 'sanitize' in lowered
+    hits = scan_lines(filepath, content, lines, lowered, budget, previous, REDUCED_CHECKS if reduced else None)
+    if cache is not None:
+        cache.clear()
+        cache.update({'ruleset': RULESET_VERSION, 'content': content, 'hits': hits, 'skipped': list(budget.skipped)})
+    if reduced:
+        hits = {rule: hits.get(rule, []) for rule, _ in LINE_CHECKS}
 
     # --- CRITICAL: Hardcoded secrets ---
-    secret_patterns = [
-        (r'(?i)(api[_-]?key|apikey|secret[_-]?key|access[_-]?token|password|passwd|private[_-]?key)\s*[:=]\s*["\'][A-Za-z0-9+/=_\-]{8,}["\']', 'HARDCODED_SECRET', 'Potential hardcoded secret — use environment variables'),
-        (r'(?i)(sk-[A-Za-z0-9]{32,}|AKIA[A-Z0-9]{16}|ghp_[A-Za-z0-9]{36})', 'EXPOSED_KEY', 'Looks like an API key or token hardcoded in source'),
-    ]
-    for pattern, rule, msg in secret_patterns:
-        for i, line in enumerate(lines, 1):
-            if re.search(pattern, line) and 'process.env' not in line and 'import.meta.env' not in line:
-                issues.append({'severity': 'critical', 'rule': rule, 'file': rel_path, 'line': i, 'message': msg, 'fix': 'Replace with process.env.YOUR_VAR or import.meta.env.VITE_YOUR_VAR'})
+    for pattern, rule, msg in SECRET_PATTERNS:
+        for i in hits[rule]:
+            issues.append({'severity': 'critical', 'rule': rule, 'file': rel_path, 'line': i, 'message': msg, 'fix': 'Replace with process.env.YOUR_VAR or import.meta.env.VITE_YOUR_VAR'})
 
     # --- CRITICAL: eval() ---
-    for i, line in enumerate(lines, 1):
-        stripped = line.strip()
-        if re.search(r'\beval\s*\(', stripped) and not stripped.startswith('//'):
-            issues.append({'severity': 'critical', 'rule': 'EVAL_USAGE', 'file': rel_path, 'line': i, 'message': 'eval() is a security risk — enables code injection attacks', 'fix': 'Replace eval() with JSON.parse() or a safe alternative'})
+    for i in hits['EVAL_USAGE']:
+        issues.append({'severity': 'critical', 'rule': 'EVAL_USAGE', 'file': rel_path, 'line': i, 'message': 'eval() is a security risk — enables code injection attacks', 'fix': 'Replace eval() with JSON.parse() or a safe alternative'})
 
     # --- CRITICAL: innerHTML assignment (not reading) ---
-    for i, line in enumerate(lines, 1):
-        if re.search(r'\.innerHTML\s*=', line) and not line.strip().startswith('//'):
-            issues.append({'severity': 'critical', 'rule': 'UNSAFE_INNERHTML', 'file': rel_path, 'line': i, 'message': 'Direct innerHTML assignment can cause XSS — sanitize user content', 'fix': 'Use textContent for plain text, or DOMPurify.sanitize() for HTML'})
+    for i in hits['UNSAFE_INNERHTML']:
+        issues.append({'severity': 'critical', 'rule': 'UNSAFE_INNERHTML', 'file': rel_path, 'line': i, 'message': 'Direct innerHTML assignment can cause XSS — sanitize user content', 'fix': 'Use textContent for plain text, or DOMPurify.sanitize() for HTML'})
 
     # --- CRITICAL: dangerouslySetInnerHTML without sanitization ---
-    for i, line in enumerate(lines, 1):
-        if 'dangerouslySetInnerHTML' in line and 'DOMPurify' not in content and 'sanitize' not in content.lower():
-            issues.append({'severity': 'critical', 'rule': 'DANGEROUS_HTML', 'file': rel_path, 'line': i, 'message': 'dangerouslySetInnerHTML used without sanitization — XSS risk', 'fix': 'Wrap with DOMPurify.sanitize() or use textContent'})
-            break  # Only report once per file
+    if hits['DANGEROUS_HTML'] and not sanitized:
+        # Only report once per file
+        issues.append({'severity': 'critical', 'rule': 'DANGEROUS_HTML', 'file': rel_path, 'line': hits['DANGEROUS_HTML'][0], 'message': 'dangerouslySetInnerHTML used without sanitization — XSS risk', 'fix': 'Wrap with DOMPurify.sanitize() or use textContent'})
 
     # --- CRITICAL: document.write ---
-    for i, line in enumerate(lines, 1):
-        if re.search(r'\bdocument\.write\s*\(', line) and not line.strip().startswith('//'):
-            issues.append({'severity': 'critical', 'rule': 'DOCUMENT_WRITE', 'file': rel_path, 'line': i, 'message': 'document.write() overwrites the entire page and is an XSS vector', 'fix': 'Use DOM manipulation (appendChild, innerHTML with sanitization) instead'})
+    for i in hits['DOCUMENT_WRITE']:
+        issues.append({'severity': 'critical', 'rule': 'DOCUMENT_WRITE', 'file': rel_path, 'line': i, 'message': 'document.write() overwrites the entire page and is an XSS vector', 'fix': 'Use DOM manipulation (appendChild, innerHTML with sanitization) instead'})
 
     # --- HIGH: href="javascript:" ---
-    for i, line in enumerate(lines, 1):
-        if re.search(r'href\s*=\s*["\']javascript:', line, re.IGNORECASE):
-            issues.append({'severity': 'high', 'rule': 'JAVASCRIPT_HREF', 'file': rel_path, 'line': i, 'message': 'href="javascript:..." is an XSS vector', 'fix': 'Use onClick handler or a proper link with "#" and e.preventDefault()'})
+    for i in hits['JAVASCRIPT_HREF']:
+        issues.append({'severity': 'high', 'rule': 'JAVASCRIPT_HREF', 'file': rel_path, 'line': i, 'message': 'href="javascript:..." is an XSS vector', 'fix': 'Use onClick handler or a proper link with "#" and e.preventDefault()'})
 
     # --- HIGH: .catch() missing on promises ---
-    async_calls = [i+1 for i, line in enumerate(lines) if re.search(r'\.then\s*\(', line)]
-    for line_no in async_calls:
+    for line_no in hits['MISSING_CATCH']:
         # Check if there's a .catch nearby (within 5 lines)
-        nearby = '\n'.join(lines[line_no-1:min(line_no+5, len(lines))])
-        if '.catch' not in nearby and 'try' not in '\n'.join(lines[max(0,line_no-3):line_no]):
+        if (not any('.catch' in line for line in lines[line_no-1:line_no+5])
+                and not any('try' in line for line in lines[max(0, line_no-3):line_no])):
             issues.append({'severity': 'high', 'rule': 'MISSING_CATCH', 'file': rel_path, 'line': line_no, 'message': 'Promise .then() without .catch() — unhandled rejections crash the app', 'fix': 'Add .catch(err => console.error(err)) or use try/catch with async/await'})
             break  # Limit to 1 per file to avoid noise
 
     # --- MEDIUM: console.log / console.error left in ---
-    console_count = 0
-    for i, line in enumerate(lines, 1):
-        stripped = line.strip()
-        if re.search(r'\bconsole\.(log|warn|error|debug|info)\s*\(', stripped) and not stripped.startswith('//'):
-            console_count += 1
-    if console_count > 0:
+    console_count = len(hits['CONSOLE_STATEMENTS'])
+    if console_count > 0 and 'CONSOLE_STATEMENTS' not in budget.skipped:
         issues.append({'severity': 'medium', 'rule': 'CONSOLE_STATEMENTS', 'file': rel_path, 'line': 0, 'message': f'{console_count} console statement(s) found — remove before production deployment', 'fix': 'Remove console.log statements or replace with a proper logging library'})
 
     # --- MEDIUM: debugger statement ---
-    for i, line in enumerate(lines, 1):
-        if re.search(r'\bdebugger\b', line.strip()) and not line.strip().startswith('//'):
-            issues.append({'severity': 'medium', 'rule': 'DEBUGGER_STATEMENT', 'file': rel_path, 'line': i, 'message': 'debugger statement left in production code — pauses execution in DevTools', 'fix': 'Remove all debugger statements'})
+    for i in hits['DEBUGGER_STATEMENT']:
+        issues.append({'severity': 'medium', 'rule': 'DEBUGGER_STATEMENT', 'file': rel_path, 'line': i, 'message': 'debugger statement left in production code — pauses execution in DevTools', 'fix': 'Remove all debugger statements'})
 
     # --- MEDIUM: alert() / confirm() / prompt() ---
-    for i, line in enumerate(lines, 1):
-        stripped = line.strip()
-        if re.search(r'\b(alert|confirm|prompt)\s*\(', stripped) and not stripped.startswith('//'):
-            issues.append({'severity': 'medium', 'rule': 'BROWSER_DIALOG', 'file': rel_path, 'line': i, 'message': 'Browser dialog (alert/confirm/prompt) — poor UX in production apps', 'fix': 'Replace with a proper modal/dialog component'})
-            break
+    if hits['BROWSER_DIALOG']:
+        issues.append({'severity': 'medium', 'rule': 'BROWSER_DIALOG', 'file': rel_path, 'line': hits['BROWSER_DIALOG'][0], 'message': 'Browser dialog (alert/confirm/prompt) — poor UX in production apps', 'fix': 'Replace with a proper modal/dialog component'})
 
     # --- MEDIUM: TODO/FIXME/HACK in code ---
-    todo_count = sum(1 for line in lines if re.search(r'\b(TODO|FIXME|HACK|XXX)\b', line))
-    if todo_count >= 3:
+    todo_count = len(hits['TODO_COMMENTS'])
+    if todo_count >= 3 and 'TODO_COMMENTS' not in budget.skipped:
         issues.append({'severity': 'medium', 'rule': 'TODO_COMMENTS', 'file': rel_path, 'line': 0, 'message': f'{todo_count} TODO/FIXME comments found — unresolved technical debt', 'fix': 'Resolve or create tickets for all TODO/FIXME items before deployment'})
 
     # --- LOW: Large file ---
-    if len(lines) > 600:
+    if len(lines) > 600 and not reduced:
         issues.append({'severity': 'low', 'rule': 'LARGE_FILE', 'file': rel_path, 'line': 0, 'message': f'File has {len(lines)} lines — consider splitting into smaller modules', 'fix': 'Break into sub-components or separate utility files'})
 
     # --- LOW: Missing key prop in map() for React ---
     if filepath.endswith(('.jsx', '.tsx')):
-        for i, line in enumerate(lines, 1):
-            if re.search(r'\.map\s*\(\s*[\w(]', line) and 'key=' not in line:
-                # Check a few lines ahead for key prop
-                nearby = '\n'.join(lines[i-1:min(i+3, len(lines))])
-                if 'key=' not in nearby:
-                    issues.append({'severity': 'low', 'rule': 'MISSING_KEY_PROP', 'file': rel_path, 'line': i, 'message': 'Array .map() without key prop — React warning and potential rendering issues', 'fix': 'Add key={item.id} or key={index} to the outermost element returned from map()'})
-                    break
+        for i in hits['MISSING_KEY_PROP']:
+            # Check a few lines ahead for key prop
+            if not any('key=' in line for line in lines[i-1:i+3]):
+                issues.append({'severity': 'low', 'rule': 'MISSING_KEY_PROP', 'file': rel_path, 'line': i, 'message': 'Array .map() without key prop — React warning and potential rendering issues', 'fix': 'Add key={item.id} or key={index} to the outermost element returned from map()'})
+                break
+
+    # --- PERFORMANCE: whole-library imports ---
+    for i in hits['WHOLE_LIBRARY_IMPORT']:
+        issues.append({'severity': 'performance', 'rule': 'WHOLE_LIBRARY_IMPORT', 'file': rel_path, 'line': i, 'message': 'Whole-library import — the entire package ends up in the bundle, used or not', 'fix': "Import only what is used: import debounce from 'lodash/debounce', import { format } from 'date-fns', import { Search } from 'lucide-react'"})
+
+    # --- PERFORMANCE: JSON.parse() of a large inline string ---
+    for i in hits['INLINE_JSON_PARSE']:
+        issues.append({'severity': 'performance', 'rule': 'INLINE_JSON_PARSE', 'file': rel_path, 'line': i, 'message': f'JSON.parse() of a {len(lines[i - 1]) // 1024} KB inline string — parsed synchronously on the main thread while the module loads', 'fix': 'Serve the data as a .json file and fetch() it, or load this module with a dynamic import() off the critical path'})
+
+    # --- PERFORMANCE: lists rendered without pagination or virtualization ---
+    if (filepath.endswith(('.jsx', '.tsx')) and 'paginat' not in lowered
+            and not any(library in content for library in VIRTUALIZATION_LIBRARIES)):
+        for i in hits['UNVIRTUALIZED_LIST']:
+            # Only lists of rows: the element returned from map() is a row or an item
+            if any(LIST_ROW_RE.search(line) for line in lines[i-1:i+3]):
+                issues.append({'severity': 'performance', 'rule': 'UNVIRTUALIZED_LIST', 'file': rel_path, 'line': i, 'message': 'List rendered with .map() over the whole array, without pagination or virtualization — every row is mounted however many there are', 'fix': 'Paginate (or .slice()) the array, or virtualize the list with react-window / @tanstack/react-virtual'})
+                break  # Limit to 1 per file to avoid noise
+
+    # --- PERFORMANCE: setInterval polling without cleanup ---
+    if hits['INTERVAL_WITHOUT_CLEANUP'] and 'clearInterval' not in content:
+        issues.append({'severity': 'performance', 'rule': 'INTERVAL_WITHOUT_CLEANUP', 'file': rel_path, 'line': hits['INTERVAL_WITHOUT_CLEANUP'][0], 'message': 'setInterval() without clearInterval() — the polling keeps running, and stacks up, after the component unmounts', 'fix': 'Keep the interval id and clear it: useEffect(() => { const id = setInterval(poll, 5000); return () => clearInterval(id); }, [])'})
+
+    # --- PERFORMANCE: images without dimensions or lazy loading ---
+    unoptimized = []
+    for i in hits['UNOPTIMIZED_IMAGE']:
+        tag = image_tag(lines, i)
+        if not ('width' in tag and 'height' in tag and 'loading' in tag):
+            unoptimized.append(i)
+    if unoptimized:
+        issues.append({'severity': 'performance', 'rule': 'UNOPTIMIZED_IMAGE', 'file': rel_path, 'line': unoptimized[0], 'message': f'{len(unoptimized)} <img> without width/height or loading attribute — the layout shifts as images load, and off-screen images are downloaded up front', 'fix': 'Set width and height (or a CSS aspect-ratio) on every image, and loading="lazy" on images below the fold'})
 
     return issues
 
 
+# File extensions to check
+CODE_EXTENSIONS = {'.js', '.jsx', '.ts', '.tsx', '.mjs', '.cjs', '.vue', '.svelte', '.html'}
+# Directories to skip
+SKIP_DIRS = {'node_modules', '.git', 'dist', 'build', '.next', '__pycache__', 'coverage'}
+# Ignore files honored in every directory (.gitignore syntax)
+IGNORE_FILES = ('.gitignore', '.ignore')
+# Files larger than this are not read (--max-file-bytes)
+MAX_FILE_BYTES = 1_000_000
+# Files listed in the summary's "largest_files"
+LARGEST_FILES = 5
+# Minified / generated file detection, on the first SNIFF_CHARS characters: a file is
+# minified when most of them sit on lines of MINIFIED_LINE_CHARS or more, and encoded
+# data (base64 blobs, inlined fonts) when their entropy reaches ENCODED_ENTROPY_BITS
+# per character — hand-written code stays around 4.5-5.2
+SNIFF_CHARS = 4096
+MINIFIED_LINE_CHARS = 1000
+MINIFIED_WHITESPACE = 0.10
+ENCODED_ENTROPY_BITS = 5.8
+# Files submitted to the pool ahead of the one being merged, per worker
+IN_FLIGHT_PER_WORKER = 4
+# Files and results kept in the --cache index (least recently used dropped first)
+CACHE_MAX_ENTRIES = 5000
+
+
+# Copy of available_cores() in lambda-v2/shared/batch.py (this skill is uploaded without it):
+# keep in sync
+def available_cores():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # macOS / Windows
+        return os.cpu_count() or 1
+
+
+def glob_part(part):
+    """Regex for one '/'-free segment of an ignore pattern."""
+    regex = ''
+    i = 0
+    while i < len(part):
+        c = part[i]
+        if c == '*':
+            while i + 1 < len(part) and part[i + 1] == '*':
+                i += 1
+            regex += '[^/]*'
+        elif c == '?':
+            regex += '[^/]'
+        elif c == '[' and ']' in part[i + 2:]:
+            close = part.index(']', i + 2)
+            body = part[i + 1:close]
+            if body.startswith('!'):
+                body = '^' + body[1:]
+            regex += '[' + body + ']'
+            i = close
+        elif c == '\\' and i + 1 < len(part):
+            i += 1
+            regex += re.escape(part[i])
+        else:
+            regex += re.escape(c)
+        i += 1
+    return regex
+
+
+def ignore_rule(line):
+    """(regex, negated, directories only) for one line of an ignore file, or None.
+
+    Follows .gitignore: '#' comments, '!' re-includes, a trailing '/' matches directories
+    only, a pattern with a '/' (other than trailing) is anchored to the ignore file's
+    directory while one without matches at any depth, and '**' spans directories.
+    The regex is matched against '/'-separated paths relative to that directory.
+    """
+    line = line.rstrip('\r\n').rstrip(' ')
+    if not line or line.startswith('#'):
+        return None
+    negated = line.startswith('!')
+    if negated or line.startswith('\\'):
+        line = line[1:]
+    dir_only = line.endswith('/')
+    pattern = line.rstrip('/')
+    anchored = '/' in pattern
+    pattern = pattern.lstrip('/')
+    if not pattern:
+        return None
+    parts = pattern.split('/')
+    regex = '' if anchored else '(?:.*/)?'
+    for i, part in enumerate(parts):
+        last = i == len(parts) - 1
+        if part == '**':
+            regex += '.*' if last else '(?:.*/)?'
+        else:
+            regex += glob_part(part) + ('' if last else '/')
+    try:
+        return re.compile(regex + r'\Z'), negated, dir_only
+    except re.error:  # e.g. a malformed [range]: git ignores the pattern too
+        return None
+
+
+def read_ignore_file(path):
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            return [rule for rule in map(ignore_rule, f) if rule]
+    except OSError:
+        return []
+
+
+def is_ignored(ignores, rel_path, is_dir):
+    """Whether `rel_path` ('/'-separated) is excluded by the ignore files of its directories.
+
+    `ignores` holds (directory, rules) from the root down; the last matching rule wins.
+    """
+    ignored = False
+    for base, rules in ignores:
+        path = rel_path[len(base) + 1:] if base else rel_path
+        for regex, negated, dir_only in rules:
+            if (is_dir or not dir_only) and regex.match(path):
+                ignored = not negated
+    return ignored
+
+
+def discover_files(webapp_dir, max_bytes=MAX_FILE_BYTES):
+    """(path, relative path, stat, skip reason) of every code file, in sorted path order.
+
+    Walks the tree with os.scandir (the stat is reused by the cache), skipping SKIP_DIRS,
+    symlinked directories and whatever the IGNORE_FILES exclude. The skip reason is
+    None unless the file is larger than `max_bytes` — such files are never read.
+    """
+    found = []
+
+    def walk(dirpath, rel_parts, ignores):
+        try:
+            with os.scandir(dirpath) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError:
+            return
+        names = {entry.name for entry in entries}
+        rules = [rule for name in IGNORE_FILES if name in names
+                 for rule in read_ignore_file(os.path.join(dirpath, name))]
+        if rules:
+            ignores = ignores + [('/'.join(rel_parts), rules)]
+        subdirs = []
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            posix_path = '/'.join(rel_parts + [entry.name])
+            if is_dir:
+                if entry.name not in SKIP_DIRS and not entry.is_symlink() and not is_ignored(ignores, posix_path, True):
+                    subdirs.append(entry)
+                continue
+            if os.path.splitext(entry.name)[1].lower() not in CODE_EXTENSIONS or is_ignored(ignores, posix_path, False):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                stat = None  # scan_file reports the read error
+            reason = None
+            if stat is not None and stat.st_size > max_bytes:
+                reason = f'larger than --max-file-bytes ({stat.st_size} > {max_bytes} bytes)'
+            found.append((entry.path, os.path.join(*rel_parts, entry.name), stat, reason))
+        # Files of a directory before its subdirectories, as os.walk
+        for entry in subdirs:
+            walk(entry.path, rel_parts + [entry.name], ignores)
+
+    walk(webapp_dir, [], [])
+    return found
+
+
+def sniff_generated(content):
+    """Why the file looks minified or generated (from its first SNIFF_CHARS characters), or None."""
+    sample = content[:SNIFF_CHARS]
+    if not sample:
+        return None
+    counts = Counter(sample).values()
+    entropy = -sum(n / len(sample) * math.log2(n / len(sample)) for n in counts)
+    if entropy >= ENCODED_ENTROPY_BITS:
+        return f'encoded data: {entropy:.1f} bits of entropy per character in the first {len(sample)} characters'
+    long_chars = sum(len(line) for line in sample.splitlines() if len(line) >= MINIFIED_LINE_CHARS)
+    if long_chars * 2 >= len(sample):
+        whitespace = sum(map(sample.count, ' \t\r\n')) / len(sample)
+        kind = 'minified' if whitespace < MINIFIED_WHITESPACE else 'generated'
+        return (f'{kind}: {long_chars * 100 // len(sample)}% of the first {len(sample)} characters on lines '
+                f'of {MINIFIED_LINE_CHARS}+ characters, {whitespace:.0%} whitespace')
+    return None
+
+
+def scan_file(filepath, rel_path, check_budget_ms, file_budget_ms, cache=None, content=None, minified='reduced'):
+    """Read (unless `content` is given) and check one file — runs in a worker process in parallel mode.
+
+    Returns {issues, skipped, checked, cache, note}; `cache` is the file's check_file() cache,
+    updated. `note` is None, or {status: 'reduced' | 'skipped', reason} for a file that
+    looks minified or generated (see sniff_generated and --minified).
+    """
+    try:
+        if content is None:
+            with open(filepath, 'r', encoding='utf-8', errors='replace') as f:
+                content = f.read()
+        reason = sniff_generated(content)
+        note = reason and {'status': 'skipped' if minified == 'skip' else 'reduced', 'reason': reason}
+        if note and note['status'] == 'skipped':
+            return {'issues': [], 'skipped': [], 'checked': False, 'cache': cache, 'note': note}
+        budget = Budget(check_budget_ms, file_budget_ms)
+        issues = check_file(rel_path, content, budget, cache=cache, reduced=bool(note))
+        skipped = [{'file': rel_path, 'rule': rule, 'reason': SKIPPED_REASON} for rule in budget.skipped]
+        return {'issues': issues, 'skipped': skipped, 'checked': True, 'cache': cache, 'note': note}
+    except Exception as e:
+        issue = {'severity': 'low', 'rule': 'READ_ERROR', 'file': rel_path, 'line': 0, 'message': f'Could not read file: {e}', 'fix': 'Ensure file is valid UTF-8 encoded text'}
+        return {'issues': [issue], 'skipped': [], 'checked': False, 'cache': cache, 'note': None}
+
+
+def scan_files(jobs, workers):
+    """scan_file() results for `jobs` (argument tuples), in job order, as each is merged.
+
+    With several workers, files are checked on a process pool with at most
+    IN_FLIGHT_PER_WORKER files per worker submitted ahead of the next result to merge.
+    """
+    if workers > 1 and len(jobs) > 1:
+        # Imported here: a run served from the cache never starts a pool
+        from concurrent.futures import ProcessPoolExecutor
+        try:
+            pool = ProcessPoolExecutor(max_workers=min(workers, len(jobs)))
+        except (OSError, NotImplementedError):
+            pool = None  # no process support (e.g. no /dev/shm): check serially
+        if pool is not None:
+            with pool:
+                pending = deque()
+                try:
+                    for job in jobs:
+                        pending.append(pool.submit(scan_file, *job))
+                        if len(pending) >= workers * IN_FLIGHT_PER_WORKER:
+                            yield pending.popleft().result()
+                    while pending:
+                        yield pending.popleft().result()
+                finally:
+                    # Closed early (--max-issues / --fail-fast-on): drop the files not started yet
+                    for future in pending:
+                        future.cancel()
+            return
+    for job in jobs:
+        yield scan_file(*job)
+
+
+def load_cache(path):
+    """JSON object saved at `path`, or {} if there is none (or it cannot be read)."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def content_key(filepath, content, minified='reduced'):
+    """Cache key of a file's results: its content hash, plus the one path-dependent check
+    (.jsx/.tsx) and the --minified mode."""
+    kind = 'jsx' if filepath.endswith(('.jsx', '.tsx')) else 'js'
+    return hashlib.sha1(f'{kind}\0{minified}\0{content}'.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """The --cache index and the previous version of every file.
+
+    PATH holds {ruleset, files: {absolute path: {mtime_ns, size, key, minified}},
+    results: {key: {issues, note}}}, both maps in least-recently-used order and capped at
+    CACHE_MAX_ENTRIES. An unchanged mtime/size (and --minified mode) stands for an
+    unchanged content key without reading the file; results are looked up by content key,
+    so a renamed or reverted file is a hit too. Only results with no check cut short by
+    the budget are kept. A cache written by another version
+    of these checks (RULESET_VERSION) is ignored.
+
+    PATH.d/<key>.json holds each file's last checked version (its check_file() cache), read
+    only when the file changed, so the re-check only scans the changed lines.
+    """
+
+    def __init__(self, path, minified='reduced'):
+        self.path = path
+        self.minified = minified
+        self.versions_dir = path + '.d'
+        index = load_cache(path)
+        if index.get('ruleset') != RULESET_VERSION:
+            index = {}
+        self.files = index.get('files', {})
+        self.results = index.get('results', {})
+
+    def probe(self, filepath, stat=None):
+        """Stat the file (unless discovery did), and read and hash it unless its mtime/size say
+        it is unchanged.
+
+        Returns {path, mtime_ns, size, key, content (None when not read), previous_key}.
+        """
+        path = os.path.abspath(filepath)
+        entry = self.files.get(path, {})
+        stat = stat or os.stat(filepath)
+        probe = {'path': path, 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'key': entry.get('key'),
+                 'content': None, 'previous_key': entry.get('key')}
+        unchanged = ((entry.get('mtime_ns'), entry.get('size'), entry.get('minified', 'reduced'))
+                     == (stat.st_mtime_ns, stat.st_size, self.minified))
+        if not unchanged or probe['key'] not in self.results:
+            with open(filepath, 'r', encoding='utf-8', errors='replace') as f:
+                probe['content'] = f.read()
+            probe['key'] = content_key(filepath, probe['content'], self.minified)
+        return probe
+
+    def result(self, probe, rel_path):
+        """Cached scan_file() result of the probed content, reported for `rel_path` — or None."""
+        cached = self.results.pop(probe['key'], None)
+        if cached is None:
+            return None
+        self.results[probe['key']] = cached
+        self.touch(probe)
+        note = cached['note']
+        return {'issues': [dict(issue, file=rel_path) for issue in cached['issues']], 'skipped': [],
+                'checked': not note or note['status'] == 'reduced', 'note': note}
+
+    def touch(self, probe):
+        """Record the probed version of a merged file, as the most recently used entry.
+
+        Entries are only replaced here: a file the scan stopped before merging keeps its
+        entry (and its PATH.d version) for the next run.
+        """
+        self.files.pop(probe['path'], None)
+        self.files[probe['path']] = {'mtime_ns': probe['mtime_ns'], 'size': probe['size'], 'key': probe['key'],
+                                     'minified': self.minified}
+
+    def previous(self, probe):
+        """check_file() cache of the file's last checked version, or {}."""
+        if not probe['previous_key']:
+            return {}
+        return load_cache(os.path.join(self.versions_dir, probe['previous_key'] + '.json'))
+
+    def store(self, probe, result):
+        self.touch(probe)
+        if (result['checked'] or result['note']) and not result['skipped']:
+            self.results[probe['key']] = {'issues': result['issues'], 'note': result['note']}
+        if result['cache']:
+            os.makedirs(self.versions_dir, exist_ok=True)
+            with open(os.path.join(self.versions_dir, probe['key'] + '.json'), 'w', encoding='utf-8') as f:
+                f.write(json.dumps(result['cache']))
+
+    def save(self):
+        for entries in (self.files, self.results):
+            for key in list(entries)[:max(0, len(entries) - CACHE_MAX_ENTRIES)]:
+                del entries[key]
+        # json.dumps (unlike json.dump) runs the C encoder
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'ruleset': RULESET_VERSION, 'files': self.files, 'results': self.results}))
+        # Drop the versions no indexed file refers to any more
+        live = {entry['key'] + '.json' for entry in self.files.values()}
+        if os.path.isdir(self.versions_dir):
+            for name in os.listdir(self.versions_dir):
+                if name not in live:
+                    os.remove(os.path.join(self.versions_dir, name))
+
+
+def emit_record(record):
+    """Write one NDJSON record, flushed so the caller can act on it while the scan goes on."""
+    try:
+        sys.stdout.write(json.dumps(record) + '\n')
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # The reader stopped reading (e.g. at the first critical issue): stop the scan quietly
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Static analysis for any web application.')
+    parser.add_argument('directory', nargs='?')
+    parser.add_argument('--check-budget-ms', type=float, default=CHECK_BUDGET_MS,
+                        help=f'Time budget per check and file (default: {CHECK_BUDGET_MS})')
+    parser.add_argument('--file-budget-ms', type=float, default=FILE_BUDGET_MS,
+                        help=f'Time budget for all checks of one file (default: {FILE_BUDGET_MS})')
+    parser.add_argument('--cache', default=None, metavar='PATH',
+                        help='Result cache (JSON index; previous file versions in PATH.d/): unchanged files '
+                             'are not checked again, changed files only on their changed lines')
+    parser.add_argument('--workers', type=int, default=available_cores(),
+                        help='Processes checking files in parallel; 1 checks serially (default: available cores)')
+    parser.add_argument('--max-file-bytes', type=int, default=MAX_FILE_BYTES,
+                        help=f'Files larger than this are skipped without being read (default: {MAX_FILE_BYTES})')
+    parser.add_argument('--minified', choices=('reduced', 'skip'), default='reduced',
+                        help='Minified / generated files: run only the secret checks, or skip them (default: reduced)')
+    parser.add_argument('--format', choices=('json', 'ndjson'), default='json',
+                        help='json: one report at the end; ndjson: one {"type": "issue"} line per issue as '
+                             'files are merged, then a {"type": "summary"} line (default: json)')
+    parser.add_argument('--max-issues', type=int, default=None, metavar='N',
+                        help='Stop the scan once N issues have been reported')
+    parser.add_argument('--fail-fast-on', choices=SEVERITIES, default=None, metavar='SEVERITY',
+                        help='Stop the scan (exit status 1) at the first issue of this severity or above')
+    return parser.parse_args(argv)
+
+
 def main():
-    if len(sys.argv) < 2:
+    args = parse_args()
+    if not args.directory:
         print(json.dumps({'error': 'Usage: check_web_app.py <directory>'}))
         sys.exit(1)
 
-    webapp_dir = sys.argv[1]
+    webapp_dir = args.directory
     if not os.path.exists(webapp_dir):
         print(json.dumps({'error': f'Directory not found: {webapp_dir}'}))
         sys.exit(1)
 
-    # File extensions to check
-    CODE_EXTENSIONS = {'.js', '.jsx', '.ts', '.tsx', '.mjs', '.cjs', '.vue', '.svelte', '.html'}
-    # Directories to skip
-    SKIP_DIRS = {'node_modules', '.git', 'dist', 'build', '.next', '__pycache__', 'coverage'}
-
-    all_issues = []
+    all_issues = []  # json format only: ndjson writes each issue out as it is merged
+    severities = Counter()
+    skipped_checks = []
+    skipped_files = []
+    reduced_files = []
     files_checked = 0
+    store = ResultCache(args.cache, args.minified) if args.cache else None
 
-    for root, dirs, files in os.walk(webapp_dir):
-        # Skip ignored directories
-        dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
-
-        for filename in files:
-            ext = os.path.splitext(filename)[1].lower()
-            if ext not in CODE_EXTENSIONS:
-                continue
-
-            filepath = os.path.join(root, filename)
-            rel_path = os.path.relpath(filepath, webapp_dir)
-
+    files = discover_files(webapp_dir, args.max_file_bytes)
+    results = [None] * len(files)
+    jobs = []
+    probes = {}
+    for index, (filepath, rel_path, stat, reason) in enumerate(files):
+        if reason:
+            results[index] = {'issues': [], 'skipped': [], 'checked': False, 'note': {'status': 'skipped', 'reason': reason}}
+            continue
+        previous = content = None
+        if store is not None:
             try:
-                with open(filepath, 'r', encoding='utf-8', errors='replace') as f:
-                    content = f.read()
-                issues = check_file(rel_path, content)
-                all_issues.extend(issues)
-                files_checked += 1
-            except Exception as e:
-                all_issues.append({'severity': 'low', 'rule': 'READ_ERROR', 'file': rel_path, 'line': 0, 'message': f'Could not read file: {e}', 'fix': 'Ensure file is valid UTF-8 encoded text'})
+                probe = store.probe(filepath, stat)
+            except OSError:
+                probe = None  # scan_file reports the read error
+            if probe is not None:
+                cached = store.result(probe, rel_path)
+                if cached is not None:
+                    results[index] = cached
+                    continue
+                probes[index] = probe
+                previous, content = store.previous(probe), probe['content']
+        jobs.append((index, (filepath, rel_path, args.check_budget_ms, args.file_budget_ms, previous, content,
+                             args.minified)))
+
+    # Results are merged in path order as they come in: cached ones are ready, the others
+    # come from the pool in job order
+    scanned = scan_files([job for _, job in jobs], args.workers)
+    stopped = None
+    failed = False
+    for index, (_, rel_path, _, _) in enumerate(files):
+        result = results[index]
+        if result is None:
+            result = next(scanned)
+            if index in probes:
+                store.store(probes[index], result)
+        skipped_checks.extend(result['skipped'])
+        files_checked += result['checked']
+        if result['note']:
+            notes = skipped_files if result['note']['status'] == 'skipped' else reduced_files
+            notes.append({'file': rel_path, 'reason': result['note']['reason']})
+        for issue in result['issues']:
+            severities[issue['severity']] += 1
+            if args.format == 'ndjson':
+                emit_record({'type': 'issue', **issue})
+            else:
+                all_issues.append(issue)
+            if args.fail_fast_on and SEVERITIES.index(issue['severity']) <= SEVERITIES.index(args.fail_fast_on):
+                stopped = f"{issue['severity']} issue found (--fail-fast-on {args.fail_fast_on})"
+                failed = True
+            elif args.max_issues is not None and sum(severities.values()) >= args.max_issues:
+                stopped = f'--max-issues {args.max_issues} reached'
+            if stopped:
+                break
+        if stopped:
+            break
+    scanned.close()
 
+    # Sizes from the discovery walk's stat(): the files a stopped scan dropped count too
+    sizes = [(stat.st_size, rel_path) for _, rel_path, stat, _ in files if stat is not None]
     output = {
         'files_checked': files_checked,
-        'total_issues': len(all_issues),
-        'critical': sum(1 for i in all_issues if i['severity'] == 'critical'),
-        'high': sum(1 for i in all_issues if i['severity'] == 'high'),
-        'medium': sum(1 for i in all_issues if i['severity'] == 'medium'),
-        'low': sum(1 for i in all_issues if i['severity'] == 'low'),
+        'source_bytes': sum(size for size, _ in sizes),
+        'largest_files': [{'file': rel_path, 'bytes': size}
+                          for size, rel_path in sorted(sizes, key=lambda entry: (-entry[0], entry[1]))[:LARGEST_FILES]],
+        'total_issues': sum(severities.values()),
+        **{severity: severities[severity] for severity in SEVERITIES},
         'issues': all_issues,
+        'skipped_checks': skipped_checks,
+        'skipped_files': skipped_files,
+        'reduced_files': reduced_files,
+        'stopped': stopped,
     }
 
-    print(json.dumps(output, indent=2))
+    if store is not None:
+        store.save()
 
+    if args.format == 'ndjson':
+        del output['issues']
+        emit_record({'type': 'summary', **output})
+    else:
+        print(json.dumps(output, indent=2))
+    # A scan stopped by --fail-fast-on has failed; --max-issues only truncates the report
+    sys.exit(1 if failed else 0)
 
 if __name__ == '__main__':
     main()
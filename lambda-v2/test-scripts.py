@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+test-scripts.py — Unit tests for the Python scripts of the skills.
+
+Runs offline (no API key, no skill upload), on small inputs built in the tests:
+
+  data-analyzer      compute_stats.py, filter_index.py, analyze_bundle.py
+  dashboard-reviewer check_code.py (apps from bench-scripts.py's generator)
+  shared             batch.py, and the copies of lambda-v2/shared/ in the skills
+
+Usage:
+  python test-scripts.py           Run every test
+  python test-scripts.py -v        One line per test
+"""
+
+import importlib.util
+import inspect
+import io
+import json
+import random
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+HERE = Path(__file__).resolve().parent
+for _skill in ("data-analyzer", "dashboard-reviewer", "web-app-reviewer"):
+    sys.path.insert(0, str(HERE / "skills" / _skill / "scripts"))
+
+import analyze_bundle  # noqa: E402
+import batch  # noqa: E402
+import check_code  # noqa: E402
+import check_web_app  # noqa: E402
+import compute_stats  # noqa: E402
+import filter_index  # noqa: E402
+
+# bench-scripts.py's synthetic App.jsx generator (the module name has a dash: loaded by path)
+_spec = importlib.util.spec_from_file_location("bench_scripts", HERE / "bench-scripts.py")
+bench = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(bench)
+
+
+# ---------------------------------------------------------------------------
+# data-analyzer
+# ---------------------------------------------------------------------------
+
+SALES = [
+    {"Mois": "2024-01-01", "Region": "Nord", "Ventes": "1 200,50 €", "Quantite": 3},
+    {"Mois": "2024-02-01", "Region": "Sud", "Ventes": "300 €", "Quantite": 1},
+    {"Mois": "2024-03-01", "Region": "Nord", "Ventes": "2 000 €", "Quantite": 7},
+]
+SALES_COLUMNS = [
+    {"name": "Mois", "type": "date"},
+    {"name": "Region", "type": "categorical"},
+    {"name": "Ventes", "type": "currency"},
+    {"name": "Quantite", "type": "numeric"},
+]
+
+
+class ComputeStatsTest(unittest.TestCase):
+    def test_sort_index_alone(self):
+        """fields=["sortIndex"] still encodes the numeric and currency columns."""
+        stats = compute_stats.compute(SALES, SALES_COLUMNS, {}, fields=["sortIndex"])
+        for name in ("Mois", "Ventes", "Quantite"):
+            self.assertEqual(stats[name]["sortIndex"]["validCount"], 3, name)
+        full = compute_stats.compute(SALES, SALES_COLUMNS, {}, fields=["sum", "sortIndex"])
+        self.assertEqual(stats["Ventes"]["sortIndex"], full["Ventes"]["sortIndex"])
+
+
+class FilterIndexTest(unittest.TestCase):
+    def test_serve_rejects_non_object_requests(self):
+        """A request that is not a JSON object gets an error line; the worker keeps serving."""
+        index = filter_index.build_index(SALES, SALES_COLUMNS, {})
+        stdin = io.StringIO("[1]\n\"x\"\nnull\n{\"Region\": \"Nord\"}\n")
+        stdout = io.StringIO()
+        filter_index.serve(index, ["sum"], "full", stdin=stdin, stdout=stdout)
+        responses = [json.loads(line) for line in stdout.getvalue().splitlines()]
+        self.assertEqual(responses[:3], [{"error": "request must be an object"}] * 3)
+        self.assertEqual(responses[3]["stats"]["Quantite"]["sum"], 10)
+
+
+class AnalyzeBundleTest(unittest.TestCase):
+    def test_unexpected_error_fails_one_dataset(self):
+        broken = [dict(row) for row in SALES]
+        original = analyze_bundle.check
+
+        def check(data, columns_info):
+            if data is broken:
+                raise RuntimeError("boom")
+            return original(data, columns_info)
+
+        with mock.patch.object(analyze_bundle, "check", check):
+            result = analyze_bundle.analyze_bundle({"ventes": SALES, "casse": broken})
+        self.assertEqual(result["datasets"]["casse"]["error"], "RuntimeError: boom")
+        self.assertIn("stats", result["datasets"]["ventes"])
+        self.assertEqual(result["summary"]["failed"], ["casse"])
+
+
+# ---------------------------------------------------------------------------
+# dashboard-reviewer
+# ---------------------------------------------------------------------------
+
+class CheckCodeTest(unittest.TestCase):
+    def check(self, code):
+        hits = []
+        result = check_code.check_code(code, hits=hits)
+        return result, hits
+
+    def test_counts_without_performance_rules(self):
+        """passed/failed and the rule hits are those of the rules before the perf-* family."""
+        rnd = random.Random(bench.SEED)
+        for code, passed, failed in ((bench.make_app(rnd, 300, 0.2), 22, 2), (bench.adversarial_app(), 14, 3)):
+            result, hits = self.check(code)
+            self.assertEqual((result["passed"], result["failed"]), (passed, failed))
+            self.assertEqual(len(hits), failed)
+
+    def test_performance_findings_not_counted(self):
+        chart = bench.CHART_BLOCKS[0].replace("data={rows}", "data={DATA}")
+        result, hits = self.check("\n".join([bench.APP_HEADER, chart, bench.APP_FOOTER]))
+        self.assertEqual(len(result["performance"]), 1)
+        self.assertEqual((result["passed"], result["failed"]), (18, 2))
+        self.assertNotIn("perf-chart-raw-data", hits)
+
+
+# ---------------------------------------------------------------------------
+# shared
+# ---------------------------------------------------------------------------
+
+def check_item(path, line):
+    if line == "broken":
+        raise RuntimeError("unexpected input")
+    return {"errors": [], "warnings": [], "rules": []}
+
+
+class BatchTest(unittest.TestCase):
+    def test_exception_marks_item_invalid(self):
+        items = [(f"item-{n}", None, line) for n, line in enumerate(["ok", "broken", "ok"])]
+        results = list(batch.check_items(items, check_item, 1))
+        self.assertEqual([r["status"] for r in results], ["pass", "invalid", "pass"])
+        self.assertEqual(results[1]["errors"], ["RuntimeError: unexpected input"])
+        self.assertEqual(results[1]["id"], "item-1")
+
+
+class SharedCopiesTest(unittest.TestCase):
+    """Skills are uploaded one by one, so lambda-v2/shared/ files are copied into them."""
+
+    def test_copies_identical(self):
+        for name in ("app_rules.py", "batch.py"):
+            shared = (HERE / "shared" / name).read_bytes()
+            for skill in ("dashboard-generator", "dashboard-reviewer"):
+                copy = HERE / "skills" / skill / "scripts" / name
+                self.assertTrue(copy.read_bytes() == shared,
+                                f"{copy.relative_to(HERE)} differs from shared/{name}: copy it again")
+
+    def test_available_cores_copies(self):
+        source = inspect.getsource(batch.available_cores)
+        for module in (analyze_bundle, check_web_app):
+            self.assertEqual(inspect.getsource(module.available_cores), source, module.__name__)
+
+
+if __name__ == "__main__":
+    unittest.main()